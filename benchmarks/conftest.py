@@ -0,0 +1,127 @@
+"""
+Gas benchmarks for the protocol hot paths, compared against the committed baseline.json.
+
+Every benchmark measures its call(s) over a grid of states and records the gas through the `gas`
+fixture; at the end of the session the run is diffed against the baseline and a report is
+printed. A benchmark costing more than the baseline (beyond --gas-tolerance) is a regression and
+fails the session, so every contract change shows its gas delta:
+
+    pytest benchmarks                       # measure and compare
+    pytest benchmarks --gas-update          # accept the current numbers as the new baseline
+    pytest benchmarks --gas-report gas.json # also write the comparison as JSON (CI artifacts)
+
+A benchmark missing from the baseline is reported as new and fails the session as well, so nothing
+runs ungated: record it with --gas-update and commit baseline.json. Baseline entries a (partial)
+run did not measure are kept on update. Works under xdist: measurements travel to the controller
+in the test reports.
+
+A commit that changes a contract reruns the benchmarks with --gas-update and commits
+baseline.json with it, so the baseline always matches the tree. For that to hold under any
+selection, a benchmark measures the same state whatever else runs: a fixture which changes
+shared chain state (VE locks, votes) is only module-scoped if every benchmark of the module
+uses it.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import *  # noqa: F401,F403
+from tests.dao.conftest import *  # noqa: F401,F403
+from tests.net_pressure.conftest import *  # noqa: F401,F403
+
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+_results = {}  # benchmark key -> gas, collected from the test reports
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("gas benchmarks")
+    group.addoption("--gas-update", action="store_true", default=False,
+                    help="Write the measured gas into benchmarks/baseline.json")
+    group.addoption("--gas-tolerance", type=float, default=0.0,
+                    help="Relative gas increase (e.g. 0.01) tolerated before it counts as a regression")
+    group.addoption("--gas-report", default=None,
+                    help="Also write the baseline comparison to this JSON file")
+
+
+@pytest.fixture
+def gas(request):
+    """
+    gas(contract, label=None) records the gas of `contract`'s last call (transaction or view)
+    under this benchmark's id, suffixed by `label` when one test measures several calls.
+    """
+    def record(contract, label=None):
+        used = contract._computation.get_gas_used()
+        key = f"{request.node.path.stem}::{request.node.name}"
+        if label:
+            key += f"::{label}"
+        request.node.user_properties.append(("gas", (key, used)))
+        return used
+
+    return record
+
+
+def pytest_runtest_logreport(report):
+    if report.when == "call" and report.passed:
+        _results.update(value for name, value in report.user_properties if name == "gas")
+
+
+def compare(baseline, results, tolerance=0.0):
+    """Rows of (key, baseline gas or None, measured gas, status), sorted by key."""
+    rows = []
+    for key in sorted(results):
+        base, used = baseline.get(key), results[key]
+        if base is None:
+            status = "new"
+        elif used > base * (1 + tolerance):
+            status = "REGRESSION"
+        elif used < base:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((key, base, used, status))
+    return rows
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if hasattr(config, "workerinput") or not _results:
+        return
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    rows = compare(baseline, _results, config.getoption("gas_tolerance", 0.0))
+    config._gas_rows = rows
+
+    if config.getoption("gas_report", None):
+        report = {key: {"baseline": base, "gas": used, "status": status} for key, base, used, status in rows}
+        Path(config.getoption("gas_report")).write_text(json.dumps(report, indent=1) + "\n")
+
+    if config.getoption("gas_update", False):
+        baseline.update(_results)
+        BASELINE.write_text(json.dumps(dict(sorted(baseline.items())), indent=1) + "\n")
+    elif any(status in ("REGRESSION", "new") for *_, status in rows) and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    rows = getattr(config, "_gas_rows", None)
+    if not rows:
+        return
+    width = max(len(key) for key, *_ in rows)
+    terminalreporter.section("gas")
+    terminalreporter.write_line(f"{'benchmark':<{width}} {'baseline':>10} {'gas':>10} {'delta':>9} {'%':>8}")
+    for key, base, used, status in rows:
+        if base is None:
+            terminalreporter.write_line(f"{key:<{width}} {'-':>10} {used:>10} {'-':>9} {'-':>8}  {status}")
+            continue
+        delta = used - base
+        pct = 100 * delta / base if base else 0.0
+        flag = "" if status == "ok" else f"  {status}"
+        terminalreporter.write_line(f"{key:<{width}} {base:>10} {used:>10} {delta:>+9} {pct:>+7.2f}%{flag}",
+                                    red=status == "REGRESSION", green=status == "improved")
+    counts = {s: sum(1 for *_, status in rows if status == s) for s in ("REGRESSION", "improved", "new", "ok")}
+    summary = ", ".join(f"{n} {s.lower()}" for s, n in counts.items() if n)
+    if config.getoption("gas_update", False):
+        summary += f"; baseline updated ({BASELINE.name})"
+    terminalreporter.write_line(summary)
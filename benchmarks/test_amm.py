@@ -0,0 +1,37 @@
+"""
+AMM.exchange in both directions, on positions of different size, for trades of 1bp and 1% of the
+position.
+"""
+import boa
+import pytest
+
+from tests.conftest import PRICE
+
+
+COLLATERAL = [10**18, 1000 * 10**18]  # position: 1 and 1000 collateral tokens
+TRADE = [10**-4, 10**-2]                # trade size as a fraction of the position
+
+
+@pytest.fixture
+def position(amm, collateral_token, stablecoin, admin, request):
+    collateral = request.param
+    debt = PRICE * collateral // 2
+    stablecoin._mint_for_testing(amm.address, 10**60)  # stablecoins to pay out on sells
+    collateral_token._mint_for_testing(admin, collateral)
+    with boa.env.prank(admin):
+        amm._deposit(collateral, debt)
+        collateral_token.transfer(amm.address, collateral)
+        stablecoin.transferFrom(amm.address, admin, debt)
+    return collateral
+
+
+@pytest.mark.parametrize("trade", TRADE, ids=["1bp", "1pct"])
+@pytest.mark.parametrize("position", COLLATERAL, ids=["1coll", "1000coll"], indirect=True)
+@pytest.mark.parametrize("i", [0, 1], ids=["buy", "sell"])
+def test_exchange(amm, stablecoin, collateral_token, accounts, gas, position, trade, i):
+    user = accounts[0]
+    in_amount = int(position * trade) * (PRICE if i == 0 else 1)
+    (stablecoin if i == 0 else collateral_token)._mint_for_testing(user, in_amount)
+    with boa.env.prank(user):
+        amm.exchange(i, 1 - i, in_amount, 0)
+    gas(amm)
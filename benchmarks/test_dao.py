@@ -0,0 +1,63 @@
+"""
+GaugeController.checkpoint after gauges sat idle for a day up to two years (one weekly point per
+week to catch up), and FeeDistributor.claim of a user who last claimed from one to twenty epochs ago.
+"""
+import boa
+import pytest
+
+
+WEEK = 7 * 86400
+MAX_TIME = 4 * 365 * 86400
+N_GAUGES = 3
+
+
+@pytest.fixture  # Not module-wide: its VE locks would change what the FeeDistributor benchmarks measure
+def voted_gauges(gc, ve_yb, yb, mock_gov_token, accounts, admin):
+    gauge_deployer = boa.load_partial('contracts/testing/MockLiquidityGauge.vy')
+    gauges = [gauge_deployer.deploy(mock_gov_token.address) for _ in range(N_GAUGES)]
+    with boa.env.prank(admin):
+        for g in gauges:
+            gc.add_gauge(g.address)
+    for i, user in enumerate(accounts[:N_GAUGES]):
+        with boa.env.prank(admin):
+            yb.mint(user, 10**24)
+        with boa.env.prank(user):
+            yb.approve(ve_yb.address, 2**256 - 1)
+            ve_yb.create_lock(10**24, boa.env.evm.patch.timestamp + MAX_TIME)
+            gc.vote_for_gauge_weights([g.address for g in gauges], [10000 // N_GAUGES] * N_GAUGES)
+    return gauges
+
+
+@pytest.mark.parametrize("idle", [86400, WEEK, 10 * WEEK, 104 * WEEK], ids=["1d", "1w", "10w", "104w"])
+def test_gc_checkpoint(gc, voted_gauges, gas, idle):
+    boa.env.time_travel(idle)
+    gc.checkpoint(voted_gauges[0].address)
+    gas(gc)
+
+
+@pytest.fixture(scope="module")
+def fee_distributor(token_mock, ve_yb, yb, accounts, admin):
+    tokens = [token_mock.deploy("Token %s" % i, "TOK-%s" % i, 18) for i in range(4)]
+    fd = boa.load('contracts/dao/FeeDistributor.vy', tokens, ve_yb, [], admin)
+    user = accounts[5]
+    with boa.env.prank(admin):
+        yb.mint(user, 10**24)
+    with boa.env.prank(user):
+        yb.approve(ve_yb.address, 2**256 - 1)
+        ve_yb.create_lock(10**24, boa.env.evm.patch.timestamp + MAX_TIME)
+    for week in range(20):
+        for token in tokens:
+            token._mint_for_testing(fd.address, 10**21)
+        fd.fill_epochs()
+        boa.env.time_travel(WEEK)
+    return fd
+
+
+@pytest.mark.parametrize("epochs", [1, 5, 20])
+def test_fee_distributor_claim(fee_distributor, accounts, gas, epochs):
+    user = accounts[5]
+    with boa.env.prank(user):
+        if epochs < 20:
+            fee_distributor.claim(user, 20 - epochs)  # leave `epochs` to the measured claim
+        fee_distributor.claim(user, epochs)
+    gas(fee_distributor)
@@ -0,0 +1,116 @@
+"""
+The leveraged-liquidity market: LT.deposit / withdraw / emergency_withdraw and VirtualPool.exchange
+on an empty and on an already open market, and the price paths read on top of it
+(CryptopoolLPOracle.price_w, YBLendingOracle.price_in_usd, YBLendingOracleLL.price_w) both in the
+block of the last update and an hour later, when the EMAs have to move.
+"""
+import boa
+import pytest
+
+
+DEPOSIT = [10**16, 10**18]  # collateral deposited: 0.01 and 1 BTC
+
+
+@pytest.fixture
+def market(cryptopool, yb_lt, collateral_token, stablecoin, accounts, admin, yb_allocated, seed_cryptopool,
+           request):
+    """Deep pool; with "open" someone else already holds a 1 BTC position."""
+    whale = accounts[2]
+    stablecoin._mint_for_testing(whale, 50 * 100_000 * 10**18)
+    collateral_token._mint_for_testing(whale, 50 * 10**18)
+    with boa.env.prank(whale):
+        stablecoin.approve(cryptopool.address, 2**256 - 1)
+        collateral_token.approve(cryptopool.address, 2**256 - 1)
+        cryptopool.add_liquidity([50 * 100_000 * 10**18, 50 * 10**18], 0)
+    if request.param == "open":
+        _deposit(yb_lt, cryptopool, collateral_token, accounts[1], 10**18)
+
+
+def _deposit(yb_lt, cryptopool, collateral_token, user, amount):
+    p = cryptopool.price_oracle()
+    collateral_token._mint_for_testing(user, amount)
+    with boa.env.prank(user):
+        return yb_lt.deposit(amount, p * amount // 10**18, 0)
+
+
+@pytest.fixture
+def position(market, yb_lt, cryptopool, collateral_token, stablecoin, admin):
+    _deposit(yb_lt, cryptopool, collateral_token, admin, 10**18)
+    stablecoin._mint_for_testing(admin, 10**24)  # covers any debt shortfall on withdraw
+    return yb_lt.balanceOf(admin)
+
+
+@pytest.fixture
+def virtual_pool(factory, flash, vpool_interface, stablecoin, collateral_token, admin, accounts):
+    stablecoin._mint_for_testing(flash.address, 10**12 * 10**18)
+    pool = vpool_interface.at(factory.markets(0).virtual_pool)
+    for a in accounts + [admin]:
+        with boa.env.prank(a):
+            stablecoin.approve(pool.address, 2**256 - 1)
+            collateral_token.approve(pool.address, 2**256 - 1)
+    return pool
+
+
+MARKET = pytest.mark.parametrize("market", ["empty", "open"], indirect=True)
+AGE = pytest.mark.parametrize("age", [0, 3600], ids=["same_block", "1h"])
+
+
+@MARKET
+@pytest.mark.parametrize("amount", DEPOSIT, ids=["0.01btc", "1btc"])
+def test_deposit(yb_lt, cryptopool, collateral_token, admin, market, gas, amount):
+    _deposit(yb_lt, cryptopool, collateral_token, admin, amount)
+    gas(yb_lt)
+
+
+@MARKET
+@pytest.mark.parametrize("fraction", [10, 2, 1], ids=["10pct", "half", "all"])
+def test_withdraw(yb_lt, admin, position, gas, fraction):
+    with boa.env.prank(admin):
+        yb_lt.withdraw(position // fraction, 0)
+    gas(yb_lt)
+
+
+@MARKET
+@pytest.mark.parametrize("fraction", [10, 2, 1], ids=["10pct", "half", "all"])
+def test_emergency_withdraw(yb_lt, admin, position, gas, fraction):
+    with boa.env.prank(admin):
+        yb_lt.emergency_withdraw(position // fraction)
+    gas(yb_lt)
+
+
+@MARKET
+@pytest.mark.parametrize("i,amount", [(0, 1000 * 10**18), (1, 10**16)], ids=["stable_in", "collateral_in"])
+def test_virtual_pool_exchange(virtual_pool, stablecoin, collateral_token, accounts, position, gas, i, amount):
+    user = accounts[0]
+    (stablecoin if i == 0 else collateral_token)._mint_for_testing(user, amount)
+    with boa.env.prank(user):
+        virtual_pool.exchange(i, 1 - i, amount, 0)
+    gas(virtual_pool)
+
+
+@MARKET
+@AGE
+def test_cryptopool_oracle_price_w(cryptopool_oracle, position, gas, age):
+    boa.env.time_travel(age)
+    cryptopool_oracle.price_w()
+    gas(cryptopool_oracle)
+
+
+@MARKET
+@AGE
+@pytest.mark.parametrize("use_balances", [False, True], ids=["fresh_lv", "balances"])
+def test_lending_oracle_price_in_usd(lending_oracle, yb_lt, position, gas, age, use_balances):
+    boa.env.time_travel(age)
+    lending_oracle.price_in_usd(yb_lt.address, use_balances)
+    gas(lending_oracle)
+
+
+@MARKET
+@AGE
+def test_lending_oracle_ll_price_w(ll_deployer, yb_lt, admin, position, gas, age):
+    ll = ll_deployer.deploy()
+    ll.initialize(yb_lt.address, False, 866, admin)
+    ll.price_w()
+    boa.env.time_travel(age)
+    ll.price_w()
+    gas(ll)
@@ -0,0 +1,62 @@
+"""
+PID.trigger and MerklPIDDriver.preview_target_apr on the mock-wired controller of the
+net-pressure suite: pressure below / around / far above the sink, stepped a block, an hour and a
+day after the previous step.
+"""
+import boa
+import pytest
+
+
+H = 5 * 10**23  # Σ half_tvl; the sink is at net = 1e24
+NET = [0, 10**24, 6 * 10**24]
+DT = [12, 3600, 86400]
+
+NET_IDS = ["no_pressure", "at_sink", "above_sink"]
+DT_IDS = ["1block", "1h", "1d"]
+
+
+@pytest.fixture(scope="module")
+def wired(token_mock, accounts, np_mock, mr_mock, fd_mock, sink_mock, gauge_mock,
+          factory_mock, agg_mock, splitter_mock, pid_deployer):
+    """PID.vy and MerklPIDDriver wired to the same mocks (as in test_merkl_pid_driver.py)."""
+    admin = accounts[0]
+    crvusd = token_mock.deploy("crvUSD", "crvUSD", 18)
+    np = np_mock.deploy(0, H)
+    mr = mr_mock.deploy(35 * 10**15)
+    fd = fd_mock.deploy()
+    sink = sink_mock.deploy(10**24, 10**18)
+    gauge = gauge_mock.deploy(10**24)
+    factory = factory_mock.deploy(agg_mock.deploy().address)
+    lt = boa.env.generate_address()
+
+    pid = pid_deployer.deploy(crvusd.address, factory.address, np.address, mr.address, fd.address, admin)
+    factory.set_fee_receiver(splitter_mock.deploy(pid.address).address)
+    driver = boa.load("contracts/net_pressure/MerklPIDDriver.vy", crvusd.address, factory.address,
+                      np.address, mr.address, fd.address, admin)
+    with boa.env.prank(admin):
+        pid.set_pressure_lts([lt])
+        pid.set_gauge(gauge.address, sink.address)
+        pid.set_execution_params(3 * 10**18 // 2, 10**12)
+        driver.set_pressure_lts([lt])
+    pid.trigger()  # connect from a clean slate
+    return dict(pid=pid, driver=driver, np=np)
+
+
+@pytest.mark.parametrize("dt", DT, ids=DT_IDS)
+@pytest.mark.parametrize("net", NET, ids=NET_IDS)
+def test_pid_trigger(wired, gas, net, dt):
+    pid = wired["pid"]
+    wired["np"].set(net, H)
+    boa.env.time_travel(dt)
+    pid.trigger()
+    gas(pid)
+
+
+@pytest.mark.parametrize("dt", DT, ids=DT_IDS)
+@pytest.mark.parametrize("net", NET, ids=NET_IDS)
+def test_preview_target_apr(wired, gas, net, dt):
+    driver = wired["driver"]
+    wired["np"].set(net, H)
+    pressure = net * 10**18 // H
+    driver.preview_target_apr(10**24, 10**16, pressure // 2, 10**17, dt)
+    gas(driver)
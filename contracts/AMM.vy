@@ -246,6 +246,23 @@ def get_state() -> AMMState:
     return state
 
 
+@internal
+@view
+def _get_dy(i: uint256, in_amount: uint256, p_o: uint256, collateral: uint256, debt: uint256) -> uint256:
+    x_initial: uint256 = self.get_x0(p_o, collateral, debt, False) - debt
+
+    if i == 0:  # Buy collateral
+        assert in_amount <= debt, "Amount too large"
+        x: uint256 = x_initial + in_amount
+        y: uint256 = math._ceil_div(x_initial * collateral, x)
+        return (collateral - y) * (10**18 - self.fee) // 10**18
+
+    else:  # Sell collateral
+        y: uint256 = collateral + in_amount
+        x: uint256 = math._ceil_div(x_initial * collateral, y)
+        return (x_initial - x) * (10**18 - self.fee) // 10**18
+
+
 @external
 @view
 def get_dy(i: uint256, j: uint256, in_amount: uint256) -> uint256:
@@ -259,20 +276,44 @@ def get_dy(i: uint256, j: uint256, in_amount: uint256) -> uint256:
     assert (i == 0 and j == 1) or (i == 1 and j == 0)
 
     p_o: uint256 = staticcall PRICE_ORACLE_CONTRACT.price()
-    collateral: uint256 = self.collateral_amount  # == y_initial
-    debt: uint256 = self._debt()
-    x_initial: uint256 = self.get_x0(p_o, collateral, debt, False) - debt
+    return self._get_dy(i, in_amount, p_o, self.collateral_amount, self._debt())
+
+
+@internal
+@view
+def _get_dx(i: uint256, out_amount: uint256, x_initial: uint256, collateral: uint256, debt: uint256) -> uint256:
+    # Smallest in_amount for which the exchange math gives at least out_amount:
+    # the pre-fee amount is rounded up, and so is the input which frees it
+    gross: uint256 = math._ceil_div(out_amount * 10**18, 10**18 - self.fee)
 
     if i == 0:  # Buy collateral
+        assert gross < collateral, "Amount too large"
+        in_amount: uint256 = math._ceil_div(x_initial * collateral, collateral - gross) - x_initial
         assert in_amount <= debt, "Amount too large"
-        x: uint256 = x_initial + in_amount
-        y: uint256 = math._ceil_div(x_initial * collateral, x)
-        return (collateral - y) * (10**18 - self.fee) // 10**18
+        return in_amount
 
     else:  # Sell collateral
-        y: uint256 = collateral + in_amount
-        x: uint256 = math._ceil_div(x_initial * collateral, y)
-        return (x_initial - x) * (10**18 - self.fee) // 10**18
+        assert gross < x_initial, "Amount too large"
+        return math._ceil_div(x_initial * collateral, x_initial - gross) - collateral
+
+
+@external
+@view
+def get_dx(i: uint256, j: uint256, out_amount: uint256) -> uint256:
+    """
+    @notice Function to preview the input exchange_dy needs for the exact output
+    @param i Index of input coin (0 = stablecoin, 1 = LP token collateral)
+    @param j Index of output coin
+    @param out_amount Amount of coin j to receive
+    @return Amount of coin i to be spent
+    """
+    assert (i == 0 and j == 1) or (i == 1 and j == 0)
+
+    p_o: uint256 = staticcall PRICE_ORACLE_CONTRACT.price()
+    collateral: uint256 = self.collateral_amount
+    debt: uint256 = self._debt()
+    x_initial: uint256 = self.get_x0(p_o, collateral, debt, False) - debt
+    return self._get_dx(i, out_amount, x_initial, collateral, debt)
 
 
 @external
@@ -287,40 +328,141 @@ def get_p() -> uint256:
     return (self.get_x0(p_o, collateral, debt, False) - debt) * (10**18 // COLLATERAL_PRECISION) // collateral
 
 
+@internal
+@view
+def _trade_ok(i: uint256, in_amount: uint256, p_o: uint256, collateral: uint256, debt: uint256) -> bool:
+    # The checks of exchange(), without reverting
+    x0: uint256 = self.get_x0(p_o, collateral, debt, False)
+    x_initial: uint256 = x0 - debt
+    fee: uint256 = self.fee
+    new_collateral: uint256 = 0
+    new_debt: uint256 = 0
+
+    if i == 0:
+        if in_amount > debt:
+            return False
+        y: uint256 = math._ceil_div(x_initial * collateral, x_initial + in_amount)
+        new_collateral = collateral - (collateral - y) * (10**18 - fee) // 10**18
+        new_debt = debt - in_amount
+    else:
+        x: uint256 = math._ceil_div(x_initial * collateral, collateral + in_amount)
+        new_collateral = collateral + in_amount
+        new_debt = debt + (x_initial - x) * (10**18 - fee) // 10**18
+
+    coll_vs_debt_before: uint256 = max_value(uint256)
+    if debt > 0:
+        coll_vs_debt_before = p_o * collateral * COLLATERAL_PRECISION // debt
+    coll_vs_debt_after: uint256 = max_value(uint256)
+    if new_debt > 0:
+        coll_vs_debt_after = p_o * new_collateral * COLLATERAL_PRECISION // new_debt
+
+    improved: bool = coll_vs_debt_before > coll_vs_debt_after
+    if coll_vs_debt_after <= 2 * 10**18:
+        improved = coll_vs_debt_before < coll_vs_debt_after
+    if not improved:
+        coll_value: uint256 = p_o * new_collateral * COLLATERAL_PRECISION // 10**18
+        if new_debt < coll_value * MIN_SAFE_DEBT // 10**18 or new_debt > coll_value * MAX_SAFE_DEBT // 10**18:
+            return False
+
+    return self.get_x0(p_o, new_collateral, new_debt, False) >= x0
+
+
+@internal
+@view
+def _max_in(i: uint256, p_o: uint256, collateral: uint256, debt: uint256) -> uint256:
+    if self.is_killed or collateral == 0:
+        return 0
+
+    x_initial: uint256 = self.get_x0(p_o, collateral, debt, False) - debt
+    coll_value: uint256 = p_o * collateral * COLLATERAL_PRECISION // 10**18
+    fee: uint256 = self.fee
+    amount: uint256 = 0
+
+    if i == 0:
+        # Buying collateral lowers debt / coll_value until it hits MIN_SAFE_DEBT:
+        # (debt - a) * (x_initial + a) = min_debt * (x_initial + fee * a), i.e.
+        # a**2 - (debt - x_initial - min_debt * fee) * a - x_initial * (debt - min_debt) = 0
+        min_debt: uint256 = coll_value * MIN_SAFE_DEBT // 10**18
+        if debt <= min_debt:
+            return 0
+        c: uint256 = 4 * x_initial * (debt - min_debt)
+        b_neg: uint256 = x_initial + min_debt * fee // 10**18
+        if debt >= b_neg:
+            amount = (self.sqrt((debt - b_neg)**2 + c) + debt - b_neg) // 2
+        else:
+            amount = (self.sqrt((b_neg - debt)**2 + c) - (b_neg - debt)) // 2
+        amount = min(amount, debt)
+
+    else:
+        # Selling collateral raises debt / coll_value up to a peak, after which it falls again.
+        # MAX_SAFE_DEBT is hit at the smaller root u = collateral + a of
+        # max_debt / collateral * u**2 - (debt + k) * u + k * collateral = 0, k = x_initial * (1 - fee)
+        max_debt: uint256 = coll_value * MAX_SAFE_DEBT // 10**18
+        if debt >= max_debt:
+            return 0
+        k: uint256 = x_initial * (10**18 - fee) // 10**18
+        if (debt + k)**2 <= 4 * k * max_debt or debt + k <= 2 * max_debt:
+            # The peak stays below MAX_SAFE_DEBT, or is already behind us
+            return max_value(uint256)
+        u: uint256 = collateral * (debt + k - self.sqrt((debt + k)**2 - 4 * k * max_debt)) // (2 * max_debt)
+        amount = u - min(u, collateral)
+
+    # The root is exact up to rounding: step back until exchange() itself would go through
+    step: uint256 = amount // 10**12 + 1
+    for _: uint256 in range(16):
+        if amount == 0 or self._trade_ok(i, amount, p_o, collateral, debt):
+            return amount
+        amount -= min(step, amount)
+        step *= 4
+    return 0
+
+
 @external
-@nonreentrant
-def exchange(i: uint256, j: uint256, in_amount: uint256, min_out: uint256, _for: address = msg.sender) -> uint256:
+@view
+def max_in(i: uint256, j: uint256) -> uint256:
     """
-    @notice Exchanges two coins, callable by anyone
+    @notice Largest in_amount exchange(i, j, in_amount, ...) accepts now: beyond it the trade
+            would push debt out of the safe range (MIN_SAFE_DEBT .. MAX_SAFE_DEBT of the
+            collateral value) away from equilibrium and revert with "Bad final state"
     @param i Index of input coin (0 = stablecoin, 1 = LP token collateral)
-    @param j Output coin index
-    @param in_amount Amount of input coin to swap
-    @param min_out Minimal amount to get as output
-    @param _for Address to send coins to
-    @return Amount of coins given in/out
+    @param j Index of output coin
+    @return Largest input amount, max_value(uint256) if the direction is not limited
     """
     assert (i == 0 and j == 1) or (i == 1 and j == 0)
-    assert not self.is_killed
+    p_o: uint256 = staticcall PRICE_ORACLE_CONTRACT.price()
+    return self._max_in(i, p_o, self.collateral_amount, self._debt())
 
-    collateral: uint256 = self.collateral_amount  # == y_initial
-    assert collateral > 0, "Empty AMM"
-    debt: uint256 = self._debt_w()
-    p_o: uint256 = extcall PRICE_ORACLE_CONTRACT.price_w()
-    x0: uint256 = self.get_x0(p_o, collateral, debt, False)
-    x_initial: uint256 = x0 - debt
 
-    out_amount: uint256 = 0
-    fee: uint256 = self.fee
+@external
+@view
+def max_out(i: uint256, j: uint256) -> uint256:
+    """
+    @notice Largest amount of coin j exchange(i, j, ...) can give out now (get_dy at max_in)
+    @param i Index of input coin (0 = stablecoin, 1 = LP token collateral)
+    @param j Index of output coin
+    @return Largest output amount
+    """
+    assert (i == 0 and j == 1) or (i == 1 and j == 0)
+    p_o: uint256 = staticcall PRICE_ORACLE_CONTRACT.price()
+    collateral: uint256 = self.collateral_amount
+    debt: uint256 = self._debt()
+    amount: uint256 = self._max_in(i, p_o, collateral, debt)
+    if amount == max_value(uint256):
+        # Unlimited: the output tends to x_initial * (1 - fee)
+        return (self.get_x0(p_o, collateral, debt, False) - debt) * (10**18 - self.fee) // 10**18
+    return self._get_dy(i, amount, p_o, collateral, debt)
 
+
+@internal
+def _settle_exchange(i: uint256, j: uint256, in_amount: uint256, out_amount: uint256, _for: address,
+                     p_o: uint256, x0: uint256, collateral: uint256, debt: uint256, fee: uint256):
+    # Shared by exchange() and exchange_dy() once the amounts are priced: moves the coins, checks
+    # the final state against the initial collateral, debt and x0, then commits and collects fees
     coll_vs_debt_before: uint256 = unsafe_div(p_o * collateral * COLLATERAL_PRECISION, debt)
     if debt == 0:
         coll_vs_debt_before = max_value(uint256)
 
     if i == 0:  # Trader buys collateral from us
-        x: uint256 = x_initial + in_amount
-        y: uint256 = math._ceil_div(x_initial * collateral, x)
-        out_amount = (collateral - y) * (10**18 - fee) // 10**18
-        assert out_amount >= min_out, "Slippage"
         debt -= in_amount
         collateral -= out_amount
         self.redeemed += in_amount
@@ -328,13 +470,9 @@ def exchange(i: uint256, j: uint256, in_amount: uint256, min_out: uint256, _for:
         assert extcall COLLATERAL.transfer(_for, out_amount, default_return_value=True)
 
     else:  # Trader sells collateral to us
-        y: uint256 = collateral + in_amount
-        x: uint256 = math._ceil_div(x_initial * collateral, y)
-        out_amount = (x_initial - x) * (10**18 - fee) // 10**18
-        assert out_amount >= min_out, "Slippage"
         debt += out_amount
         self.minted += out_amount
-        collateral = y
+        collateral += in_amount
         assert extcall COLLATERAL.transferFrom(msg.sender, self, in_amount, default_return_value=True)
         assert extcall STABLECOIN.transfer(_for, out_amount, default_return_value=True)
 
@@ -370,9 +508,77 @@ def exchange(i: uint256, j: uint256, in_amount: uint256, min_out: uint256, _for:
         self._collect_fees()
         extcall LT(LT_CONTRACT).distribute_borrower_fees()
 
+
+@external
+@nonreentrant
+def exchange(i: uint256, j: uint256, in_amount: uint256, min_out: uint256, _for: address = msg.sender) -> uint256:
+    """
+    @notice Exchanges two coins, callable by anyone
+    @param i Index of input coin (0 = stablecoin, 1 = LP token collateral)
+    @param j Output coin index
+    @param in_amount Amount of input coin to swap
+    @param min_out Minimal amount to get as output
+    @param _for Address to send coins to
+    @return Amount of coins given in/out
+    """
+    assert (i == 0 and j == 1) or (i == 1 and j == 0)
+    assert not self.is_killed
+
+    collateral: uint256 = self.collateral_amount  # == y_initial
+    assert collateral > 0, "Empty AMM"
+    debt: uint256 = self._debt_w()
+    p_o: uint256 = extcall PRICE_ORACLE_CONTRACT.price_w()
+    x0: uint256 = self.get_x0(p_o, collateral, debt, False)
+    x_initial: uint256 = x0 - debt
+
+    out_amount: uint256 = 0
+    fee: uint256 = self.fee
+
+    if i == 0:  # Trader buys collateral from us
+        x: uint256 = x_initial + in_amount
+        y: uint256 = math._ceil_div(x_initial * collateral, x)
+        out_amount = (collateral - y) * (10**18 - fee) // 10**18
+
+    else:  # Trader sells collateral to us
+        y: uint256 = collateral + in_amount
+        x: uint256 = math._ceil_div(x_initial * collateral, y)
+        out_amount = (x_initial - x) * (10**18 - fee) // 10**18
+
+    assert out_amount >= min_out, "Slippage"
+    self._settle_exchange(i, j, in_amount, out_amount, _for, p_o, x0, collateral, debt, fee)
+
     return out_amount
 
 
+@external
+@nonreentrant
+def exchange_dy(i: uint256, j: uint256, out_amount: uint256, max_in: uint256, _for: address = msg.sender) -> uint256:
+    """
+    @notice Exchanges two coins for an exact output, callable by anyone. Same as exchange() with
+            the input from get_dx(); the rounding excess stays in the AMM
+    @param i Index of input coin (0 = stablecoin, 1 = LP token collateral)
+    @param j Output coin index
+    @param out_amount Amount of output coin to receive
+    @param max_in Maximal amount of input coin to spend
+    @param _for Address to send coins to
+    @return Amount of input coin spent (get_dx)
+    """
+    assert (i == 0 and j == 1) or (i == 1 and j == 0)
+    assert not self.is_killed
+
+    collateral: uint256 = self.collateral_amount  # == y_initial
+    assert collateral > 0, "Empty AMM"
+    debt: uint256 = self._debt_w()
+    p_o: uint256 = extcall PRICE_ORACLE_CONTRACT.price_w()
+    x0: uint256 = self.get_x0(p_o, collateral, debt, False)
+
+    in_amount: uint256 = self._get_dx(i, out_amount, x0 - debt, collateral, debt)
+    assert in_amount <= max_in, "Slippage"
+    self._settle_exchange(i, j, in_amount, out_amount, _for, p_o, x0, collateral, debt, self.fee)
+
+    return in_amount
+
+
 @external
 def _deposit(d_collateral: uint256, d_debt: uint256) -> OraclizedValue:
     assert msg.sender == LT_CONTRACT, "Access violation"
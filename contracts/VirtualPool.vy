@@ -7,6 +7,7 @@
 """
 
 from ethereum.ercs import IERC20 as ERC20
+from snekmate.utils import math
 
 interface Flash:
     def flashLoan(receiver: address, token: address, amount: uint256, data: Bytes[10**5]) -> bool: nonpayable
@@ -32,6 +33,7 @@ interface YbAMM:
     def get_state() -> AMMState: view
     def fee() -> uint256: view
     def exchange(i: uint256, j: uint256, in_amount: uint256, min_out: uint256) -> uint256: nonpayable
+    def max_in(i: uint256, j: uint256) -> uint256: view
     def STABLECOIN() -> ERC20: view
     def COLLATERAL() -> Pool: view
 
@@ -55,6 +57,7 @@ POOL: public(immutable(Pool))
 ASSET_TOKEN: public(immutable(ERC20))
 STABLECOIN: public(immutable(ERC20))
 ROUNDING_DISCOUNT: public(constant(uint256)) = 10**18 // 10**8
+MAX_QUOTES: public(constant(uint256)) = 64
 IMPL: public(immutable(address))
 
 
@@ -132,6 +135,48 @@ def get_dy(i: uint256, j: uint256, in_amount: uint256) -> uint256:
     return self._calculate(i, _in_amount, False)[0]
 
 
+@external
+@view
+def get_dy_many(i: uint256, j: uint256, in_amounts: DynArray[uint256, MAX_QUOTES]) -> DynArray[uint256, MAX_QUOTES]:
+    """
+    @notice get_dy for many input amounts at once (e.g. to build a quote curve), reading the AMM
+            and pool state only once
+    @param i Index of input coin (0 = stablecoin, 1 = crypto)
+    @param j Index of output coin
+    @param in_amounts Amounts of coin i
+    @return Amounts of coin j to be received, same as get_dy(i, j, in_amount) for each
+    """
+    assert (i == 0 and j == 1) or (i == 1 and j == 0)
+    out: DynArray[uint256, MAX_QUOTES] = []
+    if len(in_amounts) == 0:
+        return out
+
+    state: AMMState = staticcall AMM.get_state()
+    fee: uint256 = staticcall AMM.fee()
+    stables_in_pool: uint256 = staticcall POOL.balances(0)
+    crypto_in_pool: uint256 = staticcall POOL.balances(1)
+    pool_supply: uint256 = staticcall POOL.totalSupply()
+    x_initial: uint256 = state.x0 - state.debt
+    r0fee: uint256 = stables_in_pool * (10**18 - fee) // pool_supply
+
+    for in_amount: uint256 in in_amounts:
+        if i == 0:
+            # Same as _calculate(0, ...)
+            _in_amount: uint256 = in_amount * (10**18 - ROUNDING_DISCOUNT) // 10**18
+            b: uint256 = x_initial + _in_amount - r0fee * state.collateral // 10**18
+            D: uint256 = b**2 + 4 * state.collateral * r0fee // 10**18 * _in_amount
+            flash_amount: uint256 = (isqrt(D) - b) // 2
+            out.append(flash_amount * crypto_in_pool // stables_in_pool)
+        else:
+            # Same as _calculate(1, ...), with AMM.get_dy(1, 0, lp_amount) done on the state read above
+            flash_amount: uint256 = in_amount * stables_in_pool // crypto_in_pool
+            lp_amount: uint256 = pool_supply * in_amount // crypto_in_pool
+            x: uint256 = math._ceil_div(x_initial * state.collateral, state.collateral + lp_amount)
+            out.append((x_initial - x) * (10**18 - fee) // 10**18 - flash_amount)
+
+    return out
+
+
 @external
 def onFlashLoan(initiator: address, token: address, total_flash_amount: uint256, fee: uint256, data: Bytes[10**5]):
     """
@@ -210,4 +255,81 @@ def exchange(i: uint256, j: uint256, in_amount: uint256, min_out: uint256, _for:
     return out_amount
 
 
-# XXX include methods to determine max_in / max_out
+
+@internal
+@view
+def _max_in(i: uint256) -> uint256:
+    flash_limit: uint256 = staticcall (staticcall FACTORY.flash()).maxFlashLoan(STABLECOIN.address)
+    stables_in_pool: uint256 = staticcall POOL.balances(0)
+    crypto_in_pool: uint256 = staticcall POOL.balances(1)
+    pool_supply: uint256 = staticcall POOL.totalSupply()
+    amm_max_in: uint256 = staticcall AMM.max_in(i, 1 - i)
+
+    if i == 0:
+        # The AMM gets s = in_amount + flash_amount stablecoins, where (see _calculate)
+        # flash_amount = r0fee * collateral * s / (x_initial + s), which is at most flash_limit
+        state: AMMState = staticcall AMM.get_state()
+        r0fee_coll: uint256 = stables_in_pool * (10**18 - staticcall AMM.fee()) // pool_supply * state.collateral // 10**18
+        x_initial: uint256 = state.x0 - state.debt
+        s: uint256 = amm_max_in
+        if r0fee_coll > flash_limit:
+            s = min(s, flash_limit * x_initial // (r0fee_coll - flash_limit))
+        in_amount: uint256 = (s - r0fee_coll * s // (x_initial + s)) * 10**18 // (10**18 - ROUNDING_DISCOUNT)
+        # Margin for the rounding of the flash loan quadratic
+        return in_amount - min(in_amount // 10**12 + 1, in_amount)
+
+    else:
+        # LP to sell is lp = pool_supply * in_amount / crypto_in_pool, the flash loan to repay r0 * lp
+        # (r0 = stables / supply) out of what the AMM pays, k * lp / (collateral + lp) with
+        # k = x_initial * (1 - fee): it is covered up to lp = k / r0 - collateral
+        state: AMMState = staticcall AMM.get_state()
+        k: uint256 = (state.x0 - state.debt) * (10**18 - staticcall AMM.fee()) // 10**18
+        lp: uint256 = k * pool_supply // stables_in_pool
+        lp -= min(lp, state.collateral)
+        # Margin for the rounding of the pool deposit and of the AMM
+        lp -= min(lp // 10**6 + 1, lp)
+        lp = min(lp, amm_max_in)
+        return min(lp * crypto_in_pool // pool_supply, flash_limit * crypto_in_pool // stables_in_pool)
+
+
+@external
+@view
+def max_in(i: uint256, j: uint256) -> uint256:
+    """
+    @notice Largest input exchange(i, j, ...) can take now: bounded by what the AMM itself accepts
+            (AMM.max_in), by the flash loan available and, for crypto in, by what the AMM pays
+            still covering the flash loan to repay
+    @param i Index of input coin (0 = stablecoin, 1 = crypto)
+    @param j Index of output coin
+    @return Largest amount of coin i
+    """
+    assert (i == 0 and j == 1) or (i == 1 and j == 0)
+    return self._max_in(i)
+
+
+@external
+@view
+def max_out(i: uint256, j: uint256) -> uint256:
+    """
+    @notice Largest output exchange(i, j, ...) can give now. For stablecoin in it is
+            get_dy(0, 1, max_in(0, 1)), for crypto in the output peaks before max_in(1, 0):
+            get_dy at the peak if it comes first
+    @param i Index of input coin (0 = stablecoin, 1 = crypto)
+    @param j Index of output coin
+    @return Largest amount of coin j
+    """
+    assert (i == 0 and j == 1) or (i == 1 and j == 0)
+    in_amount: uint256 = self._max_in(i)
+    if i == 0:
+        in_amount = in_amount * (10**18 - ROUNDING_DISCOUNT) // 10**18
+    else:
+        # Past lp = sqrt(k * collateral / r0) - collateral (see _max_in) the flash loan to repay
+        # grows faster than what the AMM pays out
+        state: AMMState = staticcall AMM.get_state()
+        stables_in_pool: uint256 = staticcall POOL.balances(0)
+        pool_supply: uint256 = staticcall POOL.totalSupply()
+        k: uint256 = (state.x0 - state.debt) * (10**18 - staticcall AMM.fee()) // 10**18
+        lp: uint256 = isqrt(k * state.collateral // stables_in_pool * pool_supply)
+        lp -= min(lp, state.collateral)
+        in_amount = min(in_amount, lp * staticcall POOL.balances(1) // pool_supply)
+    return self._calculate(i, in_amount, False)[0]
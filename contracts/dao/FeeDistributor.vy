@@ -48,6 +48,7 @@ event Kill:
 WEEK: constant(uint256) = 7 * 86400
 OVER_WEEKS: public(constant(uint256)) = 4
 MAX_TOKENS: public(constant(uint256)) = 100
+MAX_CLAIMS: public(constant(uint256)) = 100
 INITIAL_EPOCH: public(immutable(uint256))
 VE: public(immutable(VotingEscrow))
 VESTING_ESCROWS: public(immutable(DynArray[VestingEscrow, 5]))
@@ -60,7 +61,11 @@ initial_set_for_epoch: public(HashMap[uint256, uint256])  # epoch_time -> token_
 max_set_for_epoch: public(HashMap[uint256, uint256])
 balances_for_epoch: public(HashMap[uint256, HashMap[IERC20, uint256]])
 token_balances: public(HashMap[IERC20, uint256])
-claimed_epoch_for: public(HashMap[address, HashMap[IERC20, uint256]])
+# Tokens of the token sets first .. last without repeats: what an epoch with
+# initial_set_for_epoch == first and max_set_for_epoch == last distributes
+set_union: public(HashMap[uint256, HashMap[uint256, DynArray[IERC20, MAX_TOKENS * 4]]])
+union_mark: transient(HashMap[IERC20, uint256])
+total_votes_cache: transient(HashMap[uint256, uint256])  # epoch_time -> VE.getPastTotalSupply
 
 user_claim_id: public(uint256)
 user_claimed_tokens: public(HashMap[address, HashMap[uint256, HashMap[IERC20, uint256]]])
@@ -82,6 +87,29 @@ def __init__(token_set: DynArray[IERC20, MAX_TOKENS], ve: VotingEscrow,
     ownable._transfer_ownership(owner)
 
 
+@internal
+def _index_set_union(first: uint256, last: uint256):
+    if len(self.set_union[first][last]) > 0:
+        return  # Already indexed (an empty union is rebuilt, which is free)
+    mark: uint256 = first << 128 | last  # unique per (first, last), so no cleanup between calls
+    ts_id: uint256 = first
+    for j: uint256 in range(50):
+        for token: IERC20 in self.token_sets[ts_id]:
+            if self.union_mark[token] != mark:
+                self.union_mark[token] = mark
+                assert len(self.set_union[first][last]) < MAX_TOKENS * 4, "Too many tokens"
+                self.set_union[first][last].append(token)
+        ts_id += 1
+        if ts_id > last:
+            break
+
+
+@internal
+@view
+def _epoch_tokens(epoch: uint256) -> DynArray[IERC20, MAX_TOKENS * 4]:
+    return self.set_union[self.initial_set_for_epoch[epoch]][self.max_set_for_epoch[epoch]]
+
+
 @internal
 def _fill_epochs():
     assert not self.is_killed, "Ded"
@@ -92,9 +120,13 @@ def _fill_epochs():
     epochs: uint256[4] = [cursor, cursor + WEEK, cursor + 2*WEEK, cursor + 3*WEEK]
 
     for epoch: uint256 in epochs:
-        if self.initial_set_for_epoch[epoch] == 0:
+        first: uint256 = self.initial_set_for_epoch[epoch]
+        if first == 0:
+            first = set_id
             self.initial_set_for_epoch[epoch] = set_id
-        self.max_set_for_epoch[epoch] = set_id
+        if self.max_set_for_epoch[epoch] != set_id:  # Range of sets changed: index its tokens
+            self.max_set_for_epoch[epoch] = set_id
+            self._index_set_union(first, set_id)
 
     for token: IERC20 in token_set:
         balance: uint256 = staticcall token.balanceOf(self)
@@ -124,24 +156,59 @@ def preview_distribution(week_shift: int256 = 0) -> (DynArray[IERC20, MAX_TOKENS
     @return [tokens], [amounts]
     """
     epoch: uint256 = convert(convert(block.timestamp // WEEK, int256) + week_shift, uint256) * WEEK
-    out_tokens: DynArray[IERC20, MAX_TOKENS * 4] = empty(DynArray[IERC20, MAX_TOKENS * 4])
+    out_tokens: DynArray[IERC20, MAX_TOKENS * 4] = self._epoch_tokens(epoch)
     out_amounts: DynArray[uint256, MAX_TOKENS * 4] = empty(DynArray[uint256, MAX_TOKENS * 4])
 
-    ts_id: uint256 = self.initial_set_for_epoch[epoch]
-    if ts_id > 0:
-        max_ts_id: uint256 = self.max_set_for_epoch[epoch]
-        for j: uint256 in range(50):
-            for token: IERC20 in self.token_sets[ts_id]:
-                if token not in out_tokens:  # <- not a scalable check, quadratic on tokens in epoch
-                    out_tokens.append(token)
-                    out_amounts.append(self.balances_for_epoch[epoch][token])
-            ts_id += 1
-            if ts_id > max_ts_id:
-                break
+    for token: IERC20 in out_tokens:
+        out_amounts.append(self.balances_for_epoch[epoch][token])
 
     return out_tokens, out_amounts
 
 
+@external
+@view
+def epoch_tokens(epoch: uint256) -> DynArray[IERC20, MAX_TOKENS * 4]:
+    """
+    @notice Tokens distributed in an epoch, each once
+    @param epoch Epoch start time (multiple of a week)
+    """
+    return self._epoch_tokens(epoch)
+
+
+@external
+@view
+def claimed_epoch_for(user: address, token: IERC20) -> uint256:
+    """
+    @notice Last epoch claimed by a user in which a token was distributed
+    @param user User address
+    @param token Token address
+    @return Epoch start time, or 0 if the user never claimed it
+    """
+    epoch: uint256 = self.last_claimed_for[user]
+    if epoch < INITIAL_EPOCH:
+        return 0
+    first: uint256 = max_value(uint256)  # range of sets scanned last
+    last: uint256 = 0
+    found: bool = False
+    for i: uint256 in range((epoch - INITIAL_EPOCH) // WEEK + 1, bound=10**4):
+        f: uint256 = self.initial_set_for_epoch[epoch]
+        l: uint256 = self.max_set_for_epoch[epoch]
+        # Consecutive epochs mostly distribute the same range of sets: scan each range once,
+        # reading the tokens by index as _claim does
+        if f != first or l != last:
+            first = f
+            last = l
+            found = False
+            for k: uint256 in range(len(self.set_union[f][l]), bound=MAX_TOKENS * 4):
+                if self.set_union[f][l][k] == token:
+                    found = True
+                    break
+        if found:
+            return epoch
+        epoch -= WEEK
+    return 0
+
+
 @external
 def add_token_set(token_set: DynArray[IERC20, MAX_TOKENS]):
     """
@@ -154,14 +221,29 @@ def add_token_set(token_set: DynArray[IERC20, MAX_TOKENS]):
     current_set_id += 1
     self.current_token_set = current_set_id
     self.token_sets[current_set_id] = token_set
+    # Upcoming epochs distribute tokens of sets from initial_set_for_epoch of the next one
+    # up to this one: make sure that fits, rather than fail every later fill and claim
+    self._index_set_union(self.initial_set_for_epoch[(block.timestamp + WEEK) // WEEK * WEEK], current_set_id)
     log AddTokenSet(token_set_id=current_set_id, token_set=token_set)
 
 
 @internal
-def _claim(user: address, epoch_count: uint256, _for: address) -> (DynArray[IERC20, MAX_TOKENS * 4], DynArray[uint256, MAX_TOKENS * 4]):
+def _total_votes(epoch: uint256) -> uint256:
+    # Past total supply does not change: read it once per epoch for all users claiming in the tx
+    total_votes: uint256 = self.total_votes_cache[epoch]
+    if total_votes == 0:
+        total_votes = staticcall VE.getPastTotalSupply(epoch)
+        if epoch < block.timestamp:
+            self.total_votes_cache[epoch] = total_votes
+    return total_votes
+
+
+@internal
+def _claim(user: address, epoch_count: uint256, _for: address, checkpoint: bool) -> (DynArray[IERC20, MAX_TOKENS * 4], DynArray[uint256, MAX_TOKENS * 4]):
     assert epoch_count > 0
-    self._fill_epochs()
-    extcall VE.checkpoint()
+    if checkpoint:
+        self._fill_epochs()
+        extcall VE.checkpoint()
 
     epoch: uint256 = self.last_claimed_for[user]
     if epoch == 0:
@@ -183,23 +265,20 @@ def _claim(user: address, epoch_count: uint256, _for: address) -> (DynArray[IERC
         else:
             save_epoch = epoch
             votes: uint256 = staticcall VE.getPastVotes(user, epoch)
-            total_votes: uint256 = staticcall VE.getPastTotalSupply(epoch)
-
-            ts_id: uint256 = self.initial_set_for_epoch[epoch]
-            max_ts_id: uint256 = self.max_set_for_epoch[epoch]
-            for j: uint256 in range(50):
-                for token: IERC20 in self.token_sets[ts_id]:
-                    if self.claimed_epoch_for[user][token] < epoch:
-                        amount: uint256 = self.balances_for_epoch[epoch][token] * votes // total_votes
-                        if amount > 0:
-                            old_amount: uint256 = self.user_claimed_tokens[user][user_claim_id][token]
-                            if old_amount == 0:
-                                tokens_to_claim.append(token)
-                            self.user_claimed_tokens[user][user_claim_id][token] = old_amount + amount
-                        self.claimed_epoch_for[user][token] = epoch
-                ts_id += 1
-                if ts_id > max_ts_id:
-                    break
+            total_votes: uint256 = self._total_votes(epoch)
+
+            # Each token once per epoch: epochs before last_claimed_for are never visited again.
+            # Read from storage one by one rather than copying the whole list to memory
+            first: uint256 = self.initial_set_for_epoch[epoch]
+            last: uint256 = self.max_set_for_epoch[epoch]
+            for k: uint256 in range(len(self.set_union[first][last]), bound=MAX_TOKENS * 4):
+                token: IERC20 = self.set_union[first][last][k]
+                amount: uint256 = self.balances_for_epoch[epoch][token] * votes // total_votes
+                if amount > 0:
+                    old_amount: uint256 = self.user_claimed_tokens[user][user_claim_id][token]
+                    if old_amount == 0:
+                        tokens_to_claim.append(token)
+                    self.user_claimed_tokens[user][user_claim_id][token] = old_amount + amount
 
         epoch += WEEK
 
@@ -234,7 +313,7 @@ def _similar_to_cliff_escrow(vest: address) -> bool:
 
 
 @internal
-def _execute_claim(receiver: address, epoch_count: uint256, use_vest: bool) -> (DynArray[IERC20, MAX_TOKENS * 4], DynArray[uint256, MAX_TOKENS * 4]):
+def _execute_claim(receiver: address, epoch_count: uint256, use_vest: bool, checkpoint: bool = True) -> (DynArray[IERC20, MAX_TOKENS * 4], DynArray[uint256, MAX_TOKENS * 4]):
     owner: address = receiver
     cliff: address = empty(address)
     if use_vest:
@@ -250,7 +329,7 @@ def _execute_claim(receiver: address, epoch_count: uint256, use_vest: bool) -> (
             # If it is msg.sender who runs the claim - it's not a cliff
             # but otherwise we need to check that it's not a smart contract who claims
             assert not self._similar_to_cliff_escrow(receiver), "Might be a vest"
-    return self._claim(owner, epoch_count, receiver)
+    return self._claim(owner, epoch_count, receiver, checkpoint)
 
 
 @external
@@ -277,6 +356,21 @@ def claim(receiver: address = msg.sender, epoch_count: uint256 = 50, use_vest: b
     self._execute_claim(receiver, epoch_count, use_vest)
 
 
+@external
+def claim_many(receivers: DynArray[address, MAX_CLAIMS], epoch_count: uint256 = 50, use_vest: bool = False):
+    """
+    @notice Claim for several users at once, same as claim() for each of them in turn
+    @dev Epochs are filled and VE checkpointed once for the whole batch
+    @param receivers Users who will be receiving the claims
+    @param epoch_count Number of epochs to claim for each user
+    @param use_vest Claim for users in one of the vests
+    """
+    self._fill_epochs()
+    extcall VE.checkpoint()
+    for receiver: address in receivers:
+        self._execute_claim(receiver, epoch_count, use_vest, False)
+
+
 @external
 def recover_token(token: IERC20, receiver: address):
     """
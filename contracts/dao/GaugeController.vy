@@ -149,7 +149,44 @@ def _get_weight(gauge: address) -> Point:
 
 
 @internal
-def _checkpoint_gauge(gauge: address) -> Point:
+def _catch_up_weight(gauge: address, max_weeks: uint256) -> uint256:
+    """
+    @notice Advance the stored weight of a stale gauge by up to max_weeks week boundaries
+    @dev Does the same steps as _get_weight and stores where it got to, so the next
+         _get_weight resumes from there with an identical result. Stops before
+         block.timestamp: time_weight stays in the past, and the emissions part of
+         _checkpoint_gauge still sees the time since the last checkpoint. A week boundary
+         at block.timestamp itself is thus left to the next checkpoint
+    @return Timestamp the weight is now stored at, or the current week once caught up
+    """
+    t: uint256 = self.time_weight[gauge]
+    assert t > 0, "Gauge not alive"
+    current_week: uint256 = block.timestamp // WEEK * WEEK
+    pt: Point = self.point_weight[gauge]
+    caught_up: bool = False
+
+    for i: uint256 in range(500):
+        t_next: uint256 = (t + WEEK) // WEEK * WEEK
+        if t_next >= block.timestamp:
+            caught_up = True
+            break
+        if i >= max_weeks:
+            break
+        pt.bias -= min(pt.slope * (t_next - t), pt.bias)
+        t = t_next
+        pt.slope -= min(self.changes_weight[gauge][t], pt.slope)
+        if pt.bias == 0:
+            pt.slope = 0
+
+    self.point_weight[gauge] = pt
+    self.time_weight[gauge] = t
+    if caught_up:
+        return current_week
+    return t
+
+
+@internal
+def _checkpoint_gauge(gauge: address, do_emit: bool = True) -> Point:
     assert self.time_weight[gauge] > 0, "Gauge not alive"
 
     adjustment: uint256 = min(staticcall Gauge(gauge).get_adjustment(), 10**18)
@@ -170,7 +207,8 @@ def _checkpoint_gauge(gauge: address) -> Point:
     self.adjusted_gauge_weight[gauge] = aw_new
     self.adjusted_gauge_weight_sum = aw_sum + aw_new - aw
 
-    d_emissions: uint256 = extcall TOKEN.emit(self, unsafe_div(aw_sum * 10**18, w_sum))
+    # Otherwise already emitted in this block, which would give 0
+    d_emissions: uint256 = extcall TOKEN.emit(self, unsafe_div(aw_sum * 10**18, w_sum)) if do_emit else 0
     self.time_weight[gauge] = block.timestamp
 
     specific_emissions: uint256 = self.specific_emissions + unsafe_div(d_emissions * 10**18, aw_sum)
@@ -325,6 +363,31 @@ def checkpoint(gauge: address):
     self._checkpoint_gauge(gauge)
 
 
+@external
+def checkpoint_many(gauges: DynArray[address, 50]):
+    """
+    @notice Checkpoint several gauges, same as checkpoint() for each of them in turn
+    @dev Emits only once: another TOKEN.emit in the same block would return 0
+    @param gauges Gauges to checkpoint
+    """
+    do_emit: bool = True
+    for gauge: address in gauges:
+        self._checkpoint_gauge(gauge, do_emit)
+        do_emit = False
+
+
+@external
+def checkpoint_gauge_partial(gauge: address, max_weeks: uint256) -> uint256:
+    """
+    @notice Catch up the weight of a long-idle gauge by at most max_weeks weeks, so that
+            the next checkpoint (claim, vote) has less history to walk through
+    @param gauge Gauge address
+    @param max_weeks Maximum number of week boundaries to process (at most 500)
+    @return Timestamp the gauge weight is now stored at, or the current week once caught up
+    """
+    return self._catch_up_weight(gauge, max_weeks)
+
+
 @external
 @view
 def preview_emissions(gauge: address, at_time: uint256) -> uint256:
@@ -89,6 +89,7 @@ interface Erc20D:
 
 interface NetPressureOracle:
     def net_pressure_and_tvl(lt: address, agg_price: uint256) -> PressureTvl: view
+    def net_pressure_and_tvl_sum(lts: DynArray[address, MAX_POOLS], agg_price: uint256) -> PressureTvl: view
 
 interface MarketRateGetter:
     def rate() -> uint256: view
@@ -370,14 +371,12 @@ def trigger():
 @internal
 @view
 def _sum_pressure(agg_price: uint256) -> (int256, uint256):
-    """Aggregate net pressure and half-TVL over pressure_lts (crvUSD numeraire)."""
-    net: int256 = 0
-    half_tvl: uint256 = 0
-    for lt: address in self.pressure_lts:
-        pt: PressureTvl = staticcall self.net_pressure.net_pressure_and_tvl(lt, agg_price)
-        net += pt.net_pressure
-        half_tvl += pt.half_tvl
-    return net, half_tvl
+    """
+    Aggregate net pressure and half-TVL over pressure_lts (crvUSD numeraire), in one
+    oracle call: markets sharing a cryptopool share its lp_oracle_2 solve.
+    """
+    pt: PressureTvl = staticcall self.net_pressure.net_pressure_and_tvl_sum(self.pressure_lts, agg_price)
+    return pt.net_pressure, pt.half_tvl
 
 
 @external
@@ -61,6 +61,7 @@ interface Erc20D:
 
 interface NetPressureOracle:
     def net_pressure_and_tvl(lt: address, agg_price: uint256) -> PressureTvl: view
+    def net_pressure_and_tvl_sum(lts: DynArray[address, MAX_POOLS], agg_price: uint256) -> PressureTvl: view
 
 interface MarketRateGetter:
     def rate() -> uint256: view
@@ -328,21 +329,26 @@ def _signals(agg_price: uint256) -> Signals:
     @notice Compute the controller's manipulation-resistant inputs.
     @dev Reads each pool's net_pressure_and_tvl from the per-trigger transient cache
          (populated by _convert_fees) when present, else fetches it. So a pool in both
-         the fee set and pressure_lts pays the lp_oracle_2 solve once per trigger().
+         the fee set and pressure_lts pays the lp_oracle_2 solve once per trigger(). The
+         uncached ones are summed by one net_pressure_and_tvl_sum call, in which markets
+         sharing a cryptopool share that solve too.
     @param agg_price The crvUSD aggregator price (1e18), read once per trigger.
     @return Signals(pressure, sink), the relative (per half-TVL) controller inputs.
     """
     s: Signals = empty(Signals)
     half_tvl: uint256 = 0   # normalizer (sum of each AMM's half-TVL); not needed beyond this
     net: int256 = 0
+    uncached: DynArray[address, MAX_POOLS] = []
     for lt: address in self.pressure_lts:
         c: CachedPt = self._npt[lt]
-        pt: PressureTvl = empty(PressureTvl)
         if c.cached:
-            pt = PressureTvl(net_pressure=c.net_pressure, half_tvl=c.half_tvl)
+            half_tvl += c.half_tvl   # already the AMM equity (half-TVL); non-manipulable
+            net += c.net_pressure
         else:
-            pt = staticcall self.net_pressure.net_pressure_and_tvl(lt, agg_price)
-        half_tvl += pt.half_tvl   # already the AMM equity (half-TVL); non-manipulable
+            uncached.append(lt)
+    if len(uncached) > 0:
+        pt: PressureTvl = staticcall self.net_pressure.net_pressure_and_tvl_sum(uncached, agg_price)
+        half_tvl += pt.half_tvl
         net += pt.net_pressure
     assert half_tvl > 0, "No pools"
     if net > 0:
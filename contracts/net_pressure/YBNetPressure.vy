@@ -96,6 +96,8 @@ struct PressureTvl:
 
 
 PRECISION: constant(uint256) = 10**18
+# net_pressure_and_tvl_many / _sum batch bound; >= PID / MerklPIDDriver MAX_POOLS.
+MAX_MARKETS: public(constant(uint256)) = 20
 # The whole system fixes LEVERAGE = 2 * 10**18 (AMM.__init__, Factory,
 # YBLendingOracle). The closed forms below assume L = 2.
 L: constant(uint256) = 2
@@ -312,6 +314,78 @@ def net_pressure_and_tvl(lt: LT, agg_price: uint256 = 0) -> PressureTvl:
     return self._pressure_signals(amm, self._pool_metrics(pool), p)
 
 
+@internal
+@view
+def _pressure_many(lts: DynArray[LT, MAX_MARKETS], agg_price: uint256) -> DynArray[PressureTvl, MAX_MARKETS]:
+    # Markets sharing a cryptopool (e.g. a migrated LT next to its predecessor) share its
+    # lp_oracle_2 pool metrics: computed once per distinct pool
+    out: DynArray[PressureTvl, MAX_MARKETS] = []
+    if len(lts) == 0:
+        return out
+    p: uint256 = agg_price
+    if p == 0:
+        p = staticcall (staticcall lts[0].agg()).price()
+
+    pools: DynArray[Pool, MAX_MARKETS] = []
+    metrics: DynArray[PoolMetrics, MAX_MARKETS] = []
+    for lt: LT in lts:
+        amm: LevAMM = staticcall lt.amm()
+        pool: Pool = staticcall lt.CRYPTOPOOL()
+        self._assert_not_reentrant(amm)
+
+        m: PoolMetrics = empty(PoolMetrics)
+        found: bool = False
+        for k: uint256 in range(len(pools), bound=MAX_MARKETS):
+            if pools[k] == pool:
+                m = metrics[k]
+                found = True
+                break
+        if not found:
+            m = self._pool_metrics(pool)
+            pools.append(pool)
+            metrics.append(m)
+
+        out.append(self._pressure_signals(amm, m, p))
+    return out
+
+
+@external
+@view
+def net_pressure_and_tvl_many(lts: DynArray[LT, MAX_MARKETS], agg_price: uint256 = 0) -> DynArray[PressureTvl, MAX_MARKETS]:
+    """
+    @notice net_pressure_and_tvl for several LTs in a single call.
+    @dev Markets sharing a cryptopool share its lp_oracle_2 pool metrics, so the cost
+         grows with the number of pools rather than of markets. Each entry is identical
+         to net_pressure_and_tvl(lt, agg_price).
+    @param lts The YB LT (market) contracts.
+    @param agg_price crvUSD aggregator price (1e18), shared by all the markets. 0
+           (default) = read lts[0].agg().price() once.
+    @return PressureTvl per LT, in the order given.
+    """
+    return self._pressure_many(lts, agg_price)
+
+
+@external
+@view
+def net_pressure_and_tvl_sum(lts: DynArray[LT, MAX_MARKETS], agg_price: uint256 = 0) -> PressureTvl:
+    """
+    @notice Net pressure and half-TVL summed over several LTs, as the controllers
+            aggregate them.
+    @dev Same pool-metrics sharing as net_pressure_and_tvl_many; only the sums are
+         returned, so the caller's return buffer stays one PressureTvl.
+    @param lts The YB LT (market) contracts.
+    @param agg_price crvUSD aggregator price (1e18), shared by all the markets. 0
+           (default) = read lts[0].agg().price() once.
+    @return PressureTvl(summed net_pressure, summed half_tvl); zeros for no LTs.
+    """
+    total: PressureTvl = empty(PressureTvl)
+    markets: DynArray[PressureTvl, MAX_MARKETS] = self._pressure_many(lts, agg_price)
+    for pt: PressureTvl in markets:
+        total.net_pressure += pt.net_pressure
+        total.half_tvl += pt.half_tvl
+    return total
+
+
 @external
 @view
 def net_pressure_naive(lt: LT) -> int256:
@@ -0,0 +1,169 @@
+# @version 0.4.3
+"""
+@title YBMarketLens
+@author Yield Basis
+@license GNU Affero General Public License v3.0
+@notice Read-only lens: the state of a range of Factory markets (LT, AMM, cryptopool,
+        staker and oracle readings) in one eth_call.
+@dev Stateless. markets() stops early when the remaining gas runs low and returns the id
+     to continue from, so a page never runs out of gas half-way. A market past the untradable
+     point reads price_per_share = 0 instead of reverting the page.
+"""
+
+
+interface Factory:
+    def markets(i: uint256) -> Market: view
+    def market_count() -> uint256: view
+
+interface PriceOracle:
+    def price() -> uint256: view
+
+interface Cryptopool:
+    def balances(i: uint256) -> uint256: view
+    def totalSupply() -> uint256: view
+    def price_oracle() -> uint256: view
+    def price_scale() -> uint256: view
+
+interface LT:
+    def agg() -> PriceOracle: view
+    def liquidity() -> LiquidityValues: view
+    def totalSupply() -> uint256: view
+    def balanceOf(addr: address) -> uint256: view
+
+interface LevAMM:
+    def collateral_amount() -> uint256: view
+    def get_debt() -> uint256: view
+    def rate() -> uint256: view
+    def fee() -> uint256: view
+    def is_killed() -> bool: view
+
+interface ERC20:
+    def totalSupply() -> uint256: view
+
+
+struct LiquidityValues:
+    admin: int256  # Can be negative
+    total: uint256
+    ideal_staked: uint256
+    staked: uint256
+
+struct Market:
+    asset_token: address
+    cryptopool: address
+    amm: address
+    lt: address
+    price_oracle: address
+    virtual_pool: address
+    staker: address
+
+struct MarketState:
+    market_id: uint256
+    market: Market
+    # LT
+    lt_supply: uint256
+    lt_staked: uint256  # LT.balanceOf(staker)
+    price_per_share: uint256  # 0 if LT.pricePerShare() reverts
+    liquidity: LiquidityValues
+    staker_supply: uint256
+    # AMM
+    collateral: uint256
+    debt: uint256
+    rate: uint256
+    fee: uint256
+    is_killed: bool
+    # Oracles: LP token in USD (price_oracle) and crvUSD in USD (agg)
+    oracle_price: uint256
+    agg_price: uint256
+    # Cryptopool
+    pool_price_oracle: uint256
+    pool_price_scale: uint256
+    pool_balances: uint256[2]
+    pool_supply: uint256
+
+
+MAX_PAGE: public(constant(uint256)) = 100
+MIN_GAS_PER_MARKET: public(constant(uint256)) = 500_000
+
+FACTORY: public(immutable(Factory))
+
+
+@deploy
+def __init__(factory: Factory):
+    FACTORY = factory
+
+
+@internal
+@view
+def _market_state(i: uint256) -> MarketState:
+    s: MarketState = empty(MarketState)
+    s.market_id = i
+    s.market = staticcall FACTORY.markets(i)
+    if s.market.lt == empty(address):
+        return s
+
+    lt: LT = LT(s.market.lt)
+    s.lt_supply = staticcall lt.totalSupply()
+    # pricePerShare values the AMM through get_x0, which reverts once the market is past the
+    # untradable point: read it without letting one such market revert the page (0 then)
+    success: bool = False
+    response: Bytes[32] = b""
+    success, response = raw_call(
+        lt.address, method_id("pricePerShare()"), max_outsize=32, is_static_call=True, revert_on_failure=False)
+    if success:
+        s.price_per_share = abi_decode(response, uint256)
+    s.liquidity = staticcall lt.liquidity()
+    if s.market.staker != empty(address):
+        s.lt_staked = staticcall lt.balanceOf(s.market.staker)
+        s.staker_supply = staticcall ERC20(s.market.staker).totalSupply()
+
+    amm: LevAMM = LevAMM(s.market.amm)
+    s.collateral = staticcall amm.collateral_amount()
+    s.debt = staticcall amm.get_debt()
+    s.rate = staticcall amm.rate()
+    s.fee = staticcall amm.fee()
+    s.is_killed = staticcall amm.is_killed()
+
+    s.oracle_price = staticcall PriceOracle(s.market.price_oracle).price()
+    s.agg_price = staticcall (staticcall lt.agg()).price()
+
+    pool: Cryptopool = Cryptopool(s.market.cryptopool)
+    s.pool_price_oracle = staticcall pool.price_oracle()
+    s.pool_price_scale = staticcall pool.price_scale()
+    s.pool_balances = [staticcall pool.balances(0), staticcall pool.balances(1)]
+    s.pool_supply = staticcall pool.totalSupply()
+    return s
+
+
+@external
+@view
+def market_state(i: uint256) -> MarketState:
+    """
+    @notice State of one market
+    @param i Market id in the Factory
+    """
+    assert i < staticcall FACTORY.market_count(), "No market"
+    return self._market_state(i)
+
+
+@external
+@view
+def markets(start: uint256, count: uint256) -> (DynArray[MarketState, MAX_PAGE], uint256):
+    """
+    @notice States of markets start .. start + count - 1 (at most MAX_PAGE of them)
+    @dev Stops before a market when less than MIN_GAS_PER_MARKET gas is left
+    @param start First market id
+    @param count Number of markets to read
+    @return (states, id to continue from: market_count() once all are read)
+    """
+    n_markets: uint256 = staticcall FACTORY.market_count()
+    states: DynArray[MarketState, MAX_PAGE] = []
+    if start >= n_markets:
+        return states, n_markets
+    end: uint256 = min(start + min(count, MAX_PAGE), n_markets)
+
+    for i: uint256 in range(start, end, bound=MAX_PAGE):
+        if msg.gas < MIN_GAS_PER_MARKET:
+            return states, i
+        states.append(self._market_state(i))
+
+    return states, end
@@ -0,0 +1,189 @@
+"""
+Profit-maximising arbitrage against the LEVAMM, for keepers that hold it at its 2x equilibrium.
+
+The LEVAMM (AMM.vy) trades the cryptopool LP token against the stablecoin at its own price
+(x0 - debt) / collateral. The LP is worth its balanced redemption from the Twocrypto pool,
+    v = (balances[0] + balances[1] * price) / totalSupply        (price: external asset price)
+and balanced add / remove_liquidity costs no swap fee. So as soon as the AMM price is more than
+its fee away from v there is one trade to make, reachable by two routes:
+  * "amm"   - AMM.exchange directly: stablecoin -> LP (i=0) when the AMM is cheap, LP ->
+              stablecoin (i=1) when it is rich; the keeper mints / burns the LP itself;
+  * "vpool" - VirtualPool.exchange: the same AMM trade wrapped in a flash loan and a balanced
+              pool deposit / withdrawal, stablecoin -> asset (i=0) or asset -> stablecoin (i=1),
+              no LP inventory needed.
+Both are the same trade on the AMM's x * y = const curve, so the optimal size is closed form:
+    LP -> stablecoin:  dx = sqrt(x * collateral * (1 - fee) / v) - collateral
+    stablecoin -> LP:  dx = sqrt(x * collateral * (1 - fee) * v) - x       (at most debt)
+computed in integers (isqrt). Every candidate is then priced on the exact integer math
+(scripts/levamm.py and a twin of VirtualPool._calculate) including every revert: a trade the
+contract would reject ("Bad final state", "Unsafe min/max") is bisected down to the largest
+size that goes through - profit is concave in size, so that is the constrained optimum.
+
+Works on batches: one Snapshot of equal-length sequences (one entry per market, as read in one
+multicall per block), vectorised over numpy object arrays (uint256-exact).
+
+    from scripts.arb_solver import Snapshot, solve
+    trades = solve(Snapshot(p_o, collateral, debt, fee, pool_stables, pool_crypto, pool_supply,
+                            price, asset_decimals))
+    trades[k]  # best Trade(route, i, in_amount, out_amount, profit) for market k, or None
+
+Profits are in stablecoin. Swaps through Twocrypto.exchange itself are not a route here: they
+do not move the LEVAMM, and the pool's math lives outside this tree.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from levamm import LEVAMM, State, _Batch, _isqrt_batch                # from inside scripts/
+except ImportError:
+    from scripts.levamm import LEVAMM, State, _Batch, _isqrt_batch        # tests
+
+
+ROUNDING_DISCOUNT = 10**18 // 10**8    # VirtualPool.ROUNDING_DISCOUNT
+PRECISION = 10**18
+SHRINK_ROUNDS = 64                     # bisection rounds when the optimum reverts
+
+# Per market: AMM.get_state() (p_o from the AMM's price oracle, debt accrued), AMM.fee(), the
+# cryptopool's balances(0), balances(1), totalSupply(), and the external price of the asset in
+# stablecoin (1e18 per whole token of asset_decimals)
+Snapshot = namedtuple("Snapshot", "p_o collateral debt fee pool_stables pool_crypto pool_supply price asset_decimals")
+Trade = namedtuple("Trade", "route i in_amount out_amount profit")
+
+
+def _arrays(snapshot):
+    return [np.asarray(v, dtype=object) for v in snapshot]
+
+
+def lp_value(snapshot):
+    """Value of 1e18 LP in stablecoin, redeemed balanced at the external price."""
+    _, _, _, _, stables, crypto, supply, price, decimals = _arrays(snapshot)
+    return (stables + crypto * price // 10**decimals) * PRECISION // supply
+
+
+def _exchange(fee, i, in_amount, states):
+    """LEVAMM.exchange_batch with a fee and a direction (i) per market -> (out, ok)."""
+    out = np.zeros(len(fee), dtype=object)
+    ok = np.zeros(len(fee), dtype=bool)
+    for f, side in set(zip(fee, i)):
+        m = (fee == f) & (i == side)
+        out[m], _, ok[m] = LEVAMM(f).exchange_batch(side, 1 - side, in_amount[m], State(*(s[m] for s in states)))
+    return out, ok
+
+
+def vpool_get_dy(i, in_amount, snapshot):
+    """
+    VirtualPool.get_dy(i, 1 - i, in_amount) for every market -> (out_amount, amm_in, ok):
+    amm_in is what the VirtualPool feeds AMM.exchange (stablecoin for i=0, LP for i=1).
+    """
+    p_o, collateral, debt, fee, stables, crypto, supply, _, _ = _arrays(snapshot)
+    b = _Batch(in_amount, p_o, collateral, debt, fee, stables, crypto, supply)
+    in_amount, p_o, collateral, debt, fee, stables, crypto, supply = b.args
+    x0 = LEVAMM(0)._x0_batch(b, p_o, collateral, debt)
+    if i == 0:
+        in_amount = b.u(in_amount * (PRECISION - ROUNDING_DISCOUNT)) // PRECISION
+        r0fee = b.u(stables * b.u(PRECISION - fee)) // b.nonzero(supply)
+        bb = b.u(b.u(b.u(x0 - debt) + in_amount) - b.u(r0fee * collateral) // PRECISION)
+        D = b.u(bb**2 + b.u(4 * collateral * r0fee) // PRECISION * in_amount)
+        flash = b.u(_isqrt_batch(D) - bb) // 2
+        out = flash * crypto // b.nonzero(stables)
+        return b.out(out), b.out(in_amount + flash), b.ok
+    else:
+        flash = in_amount * stables // b.nonzero(crypto)
+        lp = supply * in_amount // b.nonzero(crypto)
+        dy = np.zeros(len(fee), dtype=object)
+        for f in set(fee):
+            m = fee == f
+            dy[m], okm = LEVAMM(f).get_dy_batch(1, 0, lp[m], State(p_o[m], collateral[m], debt[m]))
+            b.ok[m] &= okm
+        return b.out(b.u(dy - flash)), b.out(lp), b.ok
+
+
+def optimal_size(snapshot):
+    """
+    Continuous optimum of the AMM trade -> (i, dx): i = 0 buys LP with dx stablecoin, i = 1
+    sells dx LP; dx = 0 where the AMM is within its fee of the LP value.
+    """
+    p_o, collateral, debt, fee, *_ = _arrays(snapshot)
+    b = _Batch(p_o, collateral, debt)
+    x = b.u(LEVAMM(0)._x0_batch(b, *b.args) - debt)
+    v = lp_value(snapshot)
+    f1 = PRECISION - fee
+
+    sell = x * f1 > v * collateral                                  # AMM price * (1 - fee) > v
+    buy = x * PRECISION * PRECISION < v * collateral * f1           # AMM price < v * (1 - fee)
+    dx_sell = np.maximum(_isqrt_batch(x * collateral * f1 // np.where(v > 0, v, 1)) - collateral, 0)
+    dx_buy = np.minimum(np.maximum(_isqrt_batch(x * collateral * f1 // PRECISION * v // PRECISION) - x, 0), debt)
+    i = np.where(sell, 1, 0)
+    dx = np.where(sell & b.ok, dx_sell, np.where(buy & b.ok, dx_buy, 0))
+    return i, dx
+
+
+def _largest_ok(check, amounts):
+    """Shrink each amount to the largest one `check` accepts (0 if none); check -> (value, ok)."""
+    value, ok = check(amounts)
+    lo = np.where(ok, amounts, 0)
+    hi = amounts.copy()
+    for _ in range(SHRINK_ROUNDS):
+        active = ~ok & (hi - lo > 1)
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        _, mid_ok = check(mid)
+        lo = np.where(active & mid_ok, mid, lo)
+        hi = np.where(active & ~mid_ok, mid, hi)
+    amounts = np.where(ok, amounts, lo)
+    value, ok = check(amounts)
+    return amounts, np.where(ok, value, 0), ok
+
+
+def _routes(snapshot, i, dx):
+    """Exact (in, out, profit) of both routes at AMM trade size dx, shrunk to what goes through."""
+    p_o, collateral, debt, fee, stables, crypto, supply, price, decimals = _arrays(snapshot)
+    states = (p_o, collateral, debt)
+    v = lp_value(snapshot)
+    routes = {}
+
+    # amm: AMM.exchange(i, 1 - i, dx)
+    amount, got, ok = _largest_ok(lambda a: _exchange(fee, i, a, states), dx)
+    profit = np.where(i == 0, got * v // PRECISION - amount, got - amount * v // PRECISION)
+    routes["amm"] = (amount, got, np.where(ok & (amount > 0), profit, 0))
+
+    # vpool: the input that makes the VirtualPool feed the AMM the same dx - for i=0 the
+    # stablecoin not covered by the flash loan (repaid from the LP's stablecoin share), before
+    # the rounding discount; for i=1 the asset half of dx LP
+    lp_out, _ = _exchange(fee, i, dx, states)
+    spent = dx - np.where(i == 0, lp_out, 0) * stables // supply
+    vin = np.where(i == 0, _ceil_div(spent * PRECISION, PRECISION - ROUNDING_DISCOUNT), dx * crypto // supply)
+
+    def vcheck(a):
+        got = np.zeros(len(a), dtype=object)
+        ok = np.zeros(len(a), dtype=bool)
+        for side in (0, 1):
+            m = i == side
+            got_side, amm_in, ok_side = vpool_get_dy(side, np.where(m, a, 0), snapshot)
+            _, amm_ok = _exchange(fee, np.full(len(a), side), amm_in, states)
+            got = np.where(m, got_side, got)
+            ok = np.where(m, ok_side & amm_ok, ok)
+        return got, ok
+
+    amount, got, ok = _largest_ok(vcheck, vin)
+    profit = np.where(i == 0, got * price // 10**decimals - amount, got - amount * price // 10**decimals)
+    routes["vpool"] = (amount, got, np.where(ok & (amount > 0), profit, 0))
+    return routes
+
+
+def _ceil_div(x, y):
+    return np.where(x == 0, 0, (x - 1) // y + 1)
+
+
+def solve(snapshot):
+    """Best profitable Trade per market (None where nothing beats the fees), see module docstring."""
+    i, dx = optimal_size(snapshot)
+    routes = _routes(snapshot, i, dx)
+    trades = []
+    for k in range(len(dx)):
+        best = max(routes, key=lambda r: routes[r][2][k])
+        amount, got, profit = (routes[best][n][k] for n in range(3))
+        trades.append(Trade(best, int(i[k]), amount, got, profit) if profit > 0 else None)
+    return trades
@@ -0,0 +1,106 @@
+"""
+Persistent timestamp -> block index for the replay scripts (model_apr_from_export.py,
+print_apr_from_export.py) and any other tooling that maps window timestamps to blocks.
+
+Block timestamps are monotone, so a sparse set of known (block, timestamp) samples brackets any
+target and interpolation between the bracket ends lands within a few blocks of it. blocks_at()
+resolves a whole list of timestamps at once: every round it interpolates a guess for each
+unresolved target, fetches all the guesses in one fetch_multi and tightens every bracket with
+them (once a round fails to halve a bracket its midpoint is probed too, so convergence is never
+worse than binary search). The samples persist, so later runs - and nearby targets - start from
+tight brackets: a whole export usually costs a handful of batched header fetches rather than
+O(rows * log N) single ones.
+
+    index = BlockIndex(rpc)                       # rpc: boa EthereumRPC / rpc_cache.CachedRPC
+    blocks = index.blocks_at([r["window_end_ts"] for r in rows])   # floor: last block with ts <= t
+
+Only blocks CONFIRMATIONS deep are stored (the tail can still be reorged); the index is an SQLite
+file in .cache/blocks.sqlite at the repo root, YB_BLOCK_INDEX overrides the location, an empty
+value keeps it in memory.
+"""
+import os
+import sqlite3
+from bisect import bisect_right
+from pathlib import Path
+
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / ".cache" / "blocks.sqlite"
+CONFIRMATIONS = 64
+SEED = 64                   # evenly spaced samples fetched into an empty index
+
+
+def _path():
+    path = os.environ.get("YB_BLOCK_INDEX")
+    return DEFAULT_PATH if path is None else (Path(path) if path else None)
+
+
+class BlockIndex:
+    def __init__(self, rpc, path=None):
+        self.rpc = rpc
+        path = path or _path()
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path) if path else ":memory:")
+        self._db.execute("CREATE TABLE IF NOT EXISTS blocks (number INTEGER PRIMARY KEY, ts INTEGER)")
+        self._ts = dict(self._db.execute("SELECT number, ts FROM blocks"))
+        head = rpc.fetch("eth_getBlockByNumber", ["latest", False])
+        self.head = int(head["number"], 16)
+        self.head_ts = int(head["timestamp"], 16)
+        self._ts[self.head] = self.head_ts
+        self.fetched = 0
+
+    def _fetch(self, numbers):
+        numbers = sorted(set(numbers) - self._ts.keys())
+        if not numbers:
+            return
+        headers = self.rpc.fetch_multi([("eth_getBlockByNumber", [hex(n), False]) for n in numbers])
+        new = [(n, int(h["timestamp"], 16)) for n, h in zip(numbers, headers)]
+        self._ts.update(new)
+        self.fetched += len(new)
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?)",
+                                 [(n, ts) for n, ts in new if n <= self.head - CONFIRMATIONS])
+
+    def ts(self, number):
+        """Timestamp of block `number`."""
+        self._fetch([number])
+        return self._ts[number]
+
+    def blocks_at(self, timestamps):
+        """Floor block (the last one with timestamp <= t) of every t in `timestamps`, in order."""
+        if len(self._ts) < SEED:
+            # An empty index: a coarse grid first, so that interpolation has something to work with
+            # (genesis alone is no help - mainnet's is dated 1970)
+            self._fetch([0] + [self.head * i // SEED for i in range(1, SEED)])
+        out = {}
+        brackets = {}                       # per target: ts[lo] <= t < ts[hi]; done once hi == lo + 1
+        for t in set(timestamps):
+            if t >= self.head_ts:
+                out[t] = self.head
+            elif t < self._ts[min(self._ts)]:
+                raise ValueError(f"timestamp {t} predates the chain")
+            else:
+                brackets[t] = None
+        crawling = set()
+        while brackets:
+            known = sorted(self._ts)
+            known_ts = [self._ts[n] for n in known]
+            probes = []
+            for t, old in list(brackets.items()):
+                i = bisect_right(known_ts, t)
+                lo, hi = known[i - 1], known[i]
+                if hi == lo + 1:
+                    out[t] = lo
+                    del brackets[t]
+                    continue
+                ts_lo, ts_hi = self._ts[lo], self._ts[hi]
+                guess = min(max(lo + (t - ts_lo) * (hi - lo) // (ts_hi - ts_lo), lo + 1), hi - 1)
+                # The guess and its successor: a guess landing on the floor block resolves the target
+                probes += [guess, guess + 1]
+                if old and hi - lo > (old[1] - old[0]) // 2:
+                    crawling.add(t)
+                if t in crawling:
+                    probes.append((lo + hi) // 2)   # interpolation is crawling: bisect alongside
+                brackets[t] = (lo, hi)
+            self._fetch(probes)
+        return [out[t] for t in timestamps]
@@ -0,0 +1,124 @@
+"""
+Persistent compile cache for boa.load / load_partial / loads_partial, shared by tests/,
+tests_forked/ and scripts/.
+
+titanoboa's own disk cache stores the compiled artifact but finds it by module fingerprint, so
+every lookup still parses and analyses the contract and everything it imports - and that, not
+codegen, is what a warm session spends its startup on. This cache sits in front of it and is keyed
+on raw text only:
+  - the source as passed to boa (so loads_partial of rewritten source - Twocrypto with the
+    periphery addresses embedded - gets its own entry per set of addresses),
+  - the text of every file it transitively imports (resolved like vyper does: relative to the
+    importing file, then the search paths),
+  - the compiler version and commit, the compiler settings, contract name and filename.
+A hit unpickles the finished CompilerData without calling into vyper at all. The IR and assembly
+(over half the pickle, and only read on the rare constructor-error path) are left out; they are
+cached_property on CompilerData and rebuild on demand from the annotated module that is kept.
+
+    from scripts import compile_cache    # tests / tests_forked
+    import compile_cache                 # from inside scripts/
+    compile_cache.install()
+
+The cache lives in .cache/compile at the repo root; YB_COMPILE_CACHE overrides the location, an
+empty value disables it. Entries are written atomically (write + rename), so concurrent xdist
+workers can share one directory.
+"""
+import hashlib
+import os
+import re
+from pathlib import Path
+
+import boa.interpret
+import vyper
+from boa.util.disk_cache import DiskCache
+from vyper.cli.vyper_compile import get_search_paths
+from vyper.semantics.namespace import get_namespace
+
+
+DEFAULT_DIR = Path(__file__).resolve().parent.parent / ".cache" / "compile"
+EXTENSIONS = (".vy", ".vyi", ".json")
+LAZY = ("_ir_output", "assembly", "assembly_runtime")  # recomputed by CompilerData when accessed
+IMPORT_RE = re.compile(r"^[ \t]*(?:from[ \t]+(\.*)([\w.]*)[ \t]+import[ \t]+([\w, \t]+)|import[ \t]+([\w.]+))", re.M)
+
+_compiler_data = boa.interpret.compiler_data
+_cache = None
+
+
+def _sha(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _imports(source, base, search_paths):
+    """Files an import statement in `source` (living in directory `base`) can resolve to."""
+    for level, module, names, plain in IMPORT_RE.findall(source):
+        if plain:
+            level, module, names = "", plain, ""
+        parts = [p for p in module.split(".") if p]
+        if level:
+            roots = [base if len(level) == 1 else base.parents[len(level) - 2]]
+        else:
+            roots = [base, *search_paths]
+        names = [n.split()[0] for n in names.split(",") if n.strip()]
+        for root in roots:
+            stems = [root.joinpath(*parts, n) for n in names] + ([root.joinpath(*parts)] if parts else [])
+            for stem in stems:
+                for ext in EXTENSIONS:
+                    path = Path(str(stem) + ext)
+                    if path.is_file():
+                        yield path.resolve()
+        # Unresolved names are compiler builtins (ethereum.ercs, ...): covered by the version salt
+
+
+def fingerprint(source, filename, search_paths=None, _seen=None):
+    """Hash of `source` and the text of everything it transitively imports."""
+    if search_paths is None:
+        search_paths = get_search_paths(boa.interpret._search_path)
+    seen = set() if _seen is None else _seen
+    parts = [_sha(source)]
+    for dep in _imports(source, Path(filename).resolve().parent, search_paths):
+        if dep in seen:
+            continue
+        seen.add(dep)
+        parts.append(f"{dep}:{fingerprint(dep.read_text(), dep, search_paths, seen)}")
+    return _sha("\n".join(parts))
+
+
+def _cached_compiler_data(source_code, contract_name, filename, deployer=None, **kwargs):
+    key = repr((
+        contract_name,
+        str(filename),
+        fingerprint(source_code, filename),
+        sorted((k, repr(v)) for k, v in kwargs.items()),
+        deployer and f"{deployer.__module__}.{deployer.__qualname__}",
+    ))
+
+    def build():
+        data = _compiler_data(source_code, contract_name, filename, deployer, **kwargs)
+        for attr in LAZY:
+            data.__dict__.pop(attr, None)
+        return data
+
+    return _cache.caching_lookup(key, build)
+
+
+def install(cache_dir=None):
+    """
+    Route boa's compilation through the cache (idempotent).
+    @param cache_dir Cache location; default YB_COMPILE_CACHE or .cache/compile at the repo root
+    """
+    global _cache
+    if cache_dir is None:
+        cache_dir = os.getenv("YB_COMPILE_CACHE", str(DEFAULT_DIR))
+    if not cache_dir:
+        return uninstall()
+    _cache = DiskCache(cache_dir, f"{vyper.__version__}.{vyper.__commit__}")
+    # A session served only from the cache never analyses a module, which is what creates vyper's
+    # global namespace - and boa.eval (override_global_namespace) reads it unconditionally
+    get_namespace()
+    boa.interpret.compiler_data = _cached_compiler_data
+
+
+def uninstall():
+    global _cache
+    _cache = None
+    boa.interpret.compiler_data = _compiler_data
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Creation-block index of every Factory market contract: cryptopool, AMM, LT, price oracle,
+VirtualPool and staker, so that scanners start exactly at deployment instead of binary-searching
+eth_getCode on every run or scanning from a conservative floor.
+
+Filled in one pass and kept in .cache/deploy_blocks.json:
+  - the Factory creates AMM / LT / oracle / VirtualPool / staker itself and logs all of them in
+    MarketParameters (add_market, and fill_staker_vpool when it replaces the VirtualPool or
+    staker), so the block of the first log naming an address is its creation block - one
+    eth_getLogs scan of the Factory, resumed from where the last run stopped;
+  - cryptopools (and the Factory, and any `extra` address) are deployed elsewhere: their blocks
+    come from one bisection over eth_getCode run for all of them at once, each round's probes in
+    flight together. A block the node does not serve counts as "no code yet", as before; any
+    other error (rate limit, ...) aborts the run rather than cache a wrong block.
+Only what is CONFIRMATIONS deep is indexed, so a market created in the last few minutes shows up
+on the next run.
+
+    index = update(rpc)                   # rpc: log_scanner.JsonRPC
+    index["blocks"][address]              # creation block (checksummed address)
+    index["markets"][i]                   # {"cryptopool": ..., "amm": ..., ...} as last logged
+
+Run: python scripts/deploy_index.py (prints the index)
+"""
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address
+
+try:
+    from log_scanner import RPCError, WORKERS, block_number, get_logs            # from inside scripts/
+except ImportError:
+    from scripts.log_scanner import RPCError, WORKERS, block_number, get_logs    # tests
+
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / ".cache" / "deploy_blocks.json"
+FACTORY = "0x370a449FeBb9411c95bf897021377fe0B7D100c0"
+CONFIRMATIONS = 64
+MARKET_PARAMETERS = "0x" + keccak(
+    text="MarketParameters(uint256,address,address,address,address,address,address,address,address)").hex()
+LOGGED = ("amm", "lt", "price_oracle", "virtual_pool", "staker")   # MarketParameters data, before agg
+EMPTY = "0x" + "00" * 20
+# eth_getCode errors of a node which does not serve that block's state (pruned / not archived)
+NOT_SERVED_RE = re.compile(r"missing trie node|header not found|(block|state) (is )?not (found|available)|pruned", re.I)
+
+
+def _has_code(rpc, address, block):
+    try:
+        return len(rpc("eth_getCode", [address, hex(block)])) > 2
+    except RPCError as e:
+        if NOT_SERVED_RE.search(str(e.error)):
+            return False                  # block not served -> deployed later, as far as we can tell
+        raise
+
+
+def deploy_blocks(rpc, bounds, workers=WORKERS):
+    """
+    Creation block of several contracts by one joint bisection over eth_getCode.
+    @param bounds {address: (lo, hi)}, the address having code at hi
+    @return {address: first block in [lo, hi] with code}
+    """
+    bounds = dict(bounds)
+    with ThreadPoolExecutor(workers) as pool:
+        while any(lo < hi for lo, hi in bounds.values()):
+            probes = {a: (lo + hi) // 2 for a, (lo, hi) in bounds.items() if lo < hi}
+            codes = pool.map(lambda a: _has_code(rpc, a, probes[a]), probes)
+            for (a, mid), code in zip(probes.items(), codes):
+                lo, hi = bounds[a]
+                bounds[a] = (lo, mid) if code else (mid + 1, hi)
+    return {a: lo for a, (lo, _) in bounds.items()}
+
+
+def load(path=DEFAULT_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"scanned_to": None, "blocks": {}, "markets": []}
+
+
+def _save(index, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}")
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, path)
+
+
+def update(rpc, extra=(), path=DEFAULT_PATH):
+    """Bring the index up to CONFIRMATIONS below head and return it (see module docstring)."""
+    index = load(path)
+    blocks = index["blocks"]
+    safe = block_number(rpc, "latest") - CONFIRMATIONS
+    factory = to_checksum_address(FACTORY)
+    if factory not in blocks:
+        blocks.update(deploy_blocks(rpc, {factory: (0, safe)}))
+
+    pending = {to_checksum_address(a): (0, safe) for a in extra}
+    start = blocks[factory] if index["scanned_to"] is None else index["scanned_to"] + 1
+    if start <= safe:
+        for log in get_logs(rpc, FACTORY, [MARKET_PARAMETERS], start, safe):
+            block = int(log["blockNumber"], 16)
+            i = int(log["topics"][1], 16)
+            market = {"cryptopool": to_checksum_address("0x" + log["topics"][3][-40:])}
+            market.update(zip(LOGGED, map(to_checksum_address, decode(["address"] * 6, bytes.fromhex(log["data"][2:]))[:5])))
+            while len(index["markets"]) <= i:
+                index["markets"].append(None)
+            index["markets"][i] = market
+            for name in LOGGED:
+                if market[name] != EMPTY:
+                    blocks.setdefault(market[name], block)
+            # Deployed outside the Factory: bisected below, bounded by this log
+            pending.setdefault(market["cryptopool"], (0, block))
+        index["scanned_to"] = safe
+
+    blocks.update(deploy_blocks(rpc, {a: b for a, b in pending.items() if a not in blocks}))
+    _save(index, path)
+    return index
+
+
+def main():
+    from log_scanner import JsonRPC
+    from networks import NETWORK
+
+    index = update(JsonRPC(NETWORK))
+    blocks = index["blocks"]
+    print(f"Factory {FACTORY}: {blocks[to_checksum_address(FACTORY)]}  (scanned to {index['scanned_to']})")
+    for i, market in enumerate(index["markets"]):
+        if market:
+            print(f"market {i}: " + "  ".join(f"{k} {blocks.get(a, '-')}" for k, a in market.items()))
+
+
+if __name__ == "__main__":
+    main()
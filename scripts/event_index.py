@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Incremental on-disk index (SQLite) of the YB events the analytics scripts keep rescanning:
+VotingEscrow Deposit, GaugeController VoteForGauge, HybridVaultFactory VaultCreated, FeeDistributor
+Claim, and per market AMM TokenExchange / AddLiquidityRaw / RemoveLiquidityRaw and LT Deposit /
+Withdraw.
+
+One table per event (ve_deposit, gc_vote, vault_created, fd_claim, amm_exchange,
+amm_add_liquidity, amm_remove_liquidity, lt_deposit, lt_withdraw), keyed on (block, log_index),
+with the event arguments as columns: addresses checksummed, uint256 as decimal TEXT (exact; CAST
+to REAL to aggregate). Every (kind, contract) has a cursor: the last block indexed for good.
+
+Reorg safety: the cursor only ever advances to the finalized block (head - CONFIRMATIONS where the
+node has no "finalized" tag). Rows above it - the unconfirmed tail - are provisional: each sync
+deletes them and fetches (cursor, head] again, so a reorged tail is simply replaced. A rerun only
+fetches what is past the cursor; a contract seen for the first time starts at its creation block
+(scripts/deploy_index.py). The scan itself goes through scripts/log_scanner.py.
+
+    python scripts/event_index.py                      # sync .cache/events.sqlite
+    python scripts/event_index.py "SELECT COUNT(*) FROM gc_vote"
+"""
+import os
+import sqlite3
+import sys
+from collections import defaultdict, namedtuple
+
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address
+
+try:
+    from log_scanner import RPCError, get_logs            # from inside scripts/
+except ImportError:
+    from scripts.log_scanner import RPCError, get_logs    # tests
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(os.path.dirname(HERE), ".cache", "events.sqlite")
+
+FACTORY = "0x370a449FeBb9411c95bf897021377fe0B7D100c0"
+VOTING_ESCROW = "0x8235c179e9e84688fbd8b12295efc26834dac211"
+GAUGE_CONTROLLER = "0x1Be14811A3a06F6aF4fA64310a636e1Df04c1c21"
+HYBRID_VAULT_FACTORY = "0xBdC32268851C324c6185809271dfe6d8dab8dC5b"
+FEE_DISTRIBUTOR = "0xD11b416573EbC59b6B2387DA0D2c0D1b3b1F7A90"
+START_BLOCK = 23370927      # YB deployment (VotingEscrow / GaugeController); nothing of ours predates it
+CONFIRMATIONS = 64          # finality stand-in when the node has no "finalized" tag
+
+# fields: (name, abi type, indexed), in declaration order
+Event = namedtuple("Event", "table name fields")
+
+EVENTS = {
+    "voting_escrow": [
+        Event("ve_deposit", "Deposit", [("_from", "address", True), ("_for", "address", True),
+                                        ("value", "uint256", False), ("locktime", "uint256", True),
+                                        ("type", "uint256", False), ("ts", "uint256", False)]),
+    ],
+    "gauge_controller": [
+        Event("gc_vote", "VoteForGauge", [("time", "uint256", False), ("user", "address", False),
+                                          ("gauge_addr", "address", False), ("weight", "uint256", False)]),
+    ],
+    "hybrid_vault_factory": [
+        Event("vault_created", "VaultCreated", [("user", "address", True), ("vault", "address", True)]),
+    ],
+    "fee_distributor": [
+        Event("fd_claim", "Claim", [("user", "address", True), ("token", "address", True),
+                                    ("amount", "uint256", False)]),
+    ],
+    "amm": [
+        Event("amm_exchange", "TokenExchange", [("buyer", "address", True), ("sold_id", "uint256", False),
+                                                ("tokens_sold", "uint256", False), ("bought_id", "uint256", False),
+                                                ("tokens_bought", "uint256", False), ("fee", "uint256", False),
+                                                ("price_oracle", "uint256", False)]),
+        Event("amm_add_liquidity", "AddLiquidityRaw", [("token_amounts", "uint256[2]", False),
+                                                       ("invariant", "uint256", False),
+                                                       ("price_oracle", "uint256", False)]),
+        Event("amm_remove_liquidity", "RemoveLiquidityRaw", [("collateral_change", "uint256", False),
+                                                             ("debt_change", "uint256", False)]),
+    ],
+    "lt": [
+        Event("lt_deposit", "Deposit", [("sender", "address", True), ("owner", "address", True),
+                                        ("assets", "uint256", False), ("shares", "uint256", False)]),
+        Event("lt_withdraw", "Withdraw", [("sender", "address", True), ("receiver", "address", True),
+                                          ("owner", "address", True), ("assets", "uint256", False),
+                                          ("shares", "uint256", False)]),
+    ],
+}
+
+SEL_MARKET_COUNT = "0x" + keccak(text="market_count()").hex()[:8]
+SEL_MARKETS = "0x" + keccak(text="markets(uint256)").hex()[:8]
+
+
+def topic0(event):
+    return "0x" + keccak(text=f"{event.name}({','.join(t for _, t, _ in event.fields)})").hex()
+
+
+def columns(event):
+    """Table columns of the event arguments; fixed arrays (uint256[2]) get one column per item."""
+    for name, typ, _ in event.fields:
+        if typ.endswith("]"):
+            yield from (f"{name}_{i}" for i in range(int(typ[typ.index("[") + 1:-1])))
+        else:
+            yield name
+
+
+def _value(typ, value):
+    if typ == "address":
+        return to_checksum_address(value)
+    if typ.endswith("]"):
+        return [str(v) for v in value]
+    return str(value)
+
+
+def decode_log(event, log):
+    """Row of `event`'s table for a raw eth_getLogs entry."""
+    topics = iter(log["topics"][1:])
+    data = iter(decode([t for _, t, indexed in event.fields if not indexed], bytes.fromhex(log["data"][2:])))
+    row = [int(log["blockNumber"], 16), int(log["logIndex"], 16), log["transactionHash"],
+           to_checksum_address(log["address"])]
+    for _, typ, indexed in event.fields:
+        if indexed:
+            raw = bytes.fromhex(next(topics)[2:])
+            value = decode([typ], raw)[0]
+        else:
+            value = next(data)
+        value = _value(typ, value)
+        row += value if isinstance(value, list) else [value]
+    return row
+
+
+def connect(path=DEFAULT_DB):
+    """Open (creating if needed) the index database."""
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE IF NOT EXISTS cursor (kind TEXT, address TEXT, block INTEGER, PRIMARY KEY (kind, address))")
+    for events in EVENTS.values():
+        for event in events:
+            cols = ", ".join(f"{c} TEXT" for c in columns(event))
+            db.execute(f"CREATE TABLE IF NOT EXISTS {event.table} (block INTEGER, log_index INTEGER, "
+                       f"tx_hash TEXT, address TEXT, {cols}, PRIMARY KEY (block, log_index))")
+            db.execute(f"CREATE INDEX IF NOT EXISTS {event.table}_address ON {event.table} (address, block)")
+    db.commit()
+    return db
+
+
+def market_addresses(rpc, block="latest"):
+    """{"amm": [...], "lt": [...]} of every Factory market."""
+    n = int(rpc("eth_call", [{"to": FACTORY, "data": SEL_MARKET_COUNT}, block]), 16)
+    out = {"amm": [], "lt": []}
+    for i in range(n):
+        raw = bytes.fromhex(rpc("eth_call", [{"to": FACTORY, "data": SEL_MARKETS + f"{i:064x}"}, block])[2:])
+        # Market: asset_token, cryptopool, amm, lt, price_oracle, virtual_pool, staker
+        out["amm"].append(to_checksum_address(raw[2 * 32 + 12:3 * 32]))
+        out["lt"].append(to_checksum_address(raw[3 * 32 + 12:4 * 32]))
+    return out
+
+
+def addresses(rpc):
+    """Every indexed contract, by kind."""
+    return {
+        "voting_escrow": [VOTING_ESCROW],
+        "gauge_controller": [GAUGE_CONTROLLER],
+        "hybrid_vault_factory": [HYBRID_VAULT_FACTORY],
+        "fee_distributor": [FEE_DISTRIBUTOR],
+        **market_addresses(rpc),
+    }
+
+
+def safe_block(rpc, head):
+    try:
+        return min(int(rpc("eth_getBlockByNumber", ["finalized", False])["number"], 16), head)
+    except RPCError:
+        return max(head - CONFIRMATIONS, 0)
+
+
+def sync(db, rpc, contracts, start_block=START_BLOCK, starts=None):
+    """
+    Bring the index up to the chain head.
+    @param contracts {kind: [address, ...]} (see addresses())
+    @param starts {address: creation block} (deploy_index.py): where a contract not indexed yet
+           starts, rather than at start_block
+    @return {table: rows added or re-added}
+    """
+    starts = starts or {}
+    head = int(rpc("eth_getBlockByNumber", ["latest", False])["number"], 16)
+    safe = safe_block(rpc, head)
+    added = defaultdict(int)
+    for kind, addrs in contracts.items():
+        events = {topic0(e): e for e in EVENTS[kind]}
+        # Contracts at the same cursor are scanned together
+        groups = defaultdict(list)
+        for addr in map(to_checksum_address, addrs):
+            row = db.execute("SELECT block FROM cursor WHERE kind = ? AND address = ?", (kind, addr)).fetchone()
+            groups[row[0] if row else starts.get(addr, start_block) - 1].append(addr)
+
+        for cursor, group in groups.items():
+            logs = get_logs(rpc, group, [list(events)], cursor + 1, head)
+            marks = ", ".join("?" * len(group))
+            with db:
+                for event in events.values():
+                    # Drop the provisional tail: it is in `logs` again, as the chain has it now
+                    db.execute(f"DELETE FROM {event.table} WHERE block > ? AND address IN ({marks})", (cursor, *group))
+                for log in logs:
+                    event = events[log["topics"][0]]
+                    row = decode_log(event, log)
+                    db.execute(f"INSERT OR REPLACE INTO {event.table} VALUES ({', '.join('?' * len(row))})", row)
+                    added[event.table] += 1
+                db.executemany("INSERT OR REPLACE INTO cursor VALUES (?, ?, ?)",
+                               [(kind, addr, max(cursor, safe)) for addr in group])
+    return dict(added)
+
+
+def main():
+    import deploy_index
+    from log_scanner import JsonRPC
+    from networks import NETWORK
+
+    rpc = JsonRPC(NETWORK)
+    db = connect()
+    contracts = addresses(rpc)
+    starts = deploy_index.update(rpc, extra=[a for addrs in contracts.values() for a in addrs])["blocks"]
+    added = sync(db, rpc, contracts, starts=starts)
+    for events in EVENTS.values():
+        for event in events:
+            n = db.execute(f"SELECT COUNT(*) FROM {event.table}").fetchone()[0]
+            print(f"{event.table:<22} {n:>8} rows  (+{added.get(event.table, 0)} fetched)")
+    if len(sys.argv) > 1:
+        for row in db.execute(sys.argv[1]):
+            print(*row, sep="\t")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,42 +11,21 @@ LTMigrator deallocation path.
 
 Standalone, read-only — plain JSON-RPC, no fork.
 """
-import json
-import urllib.request
-
 from eth_utils import keccak, to_checksum_address
 
+import event_index
+from log_scanner import JsonRPC
 from networks import NETWORK
 
 HYBRID_VAULT_FACTORY = "0xBdC32268851C324c6185809271dfe6d8dab8dC5b"
 YB_FACTORY = "0x370a449FeBb9411c95bf897021377fe0B7D100c0"
 POOL_ID = 6                                  # old WETH market
 
-# Conservative lower bound: a few months back is more than enough for v3.
-# (eth_getLogs scans hex(lo)..hex(latest) regardless of contract age — if
-# nothing was deployed yet we just get an empty page per chunk.)
-SCAN_FROM_BLOCK = 22_000_000
-LOG_CHUNK = 10_000                           # mainnet-cluster eth_getLogs limit
-
-VAULT_CREATED_TOPIC0 = "0x" + keccak(
-    text="VaultCreated(address,address)"
-).hex()
 BALANCE_OF_SELECTOR = "0x" + keccak(text="balanceOf(address)").hex()[:8]
 MARKETS_SELECTOR = "0x" + keccak(text="markets(uint256)").hex()[:8]
 
 
-def rpc(method, params):
-    req = urllib.request.Request(
-        NETWORK,
-        data=json.dumps(
-            {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
-        ).encode(),
-        headers={"Content-Type": "application/json"},
-    )
-    r = json.loads(urllib.request.urlopen(req, timeout=120).read())
-    if r.get("error"):
-        raise RuntimeError(f"RPC {method}: {r['error']}")
-    return r["result"]
+rpc = JsonRPC(NETWORK)
 
 
 def balance_of(token: str, who: str) -> int:
@@ -70,21 +49,14 @@ def main():
     latest = int(rpc("eth_blockNumber", []), 16)
     lt_addr, staker_addr = market_lt_and_staker(POOL_ID)
     print(f"# WETH market #{POOL_ID}: lt={lt_addr} staker={staker_addr}")
-    print(f"# scanning VaultCreated events {SCAN_FROM_BLOCK}..{latest}")
-
-    vaults = {}                              # vault -> user
-    b = SCAN_FROM_BLOCK
-    while b <= latest:
-        e = min(b + LOG_CHUNK - 1, latest)
-        for log in rpc("eth_getLogs", [{
-            "address": HYBRID_VAULT_FACTORY,
-            "topics": [VAULT_CREATED_TOPIC0],
-            "fromBlock": hex(b), "toBlock": hex(e),
-        }]):
-            user = to_checksum_address("0x" + log["topics"][1][26:])
-            vault = to_checksum_address("0x" + log["topics"][2][26:])
-            vaults[vault] = user
-        b = e + 1
+    print(f"# indexing VaultCreated events up to {latest}")
+
+    # Only blocks past the index cursor are fetched (see event_index.py)
+    db = event_index.connect()
+    event_index.sync(db, rpc,
+                     {"hybrid_vault_factory": [HYBRID_VAULT_FACTORY]})
+    vaults = dict(db.execute(                # vault -> user
+        "SELECT vault, user FROM vault_created ORDER BY block, log_index"))
 
     print(f"# {len(vaults)} HybridVault(s) discovered\n")
 
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Line-level gas profile of LT._calculate_values and of its replicas in the lending oracles
+(YBLendingOracle / YBLendingOracleLL._calculate_fresh_lv), run on forked mainnet markets.
+
+Each scenario (LT.deposit, LT.withdraw, YBLendingOracle.price_in_usd on both use_balances paths,
+YBLendingOracleLL.price_w) runs under boa's ProfilingGasMeter, which meters every pc. The
+executed trace is then folded onto source lines through each contract's pc -> AST source map,
+recursing into every call whose target boa knows as a Vyper contract. Per line it reports:
+  - gas spent on the line itself (children excluded) and how often the line was entered,
+  - SLOADs executed and the gas they cost (cold 2100 / warm 100),
+  - external calls made and the gas spent inside them,
+plus a per-function rollup and totals for the usual suspects: SLOAD, external calls, isqrt and
+mul_div_signed (with the snekmate _mul_div it wraps).
+
+profile() / profiled() / report() work on any boa call, so tests can use them too:
+
+    with profiled():
+        amm.exchange(0, 1, amount, 0)
+    print(report("AMM.exchange", profile(amm)))
+
+Config below; reads NETWORK from scripts/networks.py.
+Run: python scripts/gas_profile.py [report.json]
+"""
+import json
+import sys
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import boa
+from boa.contracts.vyper.ast_utils import get_fn_ancestor_from_node
+from boa.profiling import GlobalProfile, _SingleComputation
+from boa.vm.gas_meters import ProfilingGasMeter
+
+
+FACTORY = "0x370a449FeBb9411c95bf897021377fe0B7D100c0"
+MARKET_IDS = [3, 4, 5, 6]
+FORK_BLOCK = "latest"
+EMA_TIME = 866                       # YBLendingOracleLL factory default
+DEPOSIT_USD = 10_000                 # size of the profiled deposit, in crvUSD
+
+# Functions whose lines are printed in full; everything else only appears in the rollup
+FOCUS = ("_calculate_values", "_calculate_fresh_lv", "mul_div_signed", "_mul_div_signed", "_mul_div")
+
+SLOAD = 0x54
+CALLS = (0xF1, 0xF2, 0xF4, 0xFA)     # CALL, CALLCODE, DELEGATECALL, STATICCALL
+
+TAGS = {
+    "SLOAD": lambda row: row["sload_gas"],
+    "external calls": lambda row: row["call_gas"],
+    "isqrt": lambda row: row["gas"] if "isqrt(" in row["source"] else 0,
+    "mul_div_signed": lambda row: row["gas"] if row["fn"] in ("mul_div_signed", "_mul_div_signed", "_mul_div") else 0,
+}
+
+
+@contextmanager
+def profiled():
+    """Meter gas per pc for the calls made inside (needed by profile())."""
+    # boa also feeds every profiled call into its global profile, which the pytest plugin prints
+    # at session end: keep these calls out of it
+    saved = GlobalProfile._singleton
+    GlobalProfile.clear_singleton()
+    try:
+        with boa.env.gas_meter_class(ProfilingGasMeter):
+            yield
+    finally:
+        GlobalProfile._singleton = saved
+
+
+def profile(contract, computation=None, _rows=None):
+    """
+    Per-source-line gas of the last call to `contract` (or of `computation`), made under profiled().
+    @return list of rows (dicts) sorted by (path, line); `gas` excludes what the line's external
+            calls spent, that is `call_gas` (and, when the callee is a known Vyper contract, its
+            own lines)
+    """
+    computation = computation or contract._computation
+    rows = {} if _rows is None else _rows
+    by_pc = _SingleComputation(contract, computation).by_pc
+    code = computation.code._raw_code_bytes
+    source_map = contract.source_map["pc_raw_ast_map"]
+
+    # As in boa's own line profile, a pc belongs to the last source-mapped node executed before
+    # it, fixed at its first execution. The selector dispatch ahead of the first mapped node is
+    # booked on line 0 of the contract.
+    pc_row = {}
+    node = None
+    hits = Counter()
+    prev = None
+    for pc in computation.code._trace:
+        node = source_map.get(pc, node)
+        if pc not in pc_row:
+            if node is None:
+                path, line, fn, source = str(contract.compiler_data.contract_path), 0, "<dispatch>", ""
+            else:
+                path, line = node.module_node.resolved_path, node.lineno
+                fn = get_fn_ancestor_from_node(node)
+                fn = fn.name if fn else ""
+                source = node.full_source_code.splitlines()[line - 1].strip()
+            if (path, line) not in rows:
+                rows[(path, line)] = dict(path=path, line=line, fn=fn, source=source,
+                                          hits=0, gas=0, sload=0, sload_gas=0, calls=0, call_gas=0)
+            pc_row[pc] = rows[(path, line)]
+        row = pc_row[pc]
+        if row is not prev:
+            row["hits"] += 1
+            prev = row
+        hits[pc] += 1
+
+    # Gas as metered, before refunds (as in get_gas_used()). boa books a child's gas on the pc
+    # following its CALL, so call_gas is collected from every pc, not just the call opcodes.
+    for pc, n in hits.items():
+        row, datum, op = pc_row[pc], by_pc.get(pc), code[pc]
+        gas = datum.gas_used if datum else 0
+        row["gas"] += gas
+        row["call_gas"] += datum.child_gas_used if datum else 0
+        if op == SLOAD:
+            row["sload"] += n
+            row["sload_gas"] += gas
+        elif op in CALLS:
+            row["calls"] += n
+
+    for child in computation.children:
+        _profile_child(contract.env, child, rows)
+
+    if _rows is None:
+        return sorted(rows.values(), key=lambda r: (r["path"], r["line"]))
+
+
+def _profile_child(env, computation, rows):
+    target = env.lookup_contract(computation.msg.code_address)
+    if hasattr(target, "source_map"):
+        profile(target, computation, rows)
+    else:
+        # Black box (not loaded into boa): its gas stays on the calling line's call_gas
+        for child in computation.children:
+            _profile_child(env, child, rows)
+
+
+def summarize(rows):
+    """Per-function rollup and TAGS totals of profile() rows."""
+    functions = defaultdict(lambda: dict(gas=0, sload=0, sload_gas=0, calls=0, call_gas=0))
+    for row in rows:
+        f = functions[(row["path"], row["fn"])]
+        for k in f:
+            f[k] += row[k]
+    functions = [dict(path=path, fn=fn, **v) for (path, fn), v in functions.items()]
+    functions.sort(key=lambda f: -f["gas"])
+    tags = {name: sum(rule(row) for row in rows) for name, rule in TAGS.items()}
+    return functions, tags
+
+
+def report(title, rows, total=None, focus=FOCUS):
+    """Text report of profile() rows: tag totals, per-function rollup, focus functions line by line."""
+    functions, tags = summarize(rows)
+    own = sum(r["gas"] for r in rows)
+    total = total or own
+    out = [f"=== {title}: {total} gas ===", ""]
+    out += [f"  {name:<16} {gas:>9}  {100 * gas / total:5.1f}%" for name, gas in tags.items()]
+    out += ["", f"  {'function':<40} {'gas':>9} {'%':>6} {'sload':>6} {'sload_gas':>9} {'calls':>5} {'call_gas':>9}"]
+    for f in functions:
+        name = f"{f['path'].rsplit('/', 1)[-1]}:{f['fn'] or '-'}"
+        out.append(f"  {name:<40} {f['gas']:>9} {100 * f['gas'] / total:5.1f}% {f['sload']:>6} {f['sload_gas']:>9}"
+                   f" {f['calls']:>5} {f['call_gas']:>9}")
+    for f in functions:
+        if f["fn"] not in focus:
+            continue
+        out += ["", f"  --- {f['path']}:{f['fn']} ---",
+                f"  {'line':>5} {'gas':>8} {'hits':>5} {'sload':>5} {'sload_gas':>9} {'calls':>5} {'call_gas':>9}  source"]
+        for r in rows:
+            if r["path"] == f["path"] and r["fn"] == f["fn"] and (r["gas"] or r["call_gas"]):
+                out.append(f"  {r['line']:>5} {r['gas']:>8} {r['hits']:>5} {r['sload']:>5} {r['sload_gas']:>9}"
+                           f" {r['calls']:>5} {r['call_gas']:>9}  {r['source']}")
+    return "\n".join(out)
+
+
+def _scenarios(lt, oracle, ll, cryptopool, asset):
+    """(name, contract, call) for every profiled path of a market."""
+    user = boa.env.generate_address()
+    decimals = asset.decimals()
+    p_o = cryptopool.price_oracle()
+    amount = DEPOSIT_USD * 10**18 * 10**decimals // p_o
+    boa.deal(asset, user, amount)
+    with boa.env.prank(user):
+        asset.approve(lt.address, 2**256 - 1)
+
+    def deposit():
+        with boa.env.prank(user):
+            lt.deposit(amount, amount * p_o // 10**decimals, 0)
+
+    def withdraw():
+        with boa.env.prank(user):
+            lt.withdraw(lt.balanceOf(user), 0)
+
+    def ll_price_w():
+        boa.env.time_travel(3600)
+        ll.price_w()
+
+    return [
+        ("LT.deposit", lt, deposit),
+        ("LT.withdraw", lt, withdraw),
+        ("YBLendingOracle.price_in_usd", oracle, lambda: oracle.price_in_usd(lt.address)),
+        ("YBLendingOracle.price_in_usd(use_balances)", oracle, lambda: oracle.price_in_usd(lt.address, True)),
+        ("YBLendingOracleLL.price_w", ll, ll_price_w),
+    ]
+
+
+def main():
+    import compile_cache
+    from networks import NETWORK
+
+    compile_cache.install()
+    boa.fork(NETWORK, block_identifier=FORK_BLOCK)
+
+    factory = boa.load_partial("contracts/Factory.vy").at(FACTORY)
+    lt_deployer = boa.load_partial("contracts/LT.vy")
+    amm_deployer = boa.load_partial("contracts/AMM.vy")
+    pool_deployer = boa.load_partial("contracts/twocrypto_pool/contracts/main/Twocrypto.vy")
+    erc20 = boa.load_partial("contracts/testing/ERC20Mock.vy")
+    proxy_impl = boa.load("contracts/utils/YBPriceProxy.vy")
+    oracle = boa.load("contracts/utils/YBLendingOracle.vy", FACTORY, proxy_impl.address)
+    ll_deployer = boa.load_partial("contracts/utils/YBLendingOracleLL.vy")
+
+    results = {}
+    for market_id in MARKET_IDS:
+        market = factory.markets(market_id)
+        lt = lt_deployer.at(market.lt)
+        amm_deployer.at(market.amm)   # registered with boa so that its lines are profiled too
+        cryptopool = pool_deployer.at(market.cryptopool)
+        ll = ll_deployer.deploy()
+        ll.initialize(lt.address, True, EMA_TIME, FACTORY)
+        ll.price_w()   # seed the EMA: the profiled call is a regular update an hour later
+
+        for name, contract, call in _scenarios(lt, oracle, ll, cryptopool, erc20.at(market.asset_token)):
+            title = f"market {market_id} {name}"
+            with profiled():
+                call()
+            rows = profile(contract)
+            total = contract._computation.get_gas_used()
+            print(report(title, rows, total), end="\n\n")
+            functions, tags = summarize(rows)
+            results[title] = dict(total=total, tags=tags, functions=functions, lines=rows)
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Wrote {sys.argv[1]}")
+
+
+if __name__ == "__main__":
+    main()
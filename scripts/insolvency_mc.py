@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo insolvency / return-0 risk of 2x LT positions: the path-dependent counterpart of
+tests/lt/test_insolvency_boundary.py, which tabulates the boundaries one (A, p) scalar at a time.
+
+Thousands of correlated price paths (GBM + market-wide jumps, one asset per market) are pushed
+through a stylised model of the whole stack, vectorised over paths x markets with numpy:
+  * cryptopool - arbitraged to within its fee of the market price (the fee on the rebalancing volume
+    goes to D), EMA price_oracle with ma_time over the last price capped to [ps/2, 2*ps], and
+    the Twocrypto tweak_price repeg: price_scale steps towards price_oracle by
+    max(ADJUSTMENT_STEP, norm/5) whenever the virtual price stays above 1 + (xcp_profit - 1)/2.
+    The invariant is the normalised StableSwap of lp_oracle_2 (Ann = A * N**N / A_MULTIPLIER),
+    solved once per A into a lookup table (Curve).
+  * LEVAMM - float twin of AMM.get_x0 at the LP oracle price (CryptopoolLPOracle: 2*vp*sqrt(ps),
+    i.e. D per LP token), arbitraged against the LP's spot value up to the AMM fee. Arbs that
+    would leave the safe debt band moving away from 2x are skipped (the contract reverts them).
+    Debt accrues `rate`; the interest is donated back to the cryptopool, as
+    LT.distribute_borrower_fees does.
+  * LT - value_oracle / price_oracle in asset units and the _calculate_values admin fee split
+    with a constant staked fraction (staker losses approximated by the holders' high-water mark).
+
+Boundaries are read off the lending oracle's collateral valuation at the EMA price,
+coverage = collateral * lp_price * portfolio_value(A, clamp(po/ps)) / debt (2.0 at the start):
+insolvent below 1 (portfolio_value < 1/2 in the test's terms) and return-0 below 9/8 (< 9/16).
+
+Every (A, fee, rate) point of SWEEP runs in a process pool on the same random paths (common
+random numbers, so the differences between points are not noise). Per point it reports the
+distributions of LT value (asset units, 1.0 = tracked the asset exactly), LP value, time to each
+boundary and admin fee accrual, and writes all of it to OUT_CSV.
+
+    from scripts.insolvency_mc import Params, simulate
+    stats = simulate(Params(A=5 * 10**4, fee=0.013, rate=0.05), n_paths=1000)
+
+Config below. Run: python scripts/insolvency_mc.py [n_paths]
+"""
+import os
+import csv
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUT_CSV = os.path.join(HERE, "data", "insolvency_mc.csv")
+
+# Markets (one asset each) and their price process
+MARKETS = ["BTC", "ETH"]
+VOL = [0.55, 0.75]                     # annualised GBM volatility per asset
+CORR = [[1.0, 0.8], [0.8, 1.0]]        # correlation of the diffusion and of the jump sizes
+DRIFT = 0.0                            # annualised log drift (jump-compensated)
+JUMPS_PER_YEAR = 4.0                   # market-wide crash events (same instants in every market)
+JUMP_MEAN = -0.08                      # mean log jump size
+JUMP_VOL = 0.06                        # std of the log jump size
+
+# Cryptopool (as deployed by deploy_yb_pools_v3.py)
+POOL_FEE = 0.0146                      # mid_fee, charged on the arbitrage volume
+MA_TIME = 865                          # ma_exp_time, s
+ADJUSTMENT_STEP = 1e-10                # adjustment_step_min
+POOL_SHARE = 1.0                       # share of the pool LP held by the AMM (donations spread over the rest)
+
+# LT
+LEVERAGE = 2.0
+MIN_ADMIN_FEE = 0.1                    # Factory.min_admin_fee default
+STAKED = 0.5                           # staked fraction of LT supply
+
+# Simulation
+N_PATHS = 2000
+HORIZON_DAYS = 90
+DT = 900                               # s per step
+SEED = 1
+WORKERS = os.cpu_count()
+
+Params = namedtuple("Params", "A fee rate")   # pool A (A_true * 10**4), AMM fee, annual borrow rate
+SWEEP = {
+    "A": [2 * 10**4, 5 * 10**4, 15 * 10**4, 30 * 10**4],
+    "fee": [0.005, 0.013, 0.02],
+    "rate": [0.01, 0.05, 0.10],
+}
+
+A_MULTIPLIER = 10**4
+N_COINS = 2
+INSOLVENT = 1.0                        # coverage (collateral value / debt) boundaries
+RETURN0 = 9 / 8
+CLAMP = (0.5, 2.0)                     # po / ps as clamped by the pool
+YEAR = 365 * 86400
+
+
+class Curve:
+    """
+    Normalised (D = 1) two-coin StableSwap of lp_oracle_2, tabulated by marginal price:
+    x (asset, in price_scale units), y (stablecoin) and p = dy/dx along the curve.
+    """
+
+    def __init__(self, A, grid=8193):
+        ann = A * N_COINS**N_COINS / A_MULTIPLIER
+        x = np.exp(np.linspace(-20, 20, grid))
+        # Ann*(x + y) + 1 = Ann + 1/(4xy), solved for y (stable form of the positive root)
+        b = 4 * x * (ann * x + 1 - ann)
+        root = np.sqrt(b * b + 16 * ann * x)
+        y = np.where(b > 0, 2 / (b + root), (root - b) / (8 * ann * x))
+        p = (ann + 1 / (4 * x * x * y)) / (ann + 1 / (4 * x * y * y))
+        order = np.argsort(p)
+        self.log_p = np.log(p[order])
+        self.x, self.y = x[order], y[order]
+        self.log_r = np.log(self.x / self.y)[::-1]            # increasing, for at_ratio
+
+    def at(self, p):
+        """Point of the curve where the marginal price is p -> (x, y)."""
+        lp = np.log(p)
+        return np.interp(lp, self.log_p, self.x), np.interp(lp, self.log_p, self.y)
+
+    def at_ratio(self, r):
+        """Point of the curve with x / y == r -> (x, y)."""
+        lr = np.log(r)
+        return np.interp(lr, self.log_r, self.x[::-1]), np.interp(lr, self.log_r, self.y[::-1])
+
+    def portfolio_value(self, p):
+        """lp_oracle_2.portfolio_value(A, p) as a float: p * x + y at price p, 1.0 at p = 1."""
+        x, y = self.at(p)
+        return p * x + y
+
+
+def price_paths(rng, n_paths, n_steps, dt):
+    """Generator of per-step price multipliers, shape (n_paths, len(MARKETS))."""
+    chol = np.linalg.cholesky(np.array(CORR))
+    vol = np.array(VOL)
+    lam = JUMPS_PER_YEAR * dt / YEAR
+    compensator = JUMPS_PER_YEAR * (np.exp(JUMP_MEAN + JUMP_VOL**2 / 2) - 1)
+    drift = (DRIFT - vol**2 / 2 - compensator) * dt / YEAR
+    for _ in range(n_steps):
+        z = rng.standard_normal((n_paths, len(MARKETS))) @ chol.T
+        jumps = rng.poisson(lam, (n_paths, 1))
+        jz = rng.standard_normal((n_paths, len(MARKETS))) @ chol.T
+        yield np.exp(drift + vol * np.sqrt(dt / YEAR) * z + jumps * JUMP_MEAN + np.sqrt(jumps) * JUMP_VOL * jz)
+
+
+class LEVAMMFloat:
+    """AMM.get_x0 / exchange as floats (scripts/levamm.py is the integer-exact reference)."""
+
+    def __init__(self, fee, leverage=LEVERAGE):
+        self.fee = fee
+        self.value_denominator = 2 * leverage - 1
+        self.lev_ratio = leverage**2 / self.value_denominator**2
+        self.min_safe_debt = 1 / (4 * leverage**2)
+        self.max_safe_debt = self.value_denominator**2 / (4 * leverage**2) - 1 / (8 * leverage**2)
+
+    def get_x0(self, p_o, collateral, debt):
+        coll_value = p_o * collateral
+        disc = coll_value**2 - 4 * coll_value * self.lev_ratio * debt
+        return (coll_value + np.sqrt(np.maximum(disc, 0))) / (2 * self.lev_ratio)
+
+    def arbitrage(self, p_o, collateral, debt, price):
+        """
+        Trade the AMM until its price is within the fee of the external LP `price`.
+        -> (collateral, debt, traded) after the trade; skipped where the contract would revert.
+        """
+        x = self.get_x0(p_o, collateral, debt) - debt
+        k = x * collateral
+        p_amm = x / collateral
+        f = 1 - self.fee
+
+        # Arbitrageur sells collateral to the AMM (it borrows the stablecoin it pays out)
+        sell = p_amm * f > price
+        y_sell = np.sqrt(k * f / np.where(sell, price, 1))
+        out_sell = (x - k / y_sell) * f
+        # ... or buys collateral from it, repaying debt
+        buy = p_amm < price * f
+        x_buy = np.minimum(np.sqrt(k * price * f), x + debt)
+        out_buy = (collateral - k / x_buy) * f
+
+        new_coll = np.where(sell, y_sell, np.where(buy, collateral - out_buy, collateral))
+        new_debt = np.where(sell, debt + out_sell, np.where(buy, debt - (x_buy - x), debt))
+
+        before = debt / (p_o * collateral)
+        after = new_debt / (p_o * new_coll)
+        away = np.where(after < 0.5, after < before, after > before)     # away from the 2x equilibrium
+        unsafe = (after < self.min_safe_debt) | (after > self.max_safe_debt)
+        ok = (sell | buy) & ~(away & unsafe)
+        return np.where(ok, new_coll, collateral), np.where(ok, new_debt, debt), ok
+
+
+def _percentiles(a, qs=(5, 50, 95)):
+    return [float(v) for v in np.percentile(a, qs)] if len(a) else [float("nan")] * len(qs)
+
+
+def simulate(params, n_paths=N_PATHS, horizon_days=None, dt=None, seed=SEED):
+    """
+    One sweep point over n_paths paths -> flat dict of statistics (fractions, days, asset units),
+    per market plus "any" (first boundary hit in any market of a path).
+    """
+    horizon_days = horizon_days or HORIZON_DAYS
+    dt = dt or DT
+    rng = np.random.default_rng(seed)
+    n_steps = int(horizon_days * 86400 // dt)
+    shape = (n_paths, len(MARKETS))
+    curve = Curve(params.A)
+    amm = LEVAMMFloat(params.fee)
+    alpha = np.exp(-dt / MA_TIME)
+    growth = params.rate * dt / YEAR
+
+    # Everything normalised to 1 at the start: asset price, price_scale, D per LP token
+    S = np.ones(shape)
+    po = np.ones(shape)
+    ps = np.ones(shape)
+    D = np.ones(shape)
+    xcp_profit = np.ones(shape)
+    p_pool = np.ones(shape)                 # the pool's marginal price / price_scale
+    x, y = curve.at(p_pool)
+    collateral = np.ones(shape)
+    debt = np.full(shape, 1 - 1 / LEVERAGE)
+    value0 = amm.get_x0(D, collateral, debt) / amm.value_denominator     # asset units, po = 1
+    total = np.ones(shape)                  # holders' value (LT liquidity.total), relative to value0
+    admin = np.zeros(shape)
+    high_water = np.ones(shape)
+    f_a = 1 - (1 - MIN_ADMIN_FEE) * np.sqrt(1 - STAKED)
+
+    min_coverage = np.full(shape, 2.0)
+    hit = {"return0": np.full(shape, -1), "insolvent": np.full(shape, -1), "safe_band": np.full(shape, -1)}
+    arb_volume = np.zeros(shape)
+
+    for step, move in enumerate(price_paths(rng, n_paths, n_steps, dt)):
+        S *= move
+
+        # Cryptopool: arbitraged to within the fee of S, the fee on the rebalancing volume stays in the pool
+        p_pool = np.clip(p_pool, S / ps * (1 - POOL_FEE), S / ps / (1 - POOL_FEE))
+        x_new, y_new = curve.at(p_pool)
+        fees = POOL_FEE * np.abs(y_new - y) * D
+        xcp_profit *= 1 + fees / D
+        D += fees
+        x, y = x_new, y_new
+        po = po * alpha + np.clip(S, ps * CLAMP[0], ps * CLAMP[1]) * (1 - alpha)
+
+        # Repeg towards the oracle, if half the profit covers it
+        norm = np.abs(po / ps - 1)
+        adjust = np.maximum(ADJUSTMENT_STEP, norm / 5)
+        ps_new = np.where(norm > ADJUSTMENT_STEP, ps + (po - ps) * adjust / np.maximum(norm, 1e-300), ps)
+        x_re, y_re = curve.at_ratio(x / y * ps_new / ps)
+        D_re = y * D / y_re
+        repeg = D_re / np.sqrt(ps_new) > 1 + (xcp_profit - 1) / 2
+        ps_old = ps
+        ps = np.where(repeg, ps_new, ps)
+        D = np.where(repeg, D_re, D)
+        x, y = np.where(repeg, x_re, x), np.where(repeg, y_re, y)
+        p_pool = np.where(repeg, p_pool * ps_old / ps, p_pool)
+
+        # Interest accrues on the AMM debt and is donated back to the pool
+        interest = debt * growth
+        debt += interest
+        donation = interest * POOL_SHARE / collateral
+        xcp_profit *= 1 + donation / D
+        D += donation
+
+        # LEVAMM arbitrage at the LP oracle price (D per LP) against the LP's spot value
+        lp_spot = D * (S / ps * x + y)
+        collateral, new_debt, traded = amm.arbitrage(D, collateral, debt, lp_spot)
+        arb_volume += np.abs(new_debt - debt)
+        debt = new_debt
+
+        # LT value and the admin fee split (LT._calculate_values, staked >= MIN_STAKED_FOR_FEES)
+        cur = amm.get_x0(D, collateral, debt) / amm.value_denominator / po / value0
+        change = cur - (total + admin)
+        loss = np.maximum(high_water - total, 0)
+        repaid = np.clip(change, 0, loss)
+        use = np.where(change > 0, repaid + (change - repaid) * (1 - f_a), change)
+        admin += change - use
+        total = np.maximum(total + use, 0)
+        high_water = np.maximum(high_water, total)
+
+        # Boundaries, at the lending oracle's valuation
+        coverage = collateral * D * curve.portfolio_value(np.clip(po / ps, *CLAMP)) / debt
+        min_coverage = np.minimum(min_coverage, coverage)
+        q = debt / (D * collateral)
+        for name, crossed in (("return0", coverage < RETURN0), ("insolvent", coverage < INSOLVENT),
+                              ("safe_band", (q < amm.min_safe_debt) | (q > amm.max_safe_debt))):
+            hit[name] = np.where((hit[name] < 0) & crossed, step, hit[name])
+
+    days = dt / 86400
+    lp_value = D * (S / ps * x + y) / S           # LP token in asset units (1.0 at the start)
+    out = {"A": params.A, "fee": params.fee, "rate": params.rate, "paths": n_paths, "days": horizon_days}
+    for m, name in enumerate(MARKETS + ["any"]):
+        if name == "any":
+            cols = {k: np.where((v < 0).all(1), -1, np.where(v < 0, n_steps, v).min(1)) for k, v in hit.items()}
+            out["any_min_coverage_p1"] = float(np.percentile(min_coverage.min(1), 1))
+        else:
+            cols = {k: v[:, m] for k, v in hit.items()}
+            out.update(zip([f"{name}_lt_value_p{q}" for q in (5, 50, 95)], _percentiles(total[:, m])))
+            out.update(zip([f"{name}_lp_value_p{q}" for q in (5, 50, 95)], _percentiles(lp_value[:, m])))
+            out.update(zip([f"{name}_min_coverage_p{q}" for q in (1, 50)], _percentiles(min_coverage[:, m], (1, 50))))
+            out[f"{name}_admin_fee_mean"] = float(admin[:, m].mean())
+            out[f"{name}_admin_fee_p95"] = float(np.percentile(admin[:, m], 95))
+            out[f"{name}_arb_volume_mean"] = float(arb_volume[:, m].mean())
+        for k, v in cols.items():
+            t = v[v >= 0] * days
+            out[f"{name}_{k}_prob"] = float((v >= 0).mean())
+            out.update(zip([f"{name}_{k}_days_p{q}" for q in (5, 50)], _percentiles(t, (5, 50))))
+    return out
+
+
+def _run(args):
+    params, n_paths = args
+    return simulate(params, n_paths, HORIZON_DAYS, DT)
+
+
+def main():
+    from tqdm import tqdm
+
+    n_paths = int(sys.argv[1]) if len(sys.argv) > 1 else N_PATHS
+    grid = [Params(*p) for p in product(SWEEP["A"], SWEEP["fee"], SWEEP["rate"])]
+    print(f"{len(grid)} sweep points x {n_paths} paths x {len(MARKETS)} markets, "
+          f"{HORIZON_DAYS} days in {DT} s steps, {WORKERS} workers")
+
+    with ProcessPoolExecutor(WORKERS) as pool:
+        rows = list(tqdm(pool.map(_run, [(p, n_paths) for p in grid]), total=len(grid)))
+
+    os.makedirs(os.path.dirname(OUT_CSV), exist_ok=True)
+    with open(OUT_CSV, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+
+    print(f"\n{'A':>7} {'fee':>6} {'rate':>5} {'P(ret0)':>8} {'P(insolv)':>9} {'ret0 d50':>8} "
+          f"{'cov p1':>7} " + " ".join(f"{m + ' LT p5/p50':>16}" for m in MARKETS) + f" {'admin':>7}")
+    for r in rows:
+        lt = " ".join(f"{r[f'{m}_lt_value_p5']:>7.4f}/{r[f'{m}_lt_value_p50']:<8.4f}" for m in MARKETS)
+        admin = sum(r[f"{m}_admin_fee_mean"] for m in MARKETS) / len(MARKETS)
+        print(f"{r['A'] / A_MULTIPLIER:>7g} {r['fee']:>6g} {r['rate']:>5g} {r['any_return0_prob']:>8.2%} "
+              f"{r['any_insolvent_prob']:>9.2%} {r['any_return0_days_p50']:>8.1f} {r['any_min_coverage_p1']:>7.3f} "
+              f"{lt} {admin:>7.4f}")
+    print(f"\nWrote {OUT_CSV}")
+
+
+if __name__ == "__main__":
+    main()
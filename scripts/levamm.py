@@ -0,0 +1,338 @@
+"""
+Python reference of the LEVAMM math (contracts/AMM.vy) for bulk off-chain simulation.
+
+Integer-exact twin of AMM.get_x0 / get_dy / get_dx / get_p / value_oracle / _deposit / _withdraw
+and of the exchange() output + "Bad final state" check: same floor // and snekmate _ceil_div,
+same uint256 range (any step the EVM would revert on raises AMMRevert, with the contract's reason
+where it has one). The AMM state is passed in explicitly as State(p_o, collateral, debt) with
+`debt` already accrued (== AMM.get_debt()) and `p_o` the price oracle reading, so nothing here
+touches the chain.
+
+Two modes over the same math:
+  * scalar - LEVAMM.get_dy(i, j, dx, state) etc. on plain ints; raises AMMRevert like the EVM.
+  * batched - LEVAMM.get_dy_batch(i, j, dx, states) etc. over numpy object arrays (uint256-safe:
+    Python ints, no int64 wrap). Never raises per element; returns the results plus an `ok` mask
+    that is False wherever the contract would revert (those result slots are 0).
+
+Pinned to the contract by tests/amm/test_levamm_reference.py.
+
+    from scripts.levamm import LEVAMM, State
+    amm = LEVAMM(fee=int(0.007e18))
+    dy = amm.get_dy(0, 1, 10**18, State(p_o, collateral, debt))
+"""
+from math import isqrt
+from collections import namedtuple
+
+import numpy as np
+
+
+MAX_UINT256 = 2**256 - 1
+MAX_FEE = 10**17
+
+# Same field order as the contract's inputs: oracle price (1e18), collateral_amount, accrued debt.
+State = namedtuple("State", "p_o collateral debt")
+
+
+class AMMRevert(Exception):
+    """The call would revert on-chain (reason string as in AMM.vy where it has one)."""
+
+
+def _u(x):
+    # Every Vyper uint256 op is checked: underflow / overflow reverts.
+    if x < 0 or x > MAX_UINT256:
+        raise AMMRevert("uint256 out of range")
+    return x
+
+
+def _ceil_div(x, y):
+    # snekmate.utils.math._ceil_div
+    if y == 0:
+        raise AMMRevert("math: ceil_div division by zero")
+    return 0 if x == 0 else (x - 1) // y + 1
+
+
+_isqrt_batch = np.frompyfunc(isqrt, 1, 1)
+
+
+class _Batch:
+    """Per-element revert tracking for the batched mode: every check ANDs into `ok`, and
+    failing slots are replaced by a harmless value so the rest of the vector keeps going."""
+
+    def __init__(self, *args):
+        self.args = np.broadcast_arrays(*(np.asarray(a, dtype=object) for a in args))
+        self.ok = np.ones(self.args[0].shape, dtype=bool)
+
+    def require(self, cond):
+        self.ok &= np.asarray(cond, dtype=bool)
+
+    def u(self, x):
+        good = np.asarray((x >= 0) & (x <= MAX_UINT256), dtype=bool)
+        self.ok &= good
+        return np.where(good, x, 0)
+
+    def nonzero(self, x):
+        good = np.asarray(x != 0, dtype=bool)
+        self.ok &= good
+        return np.where(good, x, 1)
+
+    def ceil_div(self, x, y):
+        y = self.nonzero(y)
+        return np.where(x == 0, 0, (x - 1) // y + 1)
+
+    def out(self, x):
+        return np.where(self.ok, x, 0)
+
+
+class LEVAMM:
+    """
+    Immutables of one AMM.vy deployment (fee, LEVERAGE, collateral decimals) and its math.
+    Derived constants are computed exactly as in AMM.__init__.
+    """
+
+    def __init__(self, fee, leverage=2 * 10**18, collateral_decimals=18):
+        assert fee <= MAX_FEE, "Fee too high"
+        assert leverage > 10**18
+        self.fee = fee
+        self.leverage = leverage
+        self.collateral_precision = 10**(18 - collateral_decimals)
+
+        denominator = 2 * leverage - 10**18
+        self.value_denominator = denominator
+        self.lev_ratio = leverage**2 * 10**18 // denominator**2
+        # 1 / (4 * L**2)
+        self.min_safe_debt = 10**54 // (4 * leverage**2)
+        # (2 * L - 1)**2 / (4 * L**2) - 1 / (8 * L**2)
+        self.max_safe_debt = denominator**2 * 10**18 // (4 * leverage**2) - 10**54 // (8 * leverage**2)
+
+    @classmethod
+    def from_contract(cls, amm, collateral_decimals=18):
+        """Read fee + LEVERAGE from a deployed (or boa-loaded) AMM contract."""
+        return cls(amm.fee(), amm.LEVERAGE(), collateral_decimals)
+
+    # --- scalar mode -------------------------------------------------------------
+
+    def get_x0(self, p_oracle, collateral, debt, safe_limits=False):
+        coll_value = _u(_u(p_oracle * collateral) * self.collateral_precision) // 10**18
+
+        if safe_limits:
+            if debt < _u(coll_value * self.min_safe_debt) // 10**18:
+                raise AMMRevert("Unsafe min")
+            if debt > _u(coll_value * self.max_safe_debt) // 10**18:
+                raise AMMRevert("Unsafe max")
+
+        D = _u(_u(coll_value**2) - _u(_u(_u(4 * coll_value) * self.lev_ratio) // 10**18 * debt))
+        return _u(_u(coll_value + isqrt(D)) * 10**18) // (2 * self.lev_ratio)
+
+    def get_dy(self, i, j, in_amount, state):
+        assert (i == 0 and j == 1) or (i == 1 and j == 0)
+        p_o, collateral, debt = state
+        x_initial = _u(self.get_x0(p_o, collateral, debt) - debt)
+
+        if i == 0:  # Buy collateral
+            if in_amount > debt:
+                raise AMMRevert("Amount too large")
+            x = _u(x_initial + in_amount)
+            y = _ceil_div(_u(x_initial * collateral), x)
+            return _u(_u(collateral - y) * (10**18 - self.fee)) // 10**18
+
+        else:  # Sell collateral
+            y = _u(collateral + in_amount)
+            x = _ceil_div(_u(x_initial * collateral), y)
+            return _u(_u(x_initial - x) * (10**18 - self.fee)) // 10**18
+
+    def get_dx(self, i, j, out_amount, state):
+        assert (i == 0 and j == 1) or (i == 1 and j == 0)
+        p_o, collateral, debt = state
+        x_initial = _u(self.get_x0(p_o, collateral, debt) - debt)
+        gross = _ceil_div(_u(out_amount * 10**18), 10**18 - self.fee)
+
+        if i == 0:  # Buy collateral
+            if gross >= collateral:
+                raise AMMRevert("Amount too large")
+            in_amount = _u(_ceil_div(_u(x_initial * collateral), collateral - gross) - x_initial)
+            if in_amount > debt:
+                raise AMMRevert("Amount too large")
+            return in_amount
+
+        else:  # Sell collateral
+            if gross >= x_initial:
+                raise AMMRevert("Amount too large")
+            return _u(_ceil_div(_u(x_initial * collateral), x_initial - gross) - collateral)
+
+    def get_p(self, state):
+        p_o, collateral, debt = state
+        if collateral == 0:
+            raise AMMRevert("division by zero")
+        x_initial = _u(self.get_x0(p_o, collateral, debt) - debt)
+        return _u(x_initial * (10**18 // self.collateral_precision)) // collateral
+
+    def value_oracle(self, state):
+        """-> (p_o, value): AMM.value_oracle() / value_oracle_for(collateral, debt)."""
+        p_o, collateral, debt = state
+        return p_o, _u(self.get_x0(p_o, collateral, debt) * 10**18) // self.value_denominator
+
+    def deposit(self, state, d_collateral, d_debt):
+        """AMM._deposit -> (new State, value_after). Raises "Unsafe min/max" like the contract."""
+        p_o, collateral, debt = state
+        collateral = _u(collateral + d_collateral)
+        debt = _u(debt + d_debt)
+        value_after = _u(self.get_x0(p_o, collateral, debt, True) * 10**18) // self.value_denominator
+        return State(p_o, collateral, debt), value_after
+
+    def withdraw(self, state, frac):
+        """AMM._withdraw -> (new State, d_collateral, d_debt); the debt share rounds up."""
+        p_o, collateral, debt = state
+        d_collateral = _u(collateral * frac) // 10**18
+        d_debt = _ceil_div(_u(debt * frac), 10**18)
+        return State(p_o, _u(collateral - d_collateral), _u(debt - d_debt)), d_collateral, d_debt
+
+    def exchange(self, i, j, in_amount, state, min_out=0):
+        """
+        AMM.exchange -> (out_amount, new State), including the slippage check and the
+        asymmetric "Bad final state" guard. Interest accrual / fee collection are outside
+        the math (pass the already-accrued debt in `state`).
+        """
+        assert (i == 0 and j == 1) or (i == 1 and j == 0)
+        p_o, collateral, debt = state
+        if collateral == 0:
+            raise AMMRevert("Empty AMM")
+        x0 = self.get_x0(p_o, collateral, debt)
+        x_initial = _u(x0 - debt)
+
+        coll_vs_debt_before = self._coll_vs_debt(p_o, collateral, debt)
+
+        if i == 0:  # Trader buys collateral from us
+            x = _u(x_initial + in_amount)
+            y = _ceil_div(_u(x_initial * collateral), x)
+            out_amount = _u(_u(collateral - y) * (10**18 - self.fee)) // 10**18
+            if out_amount < min_out:
+                raise AMMRevert("Slippage")
+            debt = _u(debt - in_amount)
+            collateral = _u(collateral - out_amount)
+
+        else:  # Trader sells collateral to us
+            y = _u(collateral + in_amount)
+            x = _ceil_div(_u(x_initial * collateral), y)
+            out_amount = _u(_u(x_initial - x) * (10**18 - self.fee)) // 10**18
+            if out_amount < min_out:
+                raise AMMRevert("Slippage")
+            debt = _u(debt + out_amount)
+            collateral = y
+
+        coll_vs_debt_after = self._coll_vs_debt(p_o, collateral, debt)
+
+        # Relax the safe-limits check when the trade moved towards the 2x equilibrium
+        if coll_vs_debt_after > 2 * 10**18:
+            check_state = coll_vs_debt_before <= coll_vs_debt_after
+        else:
+            check_state = coll_vs_debt_before >= coll_vs_debt_after
+
+        if self.get_x0(p_o, collateral, debt, check_state) < x0:
+            raise AMMRevert("Bad final state")
+
+        return out_amount, State(p_o, collateral, debt)
+
+    def _coll_vs_debt(self, p_o, collateral, debt):
+        if debt == 0:
+            return MAX_UINT256
+        return _u(_u(p_o * collateral) * self.collateral_precision) // debt
+
+    # --- batched mode ------------------------------------------------------------
+    # Inputs broadcast against each other (scalars or array-likes of ints); results are numpy
+    # object arrays plus a bool `ok` mask (False == the contract would revert for that element).
+
+    def _x0_batch(self, b, p_o, collateral, debt, safe_limits=False):
+        coll_value = b.u(b.u(p_o * collateral) * self.collateral_precision) // 10**18
+        if safe_limits is not False:
+            safe = np.asarray(safe_limits, dtype=bool)
+            b.require(~safe | (debt >= b.u(coll_value * self.min_safe_debt) // 10**18))
+            b.require(~safe | (debt <= b.u(coll_value * self.max_safe_debt) // 10**18))
+        D = b.u(b.u(coll_value**2) - b.u(b.u(b.u(4 * coll_value) * self.lev_ratio) // 10**18 * debt))
+        return b.u(b.u(coll_value + _isqrt_batch(D)) * 10**18) // (2 * self.lev_ratio)
+
+    def get_x0_batch(self, p_oracle, collateral, debt, safe_limits=False):
+        b = _Batch(p_oracle, collateral, debt, safe_limits)
+        p_oracle, collateral, debt, safe_limits = b.args
+        x0 = self._x0_batch(b, p_oracle, collateral, debt, safe_limits)
+        return b.out(x0), b.ok
+
+    def get_dy_batch(self, i, j, in_amount, states):
+        assert (i == 0 and j == 1) or (i == 1 and j == 0)
+        b = _Batch(in_amount, *states)
+        in_amount, p_o, collateral, debt = b.args
+        x_initial = b.u(self._x0_batch(b, p_o, collateral, debt) - debt)
+        if i == 0:
+            b.require(in_amount <= debt)
+            x = b.u(x_initial + in_amount)
+            y = b.ceil_div(b.u(x_initial * collateral), x)
+            dy = b.u(b.u(collateral - y) * (10**18 - self.fee)) // 10**18
+        else:
+            y = b.u(collateral + in_amount)
+            x = b.ceil_div(b.u(x_initial * collateral), y)
+            dy = b.u(b.u(x_initial - x) * (10**18 - self.fee)) // 10**18
+        return b.out(dy), b.ok
+
+    def get_p_batch(self, states):
+        b = _Batch(*states)
+        p_o, collateral, debt = b.args
+        x_initial = b.u(self._x0_batch(b, p_o, collateral, debt) - debt)
+        p = b.u(x_initial * (10**18 // self.collateral_precision)) // b.nonzero(collateral)
+        return b.out(p), b.ok
+
+    def value_oracle_batch(self, states):
+        b = _Batch(*states)
+        p_o, collateral, debt = b.args
+        value = b.u(self._x0_batch(b, p_o, collateral, debt) * 10**18) // self.value_denominator
+        return b.out(value), b.ok
+
+    def deposit_batch(self, states, d_collateral, d_debt):
+        b = _Batch(d_collateral, d_debt, *states)
+        d_collateral, d_debt, p_o, collateral, debt = b.args
+        collateral = b.u(collateral + d_collateral)
+        debt = b.u(debt + d_debt)
+        value = b.u(self._x0_batch(b, p_o, collateral, debt, True) * 10**18) // self.value_denominator
+        return State(p_o, b.out(collateral), b.out(debt)), b.out(value), b.ok
+
+    def withdraw_batch(self, states, frac):
+        b = _Batch(frac, *states)
+        frac, p_o, collateral, debt = b.args
+        d_collateral = b.u(collateral * frac) // 10**18
+        d_debt = b.ceil_div(b.u(debt * frac), 10**18)
+        new = State(p_o, b.out(b.u(collateral - d_collateral)), b.out(b.u(debt - d_debt)))
+        return new, b.out(d_collateral), b.out(d_debt), b.ok
+
+    def exchange_batch(self, i, j, in_amount, states, min_out=0):
+        """Batched exchange(): -> (out_amount, new State, ok); ok folds in every revert
+        (empty AMM, slippage, uint256 range, "Bad final state")."""
+        assert (i == 0 and j == 1) or (i == 1 and j == 0)
+        b = _Batch(in_amount, min_out, *states)
+        in_amount, min_out, p_o, collateral, debt = b.args
+        b.require(collateral > 0)
+        x0 = self._x0_batch(b, p_o, collateral, debt)
+        x_initial = b.u(x0 - debt)
+        before = self._coll_vs_debt_batch(b, p_o, collateral, debt)
+
+        if i == 0:
+            x = b.u(x_initial + in_amount)
+            y = b.ceil_div(b.u(x_initial * collateral), x)
+            out_amount = b.u(b.u(collateral - y) * (10**18 - self.fee)) // 10**18
+            b.require(out_amount >= min_out)
+            debt = b.u(debt - in_amount)
+            collateral = b.u(collateral - out_amount)
+        else:
+            y = b.u(collateral + in_amount)
+            x = b.ceil_div(b.u(x_initial * collateral), y)
+            out_amount = b.u(b.u(x_initial - x) * (10**18 - self.fee)) // 10**18
+            b.require(out_amount >= min_out)
+            debt = b.u(debt + out_amount)
+            collateral = y
+
+        after = self._coll_vs_debt_batch(b, p_o, collateral, debt)
+        check_state = np.where(after > 2 * 10**18, before <= after, before >= after)
+        b.require(self._x0_batch(b, p_o, collateral, debt, check_state) >= x0)
+
+        return b.out(out_amount), State(p_o, b.out(collateral), b.out(debt)), b.ok
+
+    def _coll_vs_debt_batch(self, b, p_o, collateral, debt):
+        num = b.u(b.u(p_o * collateral) * self.collateral_precision)
+        return np.where(debt == 0, MAX_UINT256, num // np.where(debt == 0, 1, debt))
@@ -0,0 +1,122 @@
+"""
+Shared JSON-RPC client and concurrent eth_getLogs scanner for the read-only analytics scripts
+(scripts/voting/find_ve_voters.py, find_obsolete_gauge_voters.py, scripts/find_hybrid_weth_holder.py).
+
+    rpc = JsonRPC(NETWORK)                  # rpc(method, params) -> result, with retry/backoff
+    logs = get_logs(rpc, address, [TOPIC0], from_block, "latest")
+
+get_logs splits [from_block, to_block] into `chunk`-block ranges and keeps up to `workers` of
+them in flight at once. A range the node refuses as too big ("query returned more than 10000
+results", "block range is too large", ...) is split in half and both halves are requeued, so the
+chunk can be set for the common case and dense stretches take care of themselves. Transport
+failures, HTTP 429/5xx and rate-limit errors are retried with exponential backoff, never split.
+Logs come back in chain order (blockNumber, logIndex), whatever order the ranges completed in.
+
+Plain urllib + threads: no dependencies beyond the standard library.
+"""
+import json
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+LOG_CHUNK = 10_000      # mainnet-cluster eth_getLogs range limit
+WORKERS = 8
+
+# Responses worth retrying as-is. Checked first: a throttled request is never split, as that would
+# only double the request rate (Infura answers rate limits with -32005, the code of its range errors)
+RETRY_RE = re.compile(r"rate limit|request rate|too many requests|timeout|temporarily|try again|header not found", re.I)
+# Node responses explicitly about the size of the range or its result - split it rather than fail
+TOO_BIG_RE = re.compile(r"more than \d+ results|too many results|response size|block range|range is too (large|wide)", re.I)
+
+
+class RPCError(RuntimeError):
+    """JSON-RPC error response."""
+
+    def __init__(self, method, error):
+        self.error = error
+        super().__init__(f"RPC {method}: {error}")
+
+
+class JsonRPC:
+    """Callable JSON-RPC client: rpc(method, params) -> result. Thread-safe."""
+
+    def __init__(self, url, timeout=120, retries=6, backoff=0.5):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def _post(self, method, params):
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        r = json.loads(urllib.request.urlopen(req, timeout=self.timeout).read())
+        if r.get("error"):
+            raise RPCError(method, r["error"])
+        return r["result"]
+
+    def __call__(self, method, params):
+        for attempt in range(self.retries + 1):
+            try:
+                return self._post(method, params)
+            except urllib.error.HTTPError as e:
+                if (e.code != 429 and e.code < 500) or attempt == self.retries:
+                    raise
+            except RPCError as e:
+                error = str(e.error)
+                if not RETRY_RE.search(error) or attempt == self.retries:
+                    raise
+            except (urllib.error.URLError, TimeoutError, ConnectionError):
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.backoff * 2**attempt)
+
+
+def block_number(rpc, block):
+    """Resolve "latest"-style tags and hex strings to an int."""
+    if isinstance(block, int):
+        return block
+    if block.startswith("0x"):
+        return int(block, 16)
+    return int(rpc("eth_getBlockByNumber", [block, False])["number"], 16)
+
+
+def _fetch(rpc, address, topics, lo, hi):
+    try:
+        return rpc("eth_getLogs", [{"address": address, "topics": topics,
+                                    "fromBlock": hex(lo), "toBlock": hex(hi)}])
+    except RPCError as e:
+        error = str(e.error)
+        if lo < hi and not RETRY_RE.search(error) and TOO_BIG_RE.search(error):
+            return None
+        raise
+
+
+def get_logs(rpc, address, topics, from_block, to_block="latest", chunk=LOG_CHUNK, workers=WORKERS):
+    """
+    All logs of `address` (one or a list) matching `topics` (eth_getLogs topic filter: per position
+    None, a topic or a list of alternatives) in [from_block, to_block], in chain order.
+    """
+    lo, hi = block_number(rpc, from_block), block_number(rpc, to_block)
+    ranges = [(b, min(b + chunk - 1, hi)) for b in range(lo, hi + 1, chunk)]
+    logs = []
+    with ThreadPoolExecutor(workers) as pool:
+        pending = {pool.submit(_fetch, rpc, address, topics, *r): r for r in ranges}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                a, b = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    mid = (a + b) // 2
+                    for r in ((a, mid), (mid + 1, b)):
+                        pending[pool.submit(_fetch, rpc, address, topics, *r)] = r
+                else:
+                    logs += result
+    logs.sort(key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+    return logs
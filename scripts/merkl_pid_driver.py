@@ -0,0 +1,103 @@
+"""
+Python reference of MerklPIDDriver.preview_target_apr (contracts/net_pressure/MerklPIDDriver.vy).
+
+Bit-for-bit port of the on-chain step: the same 1e18 fixed point and the same EVM integer
+semantics - signed `//` truncates toward zero (sdiv), not Python's floor - so (target_apr,
+integral, prev_pressure, d_pressure) come out identical to the view for identical inputs.
+Anything the contract would revert on (half_tvl == 0 -> "No pools", int256/uint256 range,
+division by zero) raises DriverRevert instead.
+
+The step is a pure function of the driver's gains (Params), its live inputs (RawSignals, as
+returned by raw_signals()) and the caller-held PID state, so a whole export can be replayed
+locally from one batched read of (params, raw_signals, sink TVL) per row - see
+scripts/model_apr_from_export.py. Pinned to the contract by
+tests/net_pressure/test_merkl_pid_driver.py.
+"""
+from collections import namedtuple
+
+
+PRECISION = 10**18
+SECONDS_PER_YEAR = 365 * 86400
+
+MAX_UINT256 = 2**256 - 1
+MIN_INT256 = -2**255
+MAX_INT256 = 2**255 - 1
+
+# Field order matches the Vyper structs / set_gains(...) args: build straight from a boa return
+# (`RawSignals(*driver.raw_signals())`) or from decoded eth_call words.
+RawSignals = namedtuple("RawSignals", "pressure half_tvl market_rate")
+AprState = namedtuple("AprState", "target_apr integral prev_pressure d_pressure pressure sink")
+Params = namedtuple("Params", "feedforward_gain kp ki kd max_integral sink_cap dead_band sink_per_offer d_filter_time")
+
+# Params getters on the driver, in Params order; all return a single 32-byte word.
+PARAM_TYPES = ["int256", "int256", "int256", "int256", "int256", "int256", "uint256", "uint256", "uint256"]
+
+
+class DriverRevert(Exception):
+    """The view would revert on-chain for these inputs."""
+
+
+def _i(x):
+    if x < MIN_INT256 or x > MAX_INT256:
+        raise DriverRevert("int256 out of range")
+    return x
+
+
+def _u(x):
+    if x < 0 or x > MAX_UINT256:
+        raise DriverRevert("uint256 out of range")
+    return x
+
+
+def _sdiv(a, b):
+    """EVM signed division: truncate toward zero (Python // floors)."""
+    if b == 0:
+        raise DriverRevert("division by zero")
+    q = abs(a) // abs(b)
+    return _i(q if (a < 0) == (b < 0) else -q)
+
+
+def read_params(driver):
+    """Current gains of a deployed (or boa-loaded) driver."""
+    return Params(*(getattr(driver, n)() for n in Params._fields))
+
+
+def preview_target_apr(params, signals, sink_tvl, integral_in, prev_pressure_in, d_pressure_in, dt):
+    """
+    One stateless PID step, exactly as MerklPIDDriver.preview_target_apr computes it.
+    @param params Params (the driver's gains at the block being replayed)
+    @param signals RawSignals (pressure, half_tvl, market_rate) at that block
+    @return AprState(target_apr, integral, prev_pressure, d_pressure, pressure, sink)
+    """
+    pressure, half_tvl, market_rate = signals
+    if half_tvl == 0:
+        raise DriverRevert("No pools")
+
+    sink = _u(sink_tvl * PRECISION) // half_tvl
+
+    dt_years = _i(_u(dt * PRECISION) // SECONDS_PER_YEAR)
+    error = _i(_i(pressure) - _i(sink))
+
+    integral = _i(integral_in + _sdiv(_i(error * dt_years), PRECISION))
+    integral = max(0, min(integral, params.max_integral))
+
+    # Filtered derivative (Astrom discrete form): d[k] = (Tf*d[k-1] + dp) / (Tf + dt)
+    tf_years = _i(_u(params.d_filter_time * PRECISION) // SECONDS_PER_YEAR)
+    dp = _i(_i(pressure) - _i(prev_pressure_in))
+    d_pressure = _sdiv(_i(_i(_sdiv(_i(tf_years * d_pressure_in), PRECISION) + dp) * PRECISION),
+                       _i(tf_years + dt_years))
+
+    target = _i(_i(_i(_sdiv(_i(params.feedforward_gain * pressure), PRECISION)
+                      + _sdiv(_i(params.kp * error), PRECISION))
+                   + _sdiv(_i(params.ki * integral), PRECISION))
+                + _sdiv(_i(params.kd * max(0, d_pressure)), PRECISION))
+    target = min(target, params.sink_cap)
+
+    offer_signed = _i(_i(params.dead_band) + _sdiv(_i(target * PRECISION), _i(params.sink_per_offer)))
+    offer_multiple = max(offer_signed, PRECISION)
+    target_apr = 0
+    if offer_multiple > PRECISION:
+        target_apr = _u((offer_multiple - PRECISION) * market_rate) // PRECISION
+
+    return AprState(target_apr=target_apr, integral=integral, prev_pressure=pressure,
+                    d_pressure=d_pressure, pressure=pressure, sink=sink)
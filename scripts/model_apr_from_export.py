@@ -7,29 +7,32 @@ The export (scripts/data/ybExport.tsv) is what Merkl persisted stepping the PID
 each window it measured the sink TVL, read pressure/market live, and called preview_target_apr,
 saving the returned (integral, prev_pressure, d_pressure). This script reconstructs that loop:
 
-  - map each window_end_ts to the on-chain block that was head at that time (binary search),
-  - read the driver at that historical block via eth_call, so preview_target_apr sees the same
-    pressure / half-TVL / market rate Merkl saw,
-  - measure the sink as the FULL pool TVL (totalSupply * get_virtual_price), not just staked,
-  - carry (integral, prev_pressure, d_pressure) forward step to step (closed loop),
+  - map each window_end_ts to the on-chain block that was head at that time (block_index.py),
+  - read, at each of those historical blocks, what preview_target_apr would see there: the raw
+    signals (pressure / half-TVL / market rate), the driver's gains, and the sink measured as the
+    FULL pool TVL (totalSupply * get_virtual_price), not just staked,
+  - step the bit-exact Python twin of preview_target_apr (scripts/merkl_pid_driver.py) locally,
+    carrying (integral, prev_pressure, d_pressure) forward step to step (closed loop),
 
 then diff the computed state against the TSV row. dt for each step is the wall gap between
 consecutive windows; the first step is the clean-slate connect (dt=0, prev_pressure=pressure).
 
-No forks: every read is a raw eth_call pinned to the row's block, and the two co-located sink
-reads (plus raw_signals on the connect step) are batched through Multicall3 in a single call.
-preview_target_apr is the one dependent call per block - its sink_tvl argument comes from the
-multicall result - so it follows as a second eth_call at the same block.
+No forks: every read is a raw eth_call pinned to the row's block, and all of them are independent
+(the PID state no longer has to round-trip through the chain), so the whole export is one
+fetch_multi of per-block Multicall3 batches. The closed loop itself costs no RPC.
 
     python scripts/model_apr_from_export.py [path/to/ybExport.tsv] [max_rows]
 """
 import os
 import sys
 import json
-from boa.rpc import EthereumRPC
 from eth_abi import encode as abi_encode, decode as abi_decode
 from eth_utils import keccak
 
+from block_index import BlockIndex
+from merkl_pid_driver import PARAM_TYPES, Params, RawSignals, preview_target_apr
+from rpc_cache import CachedRPC
+
 HERE = os.path.dirname(os.path.abspath(__file__))
 DEPLOY_JSON = os.path.join(HERE, "merkl_pid_deployment.json")
 DEFAULT_TSV = os.path.join(HERE, "data", "ybExport.tsv")
@@ -45,9 +48,8 @@ def _sel(sig):
 SEL_TOTAL_SUPPLY = _sel("totalSupply()")
 SEL_VIRTUAL_PRICE = _sel("get_virtual_price()")
 SEL_RAW_SIGNALS = _sel("raw_signals()")                                              # -> (pressure, half_tvl, market_rate)
-SEL_PREVIEW = _sel("preview_target_apr(uint256,int256,uint256,int256,uint256)")      # -> AprState
+SEL_PARAMS = [_sel(f"{name}()") for name in Params._fields]                         # gains, in Params order
 SEL_AGGREGATE = _sel("aggregate((address,bytes)[])")                                 # Multicall3 -> (blockNumber, bytes[])
-APR_STATE_TYPES = ["uint256", "int256", "uint256", "int256", "uint256", "uint256"]   # target_apr, integral, prev_pressure, d_pressure, pressure, sink
 
 
 def _int(cell):
@@ -82,57 +84,31 @@ def main():
     cfg = json.load(open(DEPLOY_JSON))
     driver = cfg["merkl_pid_driver"]
     sink = cfg["sink_lp"]
-    rpc = EthereumRPC(cfg["network"])
-
-    def eth_call(to, data, block):
-        return bytes.fromhex(rpc.fetch("eth_call", [{"to": to, "data": "0x" + data.hex()}, block])[2:])
-
-    def multicall(calls, block):
-        """calls: list of (target, calldata_bytes) -> list of return-bytes, all at `block`."""
-        payload = SEL_AGGREGATE + abi_encode(["(address,bytes)[]"], [calls])
-        _, rets = abi_decode(["uint256", "bytes[]"], eth_call(MULTICALL3, payload, block))
-        return rets
-
-    # --- timestamp -> block mapping (floor: largest block with ts <= target) ---
-    ts_cache = {}
-
-    def block_ts(n):
-        if n not in ts_cache:
-            ts_cache[n] = int(rpc.fetch("eth_getBlockByNumber", [hex(n), False])["timestamp"], 16)
-        return ts_cache[n]
-
-    head_n = int(rpc.fetch("eth_getBlockByNumber", ["latest", False])["number"], 16)
-
-    first_ts = rows[0]["window_end_ts"]
-    lo = head_n
-    step = 1024
-    while block_ts(lo) > first_ts:
-        lo = max(0, lo - step)
-        step *= 2
-
-    def block_at(target, lo):
-        # Expand hi from lo (windows are ~140 blocks apart) instead of searching to head_n.
-        hi = min(lo + 256, head_n)
-        span = 256
-        while hi < head_n and block_ts(hi) <= target:
-            lo, span = hi, span * 2
-            hi = min(hi + span, head_n)
-        while lo < hi:
-            mid = (lo + hi + 1) // 2
-            if block_ts(mid) <= target:
-                lo = mid
-            else:
-                hi = mid - 1
-        return lo
-
-    search_lo = lo
-    for r in rows:
-        r["block"] = block_at(r["window_end_ts"], search_lo)
-        search_lo = r["block"]
+    rpc = CachedRPC(cfg["network"])   # block-pinned reads come from .cache/rpc.sqlite after the first run
+
+    def agg_payload(calls, block):
+        data = SEL_AGGREGATE + abi_encode(["(address,bytes)[]"], [calls])
+        return ("eth_call", [{"to": MULTICALL3, "data": "0x" + data.hex()}, block])
+
+    # --- timestamp -> block mapping (floor: largest block with ts <= target), from the persistent index ---
+    index = BlockIndex(rpc)
+    head_n = index.head
+    for r, block in zip(rows, index.blocks_at([r["window_end_ts"] for r in rows])):
+        r["block"] = block
     print(f"Mapped {len(rows)} windows to blocks "
           f"[{rows[0]['block']} .. {rows[-1]['block']}], head {head_n}")
 
-    # --- closed-loop replay through the on-chain step ---
+    # --- one batched read: sink TVL + raw signals + gains at every row's block ---
+    calls = [(sink, SEL_TOTAL_SUPPLY), (sink, SEL_VIRTUAL_PRICE), (driver, SEL_RAW_SIGNALS)]
+    calls += [(driver, sel) for sel in SEL_PARAMS]
+    reads = rpc.fetch_multi([agg_payload(calls, hex(r["block"])) for r in rows])
+    for r, ret in zip(rows, reads):
+        _, rets = abi_decode(["uint256", "bytes[]"], bytes.fromhex(ret[2:]))
+        r["sink_tvl"] = int.from_bytes(rets[0], "big") * int.from_bytes(rets[1], "big") // 10**18
+        r["signals"] = RawSignals(*abi_decode(["uint256", "uint256", "uint256"], rets[2]))
+        r["params"] = Params(*(abi_decode([t], v)[0] for t, v in zip(PARAM_TYPES, rets[3:])))
+
+    # --- closed-loop replay through the Python twin of the on-chain step ---
     integral = 0
     prev_pressure = 0
     d_pressure = 0
@@ -145,24 +121,12 @@ def main():
     max_err = {"prev_pressure": 0, "d_pressure": 0, "integral": 0}
 
     for r in rows:
-        blk = hex(r["block"])
         dt = 0 if prev_ts is None else r["window_end_ts"] - prev_ts
-
-        # Batch the co-located reads at this block: sink TVL, plus raw_signals on the connect step.
-        calls = [(sink, SEL_TOTAL_SUPPLY), (sink, SEL_VIRTUAL_PRICE)]
-        if prev_ts is None:
-            calls.append((driver, SEL_RAW_SIGNALS))
-        rets = multicall(calls, blk)
-        sink_tvl = int.from_bytes(rets[0], "big") * int.from_bytes(rets[1], "big") // 10**18
         # Clean-slate connect on the first step: prev_pressure_in = measured pressure.
-        pp_in = abi_decode(["uint256", "uint256", "uint256"], rets[2])[0] if prev_ts is None else prev_pressure
-
-        # Dependent call (needs sink_tvl from the multicall), so it follows at the same block.
-        preview_data = SEL_PREVIEW + abi_encode(
-            ["uint256", "int256", "uint256", "int256", "uint256"],
-            [sink_tvl, integral, pp_in, d_pressure, dt])
-        target_apr, integral, prev_pressure, d_pressure, _p, _sink = abi_decode(
-            APR_STATE_TYPES, eth_call(driver, preview_data, blk))
+        pp_in = r["signals"].pressure if prev_ts is None else prev_pressure
+
+        target_apr, integral, prev_pressure, d_pressure, _p, _sink = preview_target_apr(
+            r["params"], r["signals"], r["sink_tvl"], integral, pp_in, d_pressure, dt)
 
         prev_ts = r["window_end_ts"]
 
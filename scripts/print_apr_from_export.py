@@ -23,10 +23,12 @@ next to the clean-slate number from print_initial_apr.py.
 import os
 import sys
 import json
-from boa.rpc import EthereumRPC
 from eth_abi import encode as abi_encode, decode as abi_decode
 from eth_utils import keccak
 
+from block_index import BlockIndex
+from rpc_cache import CachedRPC
+
 HERE = os.path.dirname(os.path.abspath(__file__))
 DEPLOY_JSON = os.path.join(HERE, "merkl_pid_deployment.json")
 DEFAULT_TSV = os.path.join(HERE, "data", "ybExport.tsv")
@@ -85,7 +87,7 @@ def main():
     cfg = json.load(open(DEPLOY_JSON))
     driver = cfg["merkl_pid_driver"]
     sink = cfg["sink_lp"]
-    rpc = EthereumRPC(cfg["network"])
+    rpc = CachedRPC(cfg["network"])   # block-pinned reads come from .cache/rpc.sqlite after the first run
 
     def eth_call(to, data, block):
         return bytes.fromhex(rpc.fetch("eth_call", [{"to": to, "data": "0x" + data.hex()}, block])[2:])
@@ -95,43 +97,11 @@ def main():
         payloads = [("eth_call", [{"to": to, "data": "0x" + data.hex()}, block]) for to, data, block in items]
         return [bytes.fromhex(r[2:]) for r in rpc.fetch_multi(payloads)]
 
-    # --- timestamp -> block mapping (floor: largest block with ts <= target) ---
-    ts_cache = {}
-
-    def block_ts(n):
-        if n not in ts_cache:
-            ts_cache[n] = int(rpc.fetch("eth_getBlockByNumber", [hex(n), False])["timestamp"], 16)
-        return ts_cache[n]
-
-    head = rpc.fetch("eth_getBlockByNumber", ["latest", False])
-    head_n = int(head["number"], 16)
-    head_ts = int(head["timestamp"], 16)
-
-    first_ts = rows[0]["window_end_ts"]
-    lo = head_n
-    step = 1024
-    while block_ts(lo) > first_ts:
-        lo = max(0, lo - step)
-        step *= 2
-
-    def block_at(target, lo):
-        hi = min(lo + 256, head_n)
-        span = 256
-        while hi < head_n and block_ts(hi) <= target:
-            lo, span = hi, span * 2
-            hi = min(hi + span, head_n)
-        while lo < hi:
-            mid = (lo + hi + 1) // 2
-            if block_ts(mid) <= target:
-                lo = mid
-            else:
-                hi = mid - 1
-        return lo
-
-    search_lo = lo
-    for r in rows:
-        r["block"] = block_at(r["window_end_ts"], search_lo)
-        search_lo = r["block"]
+    # --- timestamp -> block mapping (floor: largest block with ts <= target), from the persistent index ---
+    index = BlockIndex(rpc)
+    head_n, head_ts = index.head, index.head_ts
+    for r, block in zip(rows, index.blocks_at([r["window_end_ts"] for r in rows])):
+        r["block"] = block
 
     # --- Round 1 (batched): sink TVL + market rate + measured pressure at each row's block ---
     reads = batch_eth_call([
@@ -0,0 +1,113 @@
+"""
+Disk cache of block-pinned RPC reads for the historical scans (scan_conversion_discount.py,
+model_apr_from_export.py, print_apr_from_export.py).
+
+An eth_call at a fixed past block always returns the same bytes, yet every rerun of a scan - or
+every point of a parameter sweep, like MULTIPLIER in the discount scan - fetched them all again.
+CachedRPC is a drop-in boa EthereumRPC whose fetch / fetch_multi answer such reads from disk and
+only send the misses (still as one batch):
+
+    rpc = CachedRPC(NETWORK)              # instead of EthereumRPC(NETWORK)
+    rpc.fetch_multi(payloads)             # second run: zero RPC
+
+Entries are content-addressed: sha256 of (chain id, method, params) - for an eth_call that is
+(chain id, block, to, calldata). Only reads pinned to a block number are cached (eth_call,
+eth_getCode, eth_getBalance, eth_getStorageAt, eth_getBlockByNumber), and only once that block
+is CONFIRMATIONS deep: "latest" and the reorg-prone tail always go to the node. Errors are never
+cached.
+
+The cache is an SQLite file in .cache/rpc.sqlite at the repo root; YB_RPC_CACHE overrides the
+location, an empty value disables it.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from boa.rpc import EthereumRPC
+
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / ".cache" / "rpc.sqlite"
+CONFIRMATIONS = 64
+# Cacheable methods -> position of their block parameter
+PINNED = {"eth_call": 1, "eth_getCode": 1, "eth_getBalance": 1, "eth_getStorageAt": 2, "eth_getBlockByNumber": 0}
+
+
+def _path():
+    path = os.environ.get("YB_RPC_CACHE")
+    return DEFAULT_PATH if path is None else (Path(path) if path else None)
+
+
+class CachedRPC(EthereumRPC):
+    """EthereumRPC with a disk cache of block-pinned reads. Thread-safe."""
+
+    def __init__(self, url, path=None):
+        super().__init__(url)
+        path = path or _path()
+        self._db = None
+        self._lock = threading.Lock()
+        self._chain_id = None
+        self._safe = None           # highest block CONFIRMATIONS deep
+        self.hits = self.misses = 0
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS rpc (key TEXT PRIMARY KEY, result TEXT)")
+
+    def _pinned(self, block):
+        if not (isinstance(block, str) and block.startswith("0x")):
+            return False            # "latest", "safe", block hash objects...
+        if self._safe is None:     # once: the scripts are short-lived, a stale head only caches less
+            self._safe = int(super().fetch("eth_blockNumber", []), 16) - CONFIRMATIONS
+        return int(block, 16) <= self._safe
+
+    def _key(self, method, params):
+        if self._db is None or method not in PINNED or len(params) <= PINNED[method]:
+            return None
+        if not self._pinned(params[PINNED[method]]):
+            return None
+        if self._chain_id is None:
+            self._chain_id = int(super().fetch("eth_chainId", []), 16)
+        # Hex is case-insensitive: lower-case the lot so that checksummed and plain addresses hit alike
+        text = json.dumps([self._chain_id, method, params], sort_keys=True, separators=(",", ":")).lower()
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _get(self, keys):
+        keys = [k for k in keys if k]
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):   # SQLite host-parameter limit
+                chunk = keys[i:i + 500]
+                q = f"SELECT key, result FROM rpc WHERE key IN ({', '.join('?' * len(chunk))})"
+                found.update((k, json.loads(r)) for k, r in self._db.execute(q, chunk))
+        return found
+
+    def _put(self, items):
+        if items:
+            with self._lock, self._db:
+                self._db.executemany("INSERT OR REPLACE INTO rpc VALUES (?, ?)",
+                                     [(k, json.dumps(r)) for k, r in items])
+
+    def fetch(self, method, params):
+        return self.fetch_multi([(method, params)])[0]
+
+    def fetch_multi(self, payloads):
+        keys = [self._key(method, params) for method, params in payloads]
+        found = self._get(keys) if self._db is not None else {}
+        missing = [i for i, k in enumerate(keys) if k not in found]
+        self.hits += len(payloads) - len(missing)
+        self.misses += len(missing)
+        if not missing:
+            return [found[k] for k in keys]
+
+        if len(missing) == 1:       # as a plain request: some providers refuse batches for some methods
+            fetched = [super().fetch(*payloads[missing[0]])]
+        else:
+            fetched = super().fetch_multi([payloads[i] for i in missing])
+        results = [found.get(k) for k in keys]
+        for i, result in zip(missing, fetched):
+            results[i] = result
+        self._put([(keys[i], results[i]) for i in missing if keys[i]])
+        return results
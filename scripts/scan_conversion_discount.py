@@ -11,9 +11,18 @@ so the risk is: during a fast BTC drop the EMA lags above spot and the executabl
 than MULTIPLIER*fee below it -> the swap can't meet min_dy. This samples every pool over its full
 life and, per block, compares the true executable price (get_dy) to that floor. Reads are batched:
 one Multicall3.aggregate3 per block (all live pools x {price_oracle, fee, get_dy, balances}),
-fetch_multi'd. Each pool is scanned from its OWN deployment block (found by binary search; several
-LT markets share one cryptopool, so pools are de-duped), and only blocks where the pool TVL >=
-MIN_TVL (past the thin post-launch period) and the probe swap is a tiny fraction of it are counted.
+fetch_multi'd CHUNK blocks at a time with PARALLEL batches in flight, and every batch is decoded and
+appended to OUT_CSV as it lands (memory stays flat; a long scan is bound by node throughput, not
+round trips). Each pool is scanned from its OWN deployment block (cached by deploy_index.py;
+several LT markets share one cryptopool, so pools are de-duped), and only blocks where the pool
+TVL >= MIN_TVL (past the thin post-launch period) and the probe swap is a tiny fraction of it are
+counted.
+
+Sampling is coarse-to-fine: a uniform pass every STEP blocks, then (ADAPTIVE) the gaps where a
+pool's req_mult or oracle-vs-spot gap moves sharply, and the gaps around each pool's worst
+sample, are bisected round by round down to single blocks. The worst case is thus pinned to the
+exact block for a fraction of the calls a fine uniform grid would take; a spike that starts and
+ends between two calm coarse samples can still slip through, so STEP bounds what is caught.
 
 Two numbers per pool:
   * actual on-chain result - does the contract's min_dy bind? NOTE the contract multiplies
@@ -32,19 +41,27 @@ import csv
 import json
 import tempfile
 import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from itertools import islice
 import boa
-from boa.rpc import EthereumRPC
 from eth_abi import encode, decode
 from eth_utils import keccak
 from tqdm import tqdm
 
+import compile_cache
+import deploy_index
+from log_scanner import JsonRPC
+from rpc_cache import CachedRPC
+
 HERE = os.path.dirname(os.path.abspath(__file__))
 REPO = os.path.dirname(HERE)
 _spec = importlib.util.spec_from_file_location("_n", os.path.join(HERE, "networks.py"))
 _m = importlib.util.module_from_spec(_spec)
 _spec.loader.exec_module(_m)
 NETWORK = _m.NETWORK
+compile_cache.install()
 
 FACTORY = "0x370a449FeBb9411c95bf897021377fe0B7D100c0"
 CRVUSD = "0xf939E0A03FB07F59A73314E73794Be0E57ac1b4E"
@@ -59,11 +76,14 @@ TARGET_NOTIONAL = 1_000                # probe swap size in crvUSD - kept tiny v
 MIN_TVL = 1_000_000                    # skip blocks where pool TVL < this ($): too close to launch / too thin
 MAX_DX_FRAC = 0.005                    # and require the probe swap to be < this fraction of the pool
 
-FLOOR_BLOCK = 22_000_000               # binary-search floor for a pool's deploy block (node serves past this)
 MAX_LOOKBACK_DAYS = None               # cap history per pool (None = from each pool's deployment block)
 BLOCKS_PER_DAY = 7200
 STEP = 300                             # sample every STEP blocks (~1h); lower = catches shorter spikes
+ADAPTIVE = True                        # then bisect STEP gaps where things move, down to single blocks
+REFINE_MULT = 0.25                     # ... where req_mult changes by more than this between neighbours
+REFINE_GAP_BP = 5                      # ... or the oracle-vs-spot gap by more than this (bp)
 CHUNK = 500                            # per-block multicalls per JSON-RPC batch
+PARALLEL = 4                           # JSON-RPC batches in flight at once
 OUT_CSV = os.path.join(tempfile.gettempdir(), "conversion_discount_scan.csv")
 
 SEL_PO = keccak(text="price_oracle()")[:4]
@@ -97,27 +117,6 @@ def _fetch_chunk(rpc, payloads):
         return out
 
 
-def _has_code(rpc, addr, block):
-    try:
-        return len(rpc.fetch("eth_getCode", [addr, hex(block)])) > 2
-    except Exception:
-        return None                       # block not served
-
-
-def _deploy_block(rpc, addr, lo, hi):
-    """Smallest block in [lo, hi] where addr has code (binary search; addr has code at hi)."""
-    if _has_code(rpc, addr, lo):
-        return lo
-    while lo < hi:
-        mid = (lo + hi) // 2
-        c = _has_code(rpc, addr, mid)
-        if c:
-            hi = mid
-        else:
-            lo = mid + 1                  # no code (or unserved) -> deployed later
-    return lo
-
-
 def load_pools(rpc, head):
     """Unique cryptopools behind the markets: asset/decimals, probe size dx, the market ids that
     share each pool (the migration reuses pools), and each pool's deployment block = its scan start."""
@@ -141,13 +140,122 @@ def load_pools(rpc, head):
                 continue                  # market index doesn't exist
     pools = list(by_addr.values())
     cap = head - MAX_LOOKBACK_DAYS * BLOCKS_PER_DAY if MAX_LOOKBACK_DAYS else 0
+    blocks = deploy_index.update(JsonRPC(NETWORK))["blocks"]
     for p in pools:
-        p["start"] = max(_deploy_block(rpc, p["pool"], FLOOR_BLOCK, head), cap)
+        p["start"] = max(blocks.get(p["pool"], head), cap)
     return pools
 
 
+def _payload(pool_calls, alive, block):
+    """One Multicall3.aggregate3 of the alive pools' 5-call blocks, pinned to `block`."""
+    calls = [c for pi in alive for c in pool_calls[pi]]
+    agg = SEL_AGG3 + encode(["(address,bool,bytes)[]"], [calls])
+    return ("eth_call", [{"to": MULTICALL3, "data": "0x" + agg.hex()}, hex(block)])
+
+
+def _decode(pools, b, alive, res):
+    """{pool index: row} of the counted pools in one block's aggregate3 result."""
+    out = {}
+    if not res or len(res) <= 2:
+        return out
+    try:
+        decoded = decode(["(bool,bytes)[]"], bytes.fromhex(res[2:]))[0]
+    except Exception:
+        return out
+    for k, pi in enumerate(alive):
+        p = pools[pi]
+        oks_vals = decoded[5 * k:5 * k + 5]
+        if not all(ok for ok, _ in oks_vals):
+            continue
+        p_o, fee, dy, bal0, bal1 = (int.from_bytes(v, "big") for _, v in oks_vals)
+        if not p_o or not dy or not bal1:
+            continue
+        scale1 = 10 ** (18 - p["dec"])
+        tvl = bal0 + bal1 * scale1 * p_o // PRECISION            # crvUSD (~USD), 1e18
+        if tvl < MIN_TVL * PRECISION:
+            continue                          # too close to launch / too thin
+        if p["dx"] * scale1 * p_o // PRECISION > int(MAX_DX_FRAC * tvl):
+            continue                          # probe not small enough vs the pool
+        discount = min(SWAP_FEE_MULTIPLIER * fee // FEE_DENOM, PRECISION)
+        min_dy = p["dx"] * p_o // PRECISION * (PRECISION - discount) // PRECISION
+        p_exec = dy * PRECISION // (p["dx"] * scale1)            # crvUSD per whole asset, 1e18
+        fee_f = fee / FEE_DENOM
+        gap = (p_o - p_exec) / p_o                                # oracle-vs-executable gap
+        req_mult = gap / fee_f if fee_f else 0.0                  # fee-widths below the oracle
+        out[pi] = dict(block=b, pool=p["pool"], symbol=p["symbol"], markets=str(p["markets"]),
+                       tvl_musd=tvl / PRECISION / 1e6, p_o=p_o, fee_bp=fee_f * 1e4, dy=dy,
+                       min_dy=min_dy, dy_over_min=dy / max(min_dy, 1), actual_pass=dy >= min_dy,
+                       gap_bp=gap * 1e4, req_mult=req_mult)
+    return out
+
+
+def _sample(rpc, pools, pool_calls, blocks, sink, bar):
+    """Sample `blocks` (per block only the pools alive by then, CHUNK blocks per JSON-RPC batch, up
+    to PARALLEL batches in flight) and hand each counted row to sink(pool index, row) as its batch
+    lands, in block order. Keeps only what refinement needs: {block: {pool index: (req_mult, gap_bp)}}."""
+    def fetch(batch):
+        alive = [[pi for pi, p in enumerate(pools) if p["start"] <= b] for b in batch]
+        return batch, alive, _fetch_chunk(rpc, [_payload(pool_calls, a, b) for a, b in zip(alive, batch)])
+
+    samples = {}
+    batches = (blocks[i:i + CHUNK] for i in range(0, len(blocks), CHUNK))
+    with ThreadPoolExecutor(PARALLEL) as ex:
+        pending = deque(ex.submit(fetch, batch) for batch in islice(batches, PARALLEL))
+        while pending:
+            batch, alive, results = pending.popleft().result()
+            for nxt in islice(batches, 1):
+                pending.append(ex.submit(fetch, nxt))
+            for b, a, res in zip(batch, alive, results):
+                rows = _decode(pools, b, a, res)
+                samples[b] = {pi: (r["req_mult"], r["gap_bp"]) for pi, r in rows.items()}
+                for pi, r in sorted(rows.items()):
+                    sink(pi, r)
+            bar.update(len(batch))
+    return samples
+
+
+def _to_refine(samples):
+    """Midpoints of the gaps between consecutive sampled blocks worth a closer look: for some pool
+    counted at both ends, req_mult or the oracle-vs-spot gap moves by more than REFINE_MULT /
+    REFINE_GAP_BP, or one end is that pool's worst sample so far (climbs to the exact peak)."""
+    worst = {}
+    for b, rows in samples.items():
+        for pi, (req_mult, _) in rows.items():
+            if pi not in worst or req_mult > samples[worst[pi]][pi][0]:
+                worst[pi] = b
+    blocks = sorted(samples)
+    mids = []
+    for a, b in zip(blocks, blocks[1:]):
+        if b - a < 2:
+            continue
+        for pi in samples[a].keys() & samples[b].keys():
+            (ma, ga), (mb, gb) = samples[a][pi], samples[b][pi]
+            if abs(ma - mb) > REFINE_MULT or abs(ga - gb) > REFINE_GAP_BP or worst[pi] in (a, b):
+                mids.append((a + b) // 2)
+                break
+    return mids
+
+
+def _tally(stats, row):
+    """Fold one row into its pool's running summary. Counts / shares are over the uniform STEP grid
+    only: the refined samples crowd the volatile stretches."""
+    stats["first"] = min(stats["first"] or row["block"], row["block"])
+    stats["last"] = max(stats["last"] or row["block"], row["block"])
+    if stats["worst"] is None or row["req_mult"] > stats["worst"]["req_mult"]:
+        stats["worst"] = row
+    if not row["coarse"]:
+        stats["fine"] += 1
+        return
+    stats["n"] += 1
+    stats["fails"] += not row["actual_pass"]
+    stats["over"] += row["req_mult"] > MULTIPLIER
+    stats["dy_over_min"] += row["dy_over_min"]
+
+
 def scan():
-    rpc = EthereumRPC(NETWORK)
+    """Scan every pool, streaming each counted row to OUT_CSV as it is decoded.
+    @return pools, per-pool summaries (see _tally), rpc"""
+    rpc = CachedRPC(NETWORK)   # block-pinned reads come from .cache/rpc.sqlite after the first run
     head = int(rpc.fetch("eth_blockNumber", []), 16)
     pools = load_pools(rpc, head)
     for p in pools:
@@ -161,55 +269,36 @@ def scan():
                    (p["pool"], True, SEL_BAL + encode(["uint256"], [0])),
                    (p["pool"], True, SEL_BAL + encode(["uint256"], [1]))] for p in pools]
     global_start = min(p["start"] for p in pools)
-    payloads, blk_alive = [], []
-    for b in range(global_start, head + 1, STEP):
-        alive = [pi for pi, p in enumerate(pools) if p["start"] <= b]
-        calls = [c for pi in alive for c in pool_calls[pi]]
-        agg = SEL_AGG3 + encode(["(address,bool,bytes)[]"], [calls])
-        payloads.append(("eth_call", [{"to": MULTICALL3, "data": "0x" + agg.hex()}, hex(b)]))
-        blk_alive.append((b, alive))
-    print(f"scanning {len(payloads)} blocks (up to {len(pools)} pools each) via Multicall3 "
-          f"({global_start}..{head}, step {STEP})")
-
-    results = []
-    with tqdm(total=len(payloads), desc="blocks", unit="blk") as bar:
-        for i in range(0, len(payloads), CHUNK):
-            batch = payloads[i:i + CHUNK]
-            results += _fetch_chunk(rpc, batch)
-            bar.update(len(batch))
+    coarse = list(range(global_start, head + 1, STEP))
+    print(f"scanning {len(coarse)} blocks (up to {len(pools)} pools each) via Multicall3 "
+          f"({global_start}..{head}, step {STEP}, {PARALLEL} batches in flight)")
 
-    rows = []
-    for (b, alive), res in zip(blk_alive, results):
-        if not res or len(res) <= 2:
-            continue
-        try:
-            decoded = decode(["(bool,bytes)[]"], bytes.fromhex(res[2:]))[0]
-        except Exception:
-            continue
-        for k, pi in enumerate(alive):
-            p = pools[pi]
-            oks_vals = decoded[5 * k:5 * k + 5]
-            if not all(ok for ok, _ in oks_vals):
-                continue
-            p_o, fee, dy, bal0, bal1 = (int.from_bytes(v, "big") for _, v in oks_vals)
-            if not p_o or not dy or not bal1:
-                continue
-            scale1 = 10 ** (18 - p["dec"])
-            tvl = bal0 + bal1 * scale1 * p_o // PRECISION            # crvUSD (~USD), 1e18
-            if tvl < MIN_TVL * PRECISION:
-                continue                          # too close to launch / too thin
-            if p["dx"] * scale1 * p_o // PRECISION > int(MAX_DX_FRAC * tvl):
-                continue                          # probe not small enough vs the pool
-            discount = min(SWAP_FEE_MULTIPLIER * fee // FEE_DENOM, PRECISION)
-            min_dy = p["dx"] * p_o // PRECISION * (PRECISION - discount) // PRECISION
-            p_exec = dy * PRECISION // (p["dx"] * scale1)            # crvUSD per whole asset, 1e18
-            fee_f = fee / FEE_DENOM
-            req_mult = ((p_o - p_exec) / p_o) / fee_f if fee_f else 0.0   # fee-widths below the oracle
-            rows.append(dict(block=b, pool=p["pool"], symbol=p["symbol"], markets=str(p["markets"]),
-                             tvl_musd=tvl / PRECISION / 1e6, p_o=p_o, fee_bp=fee_f * 1e4, dy=dy,
-                             min_dy=min_dy, dy_over_min=dy / max(min_dy, 1), actual_pass=dy >= min_dy,
-                             req_mult=req_mult))
-    return pools, rows, rpc
+    stats = [dict(n=0, fine=0, fails=0, over=0, dy_over_min=0.0, first=None, last=None, worst=None) for _ in pools]
+    with open(OUT_CSV, "w", newline="") as f, tqdm(total=len(coarse), desc="blocks", unit="blk") as bar:
+        writer = None
+        is_coarse = True
+
+        def sink(pi, row):
+            nonlocal writer
+            row = dict(row, coarse=is_coarse)
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            _tally(stats[pi], row)
+
+        samples = _sample(rpc, pools, pool_calls, coarse, sink, bar)
+        # Coarse-to-fine: bisect the gaps where something happens, down to single blocks
+        is_coarse = False
+        rounds = 0
+        while ADAPTIVE and (mids := _to_refine(samples)):
+            bar.total += len(mids)
+            samples.update(_sample(rpc, pools, pool_calls, mids, sink, bar))
+            rounds += 1
+    if ADAPTIVE:
+        print(f"refined: {len(samples) - len(coarse)} extra blocks in {rounds} rounds")
+    print(f"rpc cache: {rpc.hits} hits, {rpc.misses} fetched")
+    return pools, stats, rpc
 
 
 def _date(rpc, block):
@@ -217,43 +306,37 @@ def _date(rpc, block):
     return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
 
 
-def report(pools, rows, rpc):
-    with open(OUT_CSV, "w", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-        w.writeheader()
-        w.writerows(rows)
-
-    overall = max(r["req_mult"] for r in rows)
+def report(pools, stats, rpc):
+    overall = max(st["worst"]["req_mult"] for st in stats if st["worst"])
     over_col = f">{MULTIPLIER}x"
-    print(f"\n=== conversion-discount scan  (MULTIPLIER={MULTIPLIER}x, {len(rows)} samples, "
+    print(f"\n=== conversion-discount scan  (MULTIPLIER={MULTIPLIER}x, {sum(st['n'] for st in stats)} samples, "
           f"TVL>=${MIN_TVL/1e6:.0f}M -> {OUT_CSV}) ===\n")
-    print(f"{'markets':>12} {'asset':6} {'n':>6} {'scanned range':23} {'binds':7} "
+    print(f"{'markets':>12} {'asset':6} {'n':>6} {'+fine':>6} {'scanned range':23} {'binds':7} "
           f"{'fails':>6} {'max req':>8} {'worst date':11} {over_col:>6} {'revert%':>8}")
-    for p in pools:
-        pr = [r for r in rows if r["pool"] == p["pool"]]
-        if not pr:
+    for p, st in zip(pools, stats):
+        if not st["n"]:
             continue
-        fails = sum(not r["actual_pass"] for r in pr)
-        worst = max(pr, key=lambda r: r["req_mult"])
-        over = sum(r["req_mult"] > MULTIPLIER for r in pr)
-        over_pct = 100 * over / len(pr)   # share of this pool's scanned blocks that would revert
-        binds = "yes" if sum(r["dy_over_min"] for r in pr) / len(pr) < 100 else "no(~0)"
-        rng = f"{_date(rpc, min(r['block'] for r in pr))}..{_date(rpc, max(r['block'] for r in pr))}"
-        print(f"{str(p['markets']):>12} {p['symbol']:6} {len(pr):>6} {rng:23} {binds:7} "
-              f"{fails:>6} {worst['req_mult']:>7.2f}x {_date(rpc, worst['block']):11} {over:>6} {over_pct:>7.2f}%")
+        worst = st["worst"]
+        over_pct = 100 * st["over"] / st["n"]   # share of this pool's scanned blocks that would revert
+        binds = "yes" if st["dy_over_min"] / st["n"] < 100 else "no(~0)"
+        rng = f"{_date(rpc, st['first'])}..{_date(rpc, st['last'])}"
+        print(f"{str(p['markets']):>12} {p['symbol']:6} {st['n']:>6} {st['fine']:>6} {rng:23} {binds:7} "
+              f"{st['fails']:>6} {worst['req_mult']:>7.2f}x {_date(rpc, worst['block']):11} {st['over']:>6} {over_pct:>7.2f}%")
 
     print("\nmax req = fee-widths below the oracle the swap actually executed; MULTIPLIER covers a")
     print(f"sample when it stays <= MULTIPLIER. {over_col} / revert% = count / share of a pool's counted")
     print("blocks where req_mult > MULTIPLIER (the swap would miss its min_dy at the current discount).")
     print(f"Each pool is scanned from its deploy block; only TVL>=${MIN_TVL/1e6:.0f}M blocks with the "
           f"probe < {MAX_DX_FRAC:.1%} of the pool are counted.")
+    print(f"n / fails / {over_col} / revert% count the every-{STEP}-blocks grid; max req also covers the +fine "
+          "samples bisected in between.")
     print(f"\nMINIMUM MULTIPLIER covering every counted sample: {overall:.2f}x  "
           f"(current MULTIPLIER={MULTIPLIER}x -> {'ENOUGH' if overall <= MULTIPLIER else 'NOT enough'})")
 
 
 if __name__ == "__main__":
-    _pools, _rows, _rpc = scan()
-    if _rows:
-        report(_pools, _rows, _rpc)
+    _pools, _stats, _rpc = scan()
+    if any(st["n"] for st in _stats):
+        report(_pools, _stats, _rpc)
     else:
         print("no samples decoded (check MIN_TVL / RPC)")
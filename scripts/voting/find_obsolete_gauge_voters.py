@@ -17,12 +17,15 @@ VotingEscrow.getVotes(user) at head.
 
 Standalone, read-only - plain JSON-RPC against the local mainnet-cluster node.
 """
-import json
-import urllib.request
+import os
+import sys
 
 from eth_utils import keccak, to_checksum_address
 
-from networks import NETWORK
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # scripts/: log_scanner
+import event_index  # noqa: E402
+from log_scanner import JsonRPC  # noqa: E402
+from networks import NETWORK  # noqa: E402
 
 
 GAUGE_CONTROLLER = "0x1Be14811A3a06F6aF4fA64310a636e1Df04c1c21"
@@ -35,11 +38,6 @@ GC_START_BLOCK = 23370927
 
 OBSOLETE_MARKET_IDS = [3, 4, 5]
 
-LOG_CHUNK = 10_000
-
-VOTE_TOPIC0 = "0x" + keccak(
-    text="VoteForGauge(uint256,address,address,uint256)"
-).hex()
 GET_VOTES_SEL = "0x" + keccak(text="getVotes(address)").hex()[:8]
 VOTE_USER_SLOPES_SEL = "0x" + keccak(
     text="vote_user_slopes(address,address)"
@@ -54,18 +52,7 @@ GAUGES_SEL = "0x" + keccak(text="gauges(uint256)").hex()[:8]
 N_GAUGES_SEL = "0x" + keccak(text="n_gauges()").hex()[:8]
 
 
-def rpc(method, params):
-    req = urllib.request.Request(
-        NETWORK,
-        data=json.dumps(
-            {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
-        ).encode(),
-        headers={"Content-Type": "application/json"},
-    )
-    r = json.loads(urllib.request.urlopen(req, timeout=120).read())
-    if r.get("error"):
-        raise RuntimeError(f"RPC {method}: {r['error']}")
-    return r["result"]
+rpc = JsonRPC(NETWORK)
 
 
 def market_staker(market_id: int) -> str:
@@ -120,22 +107,15 @@ def last_user_vote(user: str, gauge: str) -> int:
 
 
 def all_vote_events(latest: int):
-    """Yield (user, gauge) pairs from every VoteForGauge event in range."""
-    b = GC_START_BLOCK
-    while b <= latest:
-        e = min(b + LOG_CHUNK - 1, latest)
-        for log in rpc("eth_getLogs", [{
-            "address": GAUGE_CONTROLLER,
-            "topics": [VOTE_TOPIC0],
-            "fromBlock": hex(b),
-            "toBlock": hex(e),
-        }]):
-            data = bytes.fromhex(log["data"][2:])
-            # data = time(32) | user(32) | gauge_addr(32) | weight(32)
-            user = to_checksum_address("0x" + data[32:64].hex()[-40:])
-            gauge = to_checksum_address("0x" + data[64:96].hex()[-40:])
-            yield user, gauge
-        b = e + 1
+    """Yield (user, gauge) pairs from every VoteForGauge event, in chain
+    order. Served from the local event index: only blocks past its cursor
+    are fetched (see event_index.py)."""
+    db = event_index.connect()
+    event_index.sync(db, rpc, {"gauge_controller": [GAUGE_CONTROLLER]},
+                     GC_START_BLOCK)
+    yield from db.execute(
+        "SELECT user, gauge_addr FROM gc_vote WHERE block <= ?"
+        " ORDER BY block, log_index", (latest,))
 
 
 def vote_user_power(user: str) -> int:
@@ -8,35 +8,23 @@ create_vote_add_gauges_v3.py needs to pass the pending DAO votes.
 
 Standalone, read-only - plain JSON-RPC, no fork.
 """
-import json
-import urllib.request
+import os
+import sys
 
-from eth_utils import keccak, to_checksum_address
+from eth_utils import keccak
 
-from networks import NETWORK
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # scripts/: log_scanner
+import event_index  # noqa: E402
+from log_scanner import JsonRPC  # noqa: E402
+from networks import NETWORK  # noqa: E402
 
 VOTING_ESCROW = "0x8235c179e9e84688fbd8b12295efc26834dac211"
 VE_DEPLOY_BLOCK = 23370927
-DEPOSIT_TOPIC0 = "0x" + keccak(
-    text="Deposit(address,address,uint256,uint256,uint256,uint256)"
-).hex()
 GET_VOTES_SELECTOR = "0x" + keccak(text="getVotes(address)").hex()[:8]
-LOG_CHUNK = 10_000          # mainnet-cluster eth_getLogs range limit
 TOP_N = 25
 
 
-def rpc(method, params):
-    req = urllib.request.Request(
-        NETWORK,
-        data=json.dumps(
-            {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
-        ).encode(),
-        headers={"Content-Type": "application/json"},
-    )
-    r = json.loads(urllib.request.urlopen(req, timeout=120).read())
-    if r.get("error"):
-        raise RuntimeError(f"RPC {method}: {r['error']}")
-    return r["result"]
+rpc = JsonRPC(NETWORK)
 
 
 def get_votes(addr: str) -> int:
@@ -47,18 +35,13 @@ def get_votes(addr: str) -> int:
 
 def main():
     latest = int(rpc("eth_blockNumber", []), 16)
-    print(f"# scanning Deposit events {VE_DEPLOY_BLOCK}..{latest}")
-
-    lockers = set()
-    b = VE_DEPLOY_BLOCK
-    while b <= latest:
-        e = min(b + LOG_CHUNK - 1, latest)
-        for log in rpc("eth_getLogs", [{
-            "address": VOTING_ESCROW, "topics": [DEPOSIT_TOPIC0],
-            "fromBlock": hex(b), "toBlock": hex(e),
-        }]):
-            lockers.add(to_checksum_address("0x" + log["topics"][2][26:]))
-        b = e + 1
+    print(f"# indexing Deposit events {VE_DEPLOY_BLOCK}..{latest}")
+
+    # Only blocks past the index cursor are fetched (see event_index.py)
+    db = event_index.connect()
+    event_index.sync(db, rpc, {"voting_escrow": [VOTING_ESCROW]},
+                     VE_DEPLOY_BLOCK)
+    lockers = {a for a, in db.execute("SELECT DISTINCT _for FROM ve_deposit")}
 
     voters = [(a, get_votes(a)) for a in lockers]
     voters = sorted((v for v in voters if v[1] > 0), key=lambda x: -x[1])
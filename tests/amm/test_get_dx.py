@@ -0,0 +1,51 @@
+import boa
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+
+@given(
+    debt_multiplier=st.floats(min_value=0.2, max_value=1.05),
+    out_frac=st.floats(min_value=1e-9, max_value=0.5),
+    i=st.integers(min_value=0, max_value=1),
+)
+@settings(max_examples=200)
+def test_get_dx(collateral_token, stablecoin, amm, admin, price_oracle, accounts, debt_multiplier, out_frac, i):
+    collateral_amount = 100 * 10**18
+    p_o = price_oracle.price()
+    debt = int(debt_multiplier * p_o * collateral_amount // (2 * 10**18))
+    with boa.env.prank(admin):
+        try:
+            amm._deposit(collateral_amount, debt)
+        except boa.BoaError:
+            return
+    stablecoin._mint_for_testing(amm.address, 10**60)
+    collateral_token._mint_for_testing(amm.address, collateral_amount)
+
+    out_amount = int(out_frac * (collateral_amount if i == 0 else debt))
+    try:
+        dx = amm.get_dx(i, 1 - i, out_amount)
+    except boa.BoaError:
+        # Not reachable: even all of the debt does not buy that much
+        assert i == 0 and amm.get_dy(0, 1, debt) < out_amount
+        return
+    # The smallest input which gives out_amount
+    assert amm.get_dy(i, 1 - i, dx) >= out_amount
+    if dx > 0:
+        assert amm.get_dy(i, 1 - i, dx - 1) < out_amount
+
+    trader = accounts[0]
+    (stablecoin if i == 0 else collateral_token)._mint_for_testing(trader, dx)
+    with boa.env.prank(trader):
+        if dx > 0:
+            with boa.reverts("Slippage"):
+                amm.exchange_dy(i, 1 - i, out_amount, dx - 1)
+        try:
+            assert amm.exchange_dy(i, 1 - i, out_amount, dx) == dx
+        except boa.BoaError:
+            # Same safety checks as exchange()
+            with boa.reverts():
+                amm.exchange(i, 1 - i, dx, 0)
+            return
+
+    assert (stablecoin if i == 0 else collateral_token).balanceOf(trader) == 0
+    assert (collateral_token if i == 0 else stablecoin).balanceOf(trader) == out_amount
@@ -0,0 +1,177 @@
+"""
+The Python LEVAMM reference (scripts/levamm.py) must match AMM.vy bit-for-bit: views, deposit /
+withdraw bookkeeping, exchange outputs and - most importantly for bulk simulation - exactly the
+same set of reverting trades ("Bad final state", "Unsafe min/max", "Amount too large").
+The batched numpy mode must agree with the scalar mode element by element.
+"""
+import boa
+import numpy as np
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from scripts.levamm import LEVAMM, State, AMMRevert
+
+
+def _py(call):
+    try:
+        return call(), None
+    except AMMRevert as e:
+        return None, e
+
+
+def _evm(call):
+    try:
+        return call(), None
+    except boa.BoaError as e:
+        return None, e
+
+
+def _seed(amm, price_oracle, stablecoin, collateral_token, admin, p, collateral_amount, debt_multiplier):
+    with boa.env.prank(admin):
+        price_oracle.set_price(p)
+    debt = int(debt_multiplier * (p * collateral_amount // 10**18) / 2)
+    with boa.env.prank(admin):
+        amm._deposit(collateral_amount, debt)
+    stablecoin._mint_for_testing(amm.address, 10**60)
+    collateral_token._mint_for_testing(amm.address, collateral_amount)
+    return State(p, collateral_amount, debt)
+
+
+@given(
+    p=st.integers(min_value=10**15, max_value=10**24),
+    collateral_amount=st.integers(min_value=10**6, max_value=10**25),
+    debt_multiplier=st.floats(min_value=0.13, max_value=1.05),
+    dx=st.integers(min_value=0, max_value=10**27),
+)
+@settings(max_examples=300)
+def test_views(amm, price_oracle, stablecoin, collateral_token, admin, p, collateral_amount, debt_multiplier, dx):
+    ref = LEVAMM.from_contract(amm)
+    try:
+        state = _seed(amm, price_oracle, stablecoin, collateral_token, admin, p, collateral_amount, debt_multiplier)
+    except boa.BoaError:
+        # The contract refused the deposit: the reference must refuse it too
+        debt = int(debt_multiplier * (p * collateral_amount // 10**18) / 2)
+        assert _py(lambda: ref.deposit(State(p, 0, 0), collateral_amount, debt))[1] is not None
+        return
+
+    assert amm.get_state() == (state.collateral, state.debt, ref.get_x0(*state))
+    assert tuple(amm.value_oracle()) == ref.value_oracle(state)
+    assert amm.get_p() == ref.get_p(state)
+
+    for i in (0, 1):
+        out, err = _evm(lambda: amm.get_dy(i, 1 - i, dx))
+        ref_out, ref_err = _py(lambda: ref.get_dy(i, 1 - i, dx, state))
+        assert (err is None) == (ref_err is None), (i, err, ref_err)
+        assert out == ref_out
+
+        out, err = _evm(lambda: amm.get_dx(i, 1 - i, dx))
+        ref_out, ref_err = _py(lambda: ref.get_dx(i, 1 - i, dx, state))
+        assert (err is None) == (ref_err is None), (i, err, ref_err)
+        assert out == ref_out
+
+
+@given(
+    collateral_amount=st.integers(min_value=0, max_value=10**25),
+    debt_multiplier=st.floats(min_value=0, max_value=2),
+    frac=st.integers(min_value=0, max_value=10**18),
+)
+@settings(max_examples=300)
+def test_deposit_withdraw(amm, price_oracle, admin, collateral_amount, debt_multiplier, frac):
+    ref = LEVAMM.from_contract(amm)
+    p_o = price_oracle.price()
+    debt = int(debt_multiplier * (p_o * collateral_amount // 10**18) / 2)
+
+    with boa.env.prank(admin):
+        res, err = _evm(lambda: amm._deposit(collateral_amount, debt))
+    ref_res, ref_err = _py(lambda: ref.deposit(State(p_o, 0, 0), collateral_amount, debt))
+    assert (err is None) == (ref_err is None), (err, ref_err)
+    if err is not None:
+        return
+    state, value = ref_res
+    assert tuple(res) == (p_o, value)
+
+    with boa.env.prank(admin):
+        pair = amm._withdraw(frac)
+    state, d_collateral, d_debt = ref.withdraw(state, frac)
+    assert tuple(pair) == (d_collateral, d_debt)
+    assert (amm.collateral_amount(), amm.get_debt()) == (state.collateral, state.debt)
+
+
+@given(
+    debt_multiplier=st.floats(min_value=0.2, max_value=1.05),
+    amounts=st.lists(st.integers(min_value=0, max_value=10**26), min_size=1, max_size=8),
+    directions=st.lists(st.booleans(), min_size=8, max_size=8),
+)
+@settings(max_examples=200)
+def test_exchange(amm, price_oracle, stablecoin, collateral_token, admin, accounts,
+                  debt_multiplier, amounts, directions):
+    """A sequence of trades, some of which walk into the unsafe region and must revert."""
+    ref = LEVAMM.from_contract(amm)
+    state = _seed(amm, price_oracle, stablecoin, collateral_token, admin, price_oracle.price(), 100 * 10**18, debt_multiplier)
+    trader = accounts[0]
+
+    for amount, buy in zip(amounts, directions):
+        i = 0 if buy else 1
+        if buy:
+            stablecoin._mint_for_testing(trader, amount)
+        else:
+            amount //= 10**5
+            collateral_token._mint_for_testing(trader, amount)
+        with boa.env.prank(trader):
+            out, err = _evm(lambda: amm.exchange(i, 1 - i, amount, 0))
+        ref_res, ref_err = _py(lambda: ref.exchange(i, 1 - i, amount, state))
+        assert (err is None) == (ref_err is None), (i, amount, err, ref_err)
+        if err is None:
+            ref_out, state = ref_res
+            assert out == ref_out
+            assert (amm.collateral_amount(), amm.get_debt()) == (state.collateral, state.debt)
+
+
+@given(
+    p=st.lists(st.integers(min_value=10**15, max_value=10**24), min_size=16, max_size=16),
+    collateral=st.lists(st.integers(min_value=0, max_value=10**25), min_size=16, max_size=16),
+    debt_multiplier=st.lists(st.floats(min_value=0, max_value=1.2), min_size=16, max_size=16),
+    dx=st.lists(st.integers(min_value=0, max_value=10**27), min_size=16, max_size=16),
+    frac=st.lists(st.integers(min_value=0, max_value=10**18), min_size=16, max_size=16),
+)
+@settings(max_examples=100)
+def test_batch_matches_scalar(p, collateral, debt_multiplier, dx, frac):
+    ref = LEVAMM(fee=int(0.007e18))
+    debt = [int(m * (_p * c // 10**18) / 2) for _p, m, c in zip(p, debt_multiplier, collateral)]
+    states = State(np.array(p, dtype=object), np.array(collateral, dtype=object), np.array(debt, dtype=object))
+
+    def check(batch_out, ok, scalar):
+        for k in range(len(p)):
+            res, err = _py(lambda: scalar(k))
+            assert bool(ok[k]) == (err is None), (k, err)
+            if err is None:
+                assert batch_out(k) == res
+
+    def at(k):
+        return State(p[k], collateral[k], debt[k])
+
+    x0, ok = ref.get_x0_batch(*states)
+    check(lambda k: x0[k], ok, lambda k: ref.get_x0(*at(k)))
+    x0, ok = ref.get_x0_batch(*states, safe_limits=True)
+    check(lambda k: x0[k], ok, lambda k: ref.get_x0(*at(k), True))
+
+    value, ok = ref.value_oracle_batch(states)
+    check(lambda k: value[k], ok, lambda k: ref.value_oracle(at(k))[1])
+    price, ok = ref.get_p_batch(states)
+    check(lambda k: price[k], ok, lambda k: ref.get_p(at(k)))
+
+    for i in (0, 1):
+        dy, ok = ref.get_dy_batch(i, 1 - i, dx, states)
+        check(lambda k: dy[k], ok, lambda k: ref.get_dy(i, 1 - i, dx[k], at(k)))
+        out, new, ok = ref.exchange_batch(i, 1 - i, dx, states)
+        check(lambda k: (out[k], State(*(a[k] for a in new))), ok,
+              lambda k: ref.exchange(i, 1 - i, dx[k], at(k)))
+
+    zero = State(*(np.zeros(len(p), dtype=object) for _ in range(3)))
+    new, value, ok = ref.deposit_batch(zero._replace(p_o=states.p_o), states.collateral, states.debt)
+    check(lambda k: (State(*(a[k] for a in new)), value[k]), ok,
+          lambda k: ref.deposit(State(p[k], 0, 0), collateral[k], debt[k]))
+
+    new, d_collateral, d_debt, ok = ref.withdraw_batch(states, frac)
+    check(lambda k: (State(*(a[k] for a in new)), d_collateral[k], d_debt[k]), ok,
+          lambda k: ref.withdraw(at(k), frac[k]))
@@ -0,0 +1,47 @@
+import boa
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+MAX_UINT256 = 2**256 - 1
+
+
+@given(
+    p_change=st.floats(min_value=0.3, max_value=3.0),
+    debt_multiplier=st.floats(min_value=0.15, max_value=1.05),
+)
+@settings(max_examples=200)
+def test_max_in(collateral_token, stablecoin, amm, admin, price_oracle, p_change, debt_multiplier):
+    collateral_amount = 100 * 10**18
+    stablecoin._mint_for_testing(amm.address, 10**60)  # Really HUGE allocation
+    p_o = price_oracle.price()
+    debt = int(debt_multiplier * p_o * collateral_amount // (2 * 10**18))
+
+    with boa.env.prank(admin):
+        try:
+            amm._deposit(collateral_amount, debt)
+        except boa.BoaError:
+            return  # outside the safe range to begin with
+        collateral_token._mint_for_testing(amm.address, collateral_amount)
+        price_oracle.set_price(int(p_o * p_change))
+    collateral_token._mint_for_testing(admin, 10**40)
+    stablecoin._mint_for_testing(admin, 10**40)
+
+    try:
+        amm.get_p()
+    except boa.BoaError:
+        return  # price moved past the untradable region: nothing to quote
+
+    for i in (0, 1):
+        max_in = amm.max_in(i, 1 - i)
+        if max_in == MAX_UINT256:
+            assert i == 1
+            max_in = 10**30
+        else:
+            assert amm.max_out(i, 1 - i) == (amm.get_dy(i, 1 - i, max_in) if max_in > 0 else 0)
+            if max_in < (debt if i == 0 else 10**30):
+                # Just past the limit is "Bad final state"
+                with boa.env.anchor(), boa.env.prank(admin), boa.reverts():
+                    amm.exchange(i, 1 - i, max_in + max_in // 10**9 + 1, 0)
+        if max_in > 0:
+            with boa.env.anchor(), boa.env.prank(admin):
+                amm.exchange(i, 1 - i, max_in, 0)
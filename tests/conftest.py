@@ -8,8 +8,11 @@ from hypothesis import settings
 
 from eth.constants import ZERO_ADDRESS
 
+from scripts import compile_cache
+
 
 boa.env.enable_fast_mode()
+compile_cache.install()
 
 
 TWOCRYPTO_DIR = "contracts/twocrypto_pool/contracts/main"
@@ -324,6 +327,11 @@ def lending_oracle(factory, price_proxy_impl):
     return boa.load('contracts/utils/YBLendingOracle.vy', factory.address, price_proxy_impl.address)
 
 
+@pytest.fixture(scope="session")
+def market_lens(factory):
+    return boa.load('contracts/utils/YBMarketLens.vy', factory.address)
+
+
 @pytest.fixture(scope="session")
 def ratio_probe():
     return boa.load('contracts/testing/YBOracleRatioProbe.vy')
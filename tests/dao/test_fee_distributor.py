@@ -94,6 +94,73 @@ def test_claim_two_users(fee_distributor, token_set, accounts, admin, amounts, v
         assert token.balanceOf(fee_distributor.address) <= 8
 
 
+def test_overlapping_sets(fee_distributor, token_set, accounts, admin, ve_yb, yb):
+    user = accounts[0]
+    with boa.env.prank(admin):
+        yb.mint(user, 10**18)
+    with boa.env.prank(user):
+        yb.approve(ve_yb.address, 2**256 - 1)
+        ve_yb.create_lock(10**18, boa.env.evm.patch.timestamp + 4 * 365 * 86400)
+
+    # Sets 1, 2 and 3 share tokens 1, 5 and 9, and set 3 repeats one
+    sets = [[token_set[i] for i in ids] for ids in ([1, 5, 2, 3], [9, 1, 4, 4])]
+    for new_set in sets:
+        token_set[1]._mint_for_testing(fee_distributor.address, 10**18)
+        with boa.env.prank(admin):
+            fee_distributor.add_token_set(new_set)
+    fee_distributor.fill_epochs()
+
+    epoch = (boa.env.evm.patch.timestamp + WEEK) // WEEK * WEEK
+    expected = [token_set[i].address for i in (0, 1, 5, 9, 2, 3, 4)]
+    assert fee_distributor.epoch_tokens(epoch) == expected
+    tokens, amounts = fee_distributor.preview_distribution(1)
+    assert tokens == expected
+    assert amounts[1] == 2 * 10**18 // 4
+
+    boa.env.time_travel(5 * WEEK)
+    with boa.env.prank(user):
+        fee_distributor.claim()
+    # Token 1 was in every set but is paid out once per epoch
+    assert abs(token_set[1].balanceOf(user) - 2 * 10**18) <= 8
+    # The last epoch which had anything to distribute, which is before the last claimed one
+    assert fee_distributor.claimed_epoch_for(user, token_set[1]) == epoch + 3 * WEEK
+    assert fee_distributor.last_claimed_for(user) == epoch + 4 * WEEK
+    assert fee_distributor.claimed_epoch_for(user, token_set[6]) == 0
+    assert fee_distributor.claimed_epoch_for(accounts[1], token_set[1]) == 0
+
+
+NO_BALANCE_TOKEN = """
+# pragma version 0.4.3
+@external
+@view
+def balanceOf(user: address) -> uint256:
+    return 0
+"""
+
+
+def test_token_set_union_cap(fee_distributor, admin):
+    # Upcoming epochs distribute the tokens of every set added meanwhile: add_token_set refuses
+    # a set which would make them more than MAX_TOKENS * 4, so fills and claims never hit that
+    token_deployer = boa.loads_partial(NO_BALANCE_TOKEN)
+    max_tokens = fee_distributor.MAX_TOKENS()
+    with boa.env.prank(admin):
+        for _ in range(3):
+            fee_distributor.add_token_set([token_deployer.deploy() for _ in range(max_tokens)])
+        with boa.reverts("Too many tokens"):
+            fee_distributor.add_token_set([token_deployer.deploy() for _ in range(max_tokens)])
+        fee_distributor.add_token_set([token_deployer.deploy() for _ in range(max_tokens - 4)])
+    fee_distributor.fill_epochs()
+    epoch = (boa.env.evm.patch.timestamp + WEEK) // WEEK * WEEK
+    assert len(fee_distributor.epoch_tokens(epoch)) == 4 * max_tokens
+
+    # Once those epochs are over, a new set only shares epochs with the last one
+    boa.env.time_travel(4 * WEEK)
+    with boa.env.prank(admin):
+        fee_distributor.add_token_set([token_deployer.deploy() for _ in range(max_tokens)])
+    fee_distributor.fill_epochs()
+    assert len(fee_distributor.epoch_tokens(epoch + 4 * WEEK)) == 2 * max_tokens - 4
+
+
 def test_cliff_distribution_block(fee_distributor, ve_yb):
     ce = boa.load('contracts/dao/CliffEscrow.vy', ve_yb.address, ve_yb.address, ve_yb.address)  # mock
     with boa.reverts("Might be a vest"):
@@ -217,3 +284,34 @@ def test_st_fee_distributor_too_much_left(fee_distributor, token_set, accounts,
     state = StatefulFeeDistributor()
     state.distribute(amounts=[0, 0, 0, 0, 0, 0, 0, 0, 0, 10**18])
     state.teardown()
+
+
+def test_claim_many(fee_distributor, token_set, accounts, admin, ve_yb, yb):
+    used_set = [token_set[0], token_set[1]]
+    users = accounts[:5]
+    lock_time = boa.env.evm.patch.timestamp + 4 * 365 * 86400
+    for k, user in enumerate(users):
+        with boa.env.prank(admin):
+            yb.mint(user, (k + 1) * 10**18)
+        with boa.env.prank(user):
+            yb.approve(ve_yb.address, 2**256 - 1)
+            ve_yb.create_lock((k + 1) * 10**18, lock_time)
+
+    for k, token in enumerate(used_set):
+        token._mint_for_testing(fee_distributor.address, (k + 1) * 10**24)
+    fee_distributor.fill_epochs()
+    boa.env.time_travel(5 * WEEK)
+
+    with boa.env.anchor():
+        gas_one_by_one = 0
+        for user in users:
+            fee_distributor.claim(user)
+            gas_one_by_one += fee_distributor._computation.get_gas_used()
+        expected = [[token.balanceOf(user) for token in used_set] for user in users]
+
+    fee_distributor.claim_many(users)
+    gas_many = fee_distributor._computation.get_gas_used()
+    assert [[token.balanceOf(user) for token in used_set] for user in users] == expected
+    assert all(b > 0 for b in sum(expected, []))
+    assert gas_many < gas_one_by_one
+    assert fee_distributor.last_claimed_for(users[0]) > 0
@@ -715,3 +715,73 @@ def test_no_revert_too_much(ve_yb, yb, gc, fake_gauges, accounts, admin):
     state.check_sum_votes()
     state.vote(gauge_ids=[1, 2, 0], uid=2, weight=2502)
     state.teardown()
+
+
+def _gauge_state(gc, gauges):
+    return [(gc.time_weight(g.address), tuple(gc.point_weight(g.address)), gc.gauge_weight(g.address),
+             gc.adjusted_gauge_weight(g.address), gc.weighted_emissions_per_gauge(g.address),
+             gc.specific_emissions_per_gauge(g.address)) for g in gauges] + \
+        [(gc.gauge_weight_sum(), gc.adjusted_gauge_weight_sum(), gc.specific_emissions())]
+
+
+@pytest.mark.parametrize("on_boundary", [False, True])
+def test_checkpoint_gauge_partial(fake_gauges, gc, accounts, lock_for_accounts, prepare_gauges, admin, on_boundary):
+    gauges = fake_gauges[:2]
+    with boa.env.prank(admin):
+        for gauge in gauges:
+            gc.add_gauge(gauge.address)
+    with boa.env.prank(accounts[0]):
+        gc.vote_for_gauge_weights(gauges, [6000, 4000])
+    boa.env.time_travel(30 * WEEK + 12345)
+    if on_boundary:  # block.timestamp is an exact multiple of WEEK
+        boa.env.time_travel(WEEK - boa.env.evm.patch.timestamp % WEEK)
+
+    with boa.env.anchor():
+        gc.checkpoint(gauges[0].address)
+        full_gas = gc._computation.get_gas_used()
+        gc.checkpoint(gauges[1].address)
+        expected = _gauge_state(gc, gauges)
+
+    current_week = boa.env.evm.patch.timestamp // WEEK * WEEK
+    t = gc.checkpoint_gauge_partial(gauges[0].address, 7)
+    assert t < current_week and gc.time_weight(gauges[0].address) == t
+    # Reading the weight is unaffected by how far the catch-up got
+    assert gc.get_gauge_weight(gauges[0].address) == expected[0][1][0]
+    for _ in range(5):
+        if gc.checkpoint_gauge_partial(gauges[0].address, 7) == current_week:
+            break
+    assert gc.checkpoint_gauge_partial(gauges[0].address, 7) == current_week
+    assert gc.time_weight(gauges[0].address) < boa.env.evm.patch.timestamp
+
+    # Then the same checkpoints as without the catch-up: same state, less gas
+    gc.checkpoint(gauges[0].address)
+    assert gc._computation.get_gas_used() < full_gas
+    gc.checkpoint(gauges[1].address)
+    assert _gauge_state(gc, gauges) == expected
+
+    with boa.reverts("Gauge not alive"):
+        gc.checkpoint_gauge_partial(fake_gauges[2].address, 7)
+
+
+def test_checkpoint_many(ve_yb, yb, fake_gauges, gc, accounts, lock_for_accounts, prepare_gauges, admin):
+    with boa.env.prank(admin):
+        for gauge in fake_gauges:
+            gc.add_gauge(gauge.address)
+        if yb.last_minted() == 0:
+            yb.start_emissions()
+    with boa.env.prank(accounts[0]):
+        gc.vote_for_gauge_weights(fake_gauges, [10000 // N_POOLS] * N_POOLS)
+    fake_gauges[1].set_adjustment(5 * 10**17)
+
+    for dt in [WEEK // 3, 3 * WEEK + 1]:
+        boa.env.time_travel(dt)
+        with boa.env.anchor():
+            gas = 0
+            for gauge in fake_gauges:
+                gc.checkpoint(gauge.address)
+                gas += gc._computation.get_gas_used()
+            expected = _gauge_state(gc, fake_gauges) + [yb.balanceOf(gc.address)]
+        gc.checkpoint_many(fake_gauges)
+        assert gc._computation.get_gas_used() < gas
+        assert _gauge_state(gc, fake_gauges) + [yb.balanceOf(gc.address)] == expected
+        assert gc.specific_emissions() > 0
@@ -0,0 +1,66 @@
+"""
+YBMarketLens: one call returns what the per-market reads return, page by page.
+"""
+import boa
+
+
+def test_market_lens(market_lens, factory, yb_lt, yb_amm, cryptopool, cryptopool_oracle, yb_staker,
+                     collateral_token, yb_allocated, seed_cryptopool, admin):
+    with boa.env.prank(admin):
+        collateral_token._mint_for_testing(admin, 10**18)
+        yb_lt.deposit(10**18, 100_000 * 10**18, 0)
+
+    n = factory.market_count()
+    market_id = next(i for i in range(n) if factory.markets(i).lt == yb_lt.address)
+    s = market_lens.market_state(market_id)
+
+    assert s.market_id == market_id
+    assert tuple(s.market) == tuple(factory.markets(market_id))
+    assert s.lt_supply == yb_lt.totalSupply()
+    assert s.lt_staked == yb_lt.balanceOf(yb_staker.address)
+    assert s.staker_supply == yb_staker.totalSupply()
+    assert s.price_per_share == yb_lt.pricePerShare()
+    assert tuple(s.liquidity) == tuple(yb_lt.liquidity())
+    assert (s.collateral, s.debt) == (yb_amm.collateral_amount(), yb_amm.get_debt())
+    assert (s.rate, s.fee, s.is_killed) == (yb_amm.rate(), yb_amm.fee(), False)
+    assert s.oracle_price == cryptopool_oracle.price()
+    assert s.pool_price_oracle == cryptopool.price_oracle()
+    assert s.pool_price_scale == cryptopool.price_scale()
+    assert list(s.pool_balances) == [cryptopool.balances(0), cryptopool.balances(1)]
+    assert s.pool_supply == cryptopool.totalSupply()
+
+    states, next_id = market_lens.markets(0, 2**256 - 1 - n)
+    assert next_id == n and [st.market_id for st in states] == list(range(n))
+    assert states[market_id] == s
+    states, next_id = market_lens.markets(market_id, 1)
+    assert next_id == market_id + 1 and states == [s]
+    assert market_lens.markets(n, 10) == ([], n)
+
+    # A page that cannot fit stops early and says where to continue
+    states, next_id = market_lens.markets(0, n, gas=market_lens.MIN_GAS_PER_MARKET() + 50_000)
+    assert next_id < n and len(states) == next_id
+
+    with boa.reverts("No market"):
+        market_lens.market_state(n)
+
+
+def test_market_lens_unsafe_market(market_lens, factory, yb_lt, yb_amm, mock_agg, collateral_token,
+                                   yb_allocated, seed_cryptopool, admin):
+    with boa.env.prank(admin):
+        collateral_token._mint_for_testing(admin, 10**18)
+        yb_lt.deposit(10**18, 100_000 * 10**18, 0)
+        # Collateral value down 10x: debt is way past the untradable point
+        mock_agg.set_price(10**17)
+
+    n = factory.market_count()
+    market_id = next(i for i in range(n) if factory.markets(i).lt == yb_lt.address)
+    with boa.reverts():
+        yb_lt.pricePerShare()
+
+    s = market_lens.market_state(market_id)
+    assert s.price_per_share == 0
+    assert (s.collateral, s.debt) == (yb_amm.collateral_amount(), yb_amm.get_debt())
+    assert s.agg_price == 10**17
+
+    states, next_id = market_lens.markets(0, n)
+    assert next_id == n and states[market_id] == s
@@ -53,3 +53,45 @@ def test_virtual_pool(factory, cryptopool, yb_lt, collateral_token, stablecoin,
                 assert after[j] - before[j] == out_amount
                 assert before[2] == after[2] == 0
                 assert abs(expected_out - out_amount) / expected_out < 3e-5
+
+
+def test_get_dy_many(factory, cryptopool, yb_lt, collateral_token, yb_allocated, seed_cryptopool, virtual_pool, admin):
+    with boa.env.prank(admin):
+        collateral_token._mint_for_testing(admin, 5 * 10**17)
+        yb_lt.deposit(5 * 10**17, 5 * 10**17 * 100_000, 0)
+
+    for i, amounts in [(0, [10**17 * 2**k for k in range(16)]), (1, [10**12 * 2**k for k in range(16)])]:
+        assert virtual_pool.get_dy_many(i, 1 - i, amounts) == [virtual_pool.get_dy(i, 1 - i, a) for a in amounts]
+        assert virtual_pool.get_dy_many(i, 1 - i, []) == []
+
+    with boa.reverts():
+        virtual_pool.get_dy_many(0, 0, [10**18])
+
+
+def test_max_in(factory, cryptopool, yb_lt, collateral_token, stablecoin, yb_allocated, seed_cryptopool,
+                virtual_pool, accounts, admin):
+    with boa.env.prank(admin):
+        collateral_token._mint_for_testing(admin, 5 * 10**17)
+        yb_lt.deposit(5 * 10**17, 5 * 10**17 * 100_000, 0)
+
+    user = accounts[0]
+    for i, token in [(0, stablecoin), (1, collateral_token)]:
+        max_in = virtual_pool.max_in(i, 1 - i)
+        assert max_in > 0
+        max_out = virtual_pool.max_out(i, 1 - i)
+        if i == 0:
+            assert max_out == virtual_pool.get_dy(i, 1 - i, max_in)
+        else:
+            # The output peaks at or before max_in
+            assert max_out >= max(virtual_pool.get_dy(i, 1 - i, max_in * f // 10) for f in range(1, 11))
+        with boa.env.anchor(), boa.env.prank(user):
+            token._mint_for_testing(user, max_in)
+            virtual_pool.exchange(i, 1 - i, max_in, 0)
+        # Just past max_in the exchange can not go through
+        with boa.env.anchor(), boa.env.prank(user):
+            token._mint_for_testing(user, 2 * max_in)
+            with boa.reverts():
+                virtual_pool.exchange(i, 1 - i, max_in * 101 // 100, 0)
+
+    with boa.reverts():
+        virtual_pool.max_in(0, 0)
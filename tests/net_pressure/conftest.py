@@ -67,6 +67,11 @@ def set(n: int256, t: uint256):
 @view
 def net_pressure_and_tvl(lt: address, agg_price: uint256) -> PressureTvl:
     return PressureTvl(net_pressure=self.net, half_tvl=self.htvl)
+@external
+@view
+def net_pressure_and_tvl_sum(lts: DynArray[address, 20], agg_price: uint256) -> PressureTvl:
+    n: uint256 = len(lts)
+    return PressureTvl(net_pressure=self.net * convert(n, int256), half_tvl=self.htvl * n)
 """
 
 AGG_MOCK = """
@@ -12,12 +12,20 @@ Equivalence tests for MerklPIDDriver - the Merkl-side, *stateless* twin of PID.v
     The ONLY divergence is floor-vs-truncate rounding (~1 wei per negative division, damped
     in the shipped APR), which is why this one is "almost", not "exactly", equal.
 
+  * test_bit_exact_twin_matches_driver: scripts/merkl_pid_driver.py (EVM sdiv semantics, used
+    for offline export replay) equals the view EXACTLY - same outputs, same reverts - over
+    randomized gains, signals and PID state.
+
 The Python reference (MerklPIDController) lives here so the thing Merkl mirrors is checked
 in CI against both PID.vy and the on-chain view. Mocks come from conftest.py.
 """
 import boa
 import pytest
 from collections import namedtuple
+from hypothesis import HealthCheck, given, settings
+from hypothesis import strategies as st
+
+from scripts import merkl_pid_driver
 
 
 PRECISION = 10**18
@@ -217,6 +225,51 @@ def test_python_reference_matches_driver(env):
     assert worst_rel < 1e-9, f"reference diverged {worst_rel:.2e} relative from the view"
 
 
+@given(
+    net=st.integers(min_value=-10**26, max_value=10**26),
+    half_tvl=st.integers(min_value=0, max_value=10**26),
+    sink_tvl=st.integers(min_value=0, max_value=10**26),
+    integral_in=st.integers(min_value=0, max_value=3 * 10**18),
+    prev_pressure_in=st.integers(min_value=0, max_value=10**20),
+    d_pressure_in=st.integers(min_value=-10**21, max_value=10**21),
+    dt=st.integers(min_value=0, max_value=30 * 86400),
+    market_rate=st.integers(min_value=0, max_value=10**18),
+    gains=st.tuples(
+        st.integers(min_value=-10**20, max_value=10**20),      # feedforward_gain
+        st.integers(min_value=-10**21, max_value=10**21),      # kp
+        st.integers(min_value=-10**22, max_value=10**22),      # ki
+        st.integers(min_value=-10**19, max_value=10**19),      # kd
+        st.integers(min_value=0, max_value=10**19),            # max_integral
+        st.integers(min_value=0, max_value=10**20),            # sink_cap
+        st.integers(min_value=0, max_value=10**19),            # dead_band
+        st.integers(min_value=1, max_value=10**19),            # sink_per_offer
+        st.integers(min_value=1, max_value=7 * 86400)),        # d_filter_time
+)
+@settings(max_examples=500, suppress_health_check=[HealthCheck.function_scoped_fixture])
+def test_bit_exact_twin_matches_driver(env, mr_mock, net, half_tvl, sink_tvl, integral_in, prev_pressure_in,
+                                       d_pressure_in, dt, market_rate, gains):
+    """scripts/merkl_pid_driver.py is the offline twin of preview_target_apr: identical state and
+    APR for identical inputs (no floor-vs-truncate gap), and it refuses exactly what the view does."""
+    driver, np, admin = env["driver"], env["np"], env["admin"]
+    np.set(net, half_tvl)
+    with boa.env.prank(admin):
+        driver.set_sources(np.address, mr_mock.deploy(market_rate).address, driver.fee_distributor())
+        driver.set_gains(*gains)
+
+    params = merkl_pid_driver.read_params(driver)
+    assert params == merkl_pid_driver.Params(*gains)
+    signals = merkl_pid_driver.RawSignals(*driver.raw_signals())
+    args = (sink_tvl, integral_in, prev_pressure_in, d_pressure_in, dt)
+
+    try:
+        expected = AprState(*driver.preview_target_apr(*args))
+    except boa.BoaError:
+        with pytest.raises(merkl_pid_driver.DriverRevert):
+            merkl_pid_driver.preview_target_apr(params, signals, *args)
+        return
+    assert merkl_pid_driver.preview_target_apr(params, signals, *args) == tuple(expected)
+
+
 ZERO = "0x0000000000000000000000000000000000000000"
 
 
@@ -457,3 +510,16 @@ def test_approve_merkl(env, accts):
     with boa.env.prank(manager):
         driver.approve_merkl(0)
     assert crvusd.allowance(driver.address, wrapper.address) == 0
+
+
+def test_pressure_lts_summed(env):
+    """Both controllers sum pressure_lts through one net_pressure_and_tvl_sum call."""
+    pid, driver, np, admin = (env[k] for k in ("pid", "driver", "np", "admin"))
+    lts = [boa.env.generate_address() for _ in range(3)]
+    np.set(10**23, H)
+    with boa.env.prank(admin):
+        pid.set_pressure_lts(lts)
+        driver.set_pressure_lts(lts)
+
+    assert driver.raw_signals()[:2] == (PRECISION // 5, 3 * H)
+    assert pid.preview_signals()[0] == PRECISION // 5
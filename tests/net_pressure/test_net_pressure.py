@@ -535,3 +535,31 @@ def test_pressure_signals_half_tvl_is_value_oracle(
     equity = yb_amm.value_oracle().value  # x0 / (2L-1)
     assert abs(ps.half_tvl - equity) < equity // 50          # half-TVL == value_oracle
     assert abs(ps.net_pressure) < equity // 50               # ~0 at equilibrium
+
+
+def test_net_pressure_and_tvl_many(
+    cryptopool, yb_lt, collateral_token, stablecoin, accounts, admin,
+    yb_allocated, seed_cryptopool, net_pressure, mock_agg,
+):
+    """net_pressure_and_tvl_many / _sum: each entry and the sums equal the single-LT calls;
+    an LT listed twice (two markets on one pool) reuses the pool metrics, so it costs less
+    gas than a second net_pressure_and_tvl."""
+    _setup(cryptopool, yb_lt, collateral_token, stablecoin, accounts, admin, 10, 10**18)
+    agg_price = mock_agg.price()
+    single = net_pressure.net_pressure_and_tvl(yb_lt.address, agg_price)
+
+    assert list(net_pressure.net_pressure_and_tvl_many([yb_lt.address] * 3, agg_price)) == [single] * 3
+    assert net_pressure.net_pressure_and_tvl_sum([yb_lt.address] * 3, agg_price) == \
+        (3 * single.net_pressure, 3 * single.half_tvl)
+    assert net_pressure.net_pressure_and_tvl_sum([yb_lt.address]) == \
+        net_pressure.net_pressure_and_tvl_sum([yb_lt.address], agg_price)
+    assert net_pressure.net_pressure_and_tvl_many([], agg_price) == []
+    assert net_pressure.net_pressure_and_tvl_sum([], agg_price) == (0, 0)
+
+    net_pressure.net_pressure_and_tvl_sum([yb_lt.address], agg_price)
+    gas_one = net_pressure._computation.get_gas_used()
+    net_pressure.net_pressure_and_tvl_sum([yb_lt.address] * 2, agg_price)
+    gas_two = net_pressure._computation.get_gas_used()
+    net_pressure.net_pressure_and_tvl(yb_lt.address, agg_price)
+    gas_single = net_pressure._computation.get_gas_used()
+    assert gas_two - gas_one < gas_single // 2
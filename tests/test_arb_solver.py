@@ -0,0 +1,64 @@
+"""
+scripts/arb_solver.py on the integer LEVAMM reference: the closed-form size is the optimum of the
+exact profit, both routes agree, a batch equals its markets solved one by one, and an optimum
+the AMM would revert is cut back to the largest trade that goes through.
+"""
+import numpy as np
+import pytest
+
+from scripts import arb_solver
+from scripts.levamm import LEVAMM, State, AMMRevert
+
+E = 10**18
+FEE = 7 * 10**15
+
+
+def _snap(price, debt=500_000 * E, n=1):
+    # 1M crvUSD + 10 BTC (8 decimals) over 1000 LP; the AMM holds 500 LP at an oracle of 2000 each
+    return arb_solver.Snapshot(*([v] * n for v in (2000 * E, 500 * E, debt, FEE, 1_000_000 * E, 10 * 10**8,
+                                                   1000 * E, price * E, 8)))
+
+
+@pytest.mark.parametrize("price", [90_000, 96_000, 103_000, 110_000])
+def test_optimal(price):
+    snap = _snap(price)
+    i, dx = arb_solver.optimal_size(snap)
+    assert i[0] == (0 if price > 100_000 else 1)
+    best = arb_solver._routes(snap, i, dx)
+    for m in (0.99, 1.01):
+        near = arb_solver._routes(snap, i, np.array([int(dx[0] * m)], dtype=object))
+        for route in ("amm", "vpool"):
+            assert near[route][2][0] < best[route][2][0]
+    # The VirtualPool wraps the same AMM trade: same profit up to rounding
+    assert best["vpool"][2][0] == pytest.approx(best["amm"][2][0], rel=1e-4)
+
+    trade, = arb_solver.solve(snap)
+    assert trade.i == i[0] and trade.profit == max(r[2][0] for r in best.values()) > 0
+
+
+def test_inside_fee_band():
+    assert arb_solver.solve(_snap(100_000)) == [None]
+    assert arb_solver.optimal_size(_snap(100_500))[1][0] == 0
+
+
+def test_batch():
+    prices = [90_000, 100_000, 103_000, 110_000]
+    snap = arb_solver.Snapshot(*[sum(col, []) for col in zip(*(_snap(p) for p in prices))])
+    assert arb_solver.solve(snap) == [arb_solver.solve(_snap(p))[0] for p in prices]
+
+
+def test_reverting_optimum_is_cut_back():
+    # Debt at the top of the safe band and the LP well below the oracle: arbitrageurs sell LP
+    # into the AMM, which adds debt - away from 2x
+    snap = _snap(50_000, debt=530_000 * E)
+    i, dx = arb_solver.optimal_size(snap)
+    state = State(2000 * E, 500 * E, 530_000 * E)
+    amm = LEVAMM(FEE)
+    with pytest.raises(AMMRevert):
+        amm.exchange(1, 0, dx[0], state)
+
+    trade, = arb_solver.solve(snap)
+    assert trade.route == "amm" and trade.profit > 0 and trade.in_amount < dx[0]
+    assert amm.exchange(1, 0, trade.in_amount, state)[0] == trade.out_amount
+    with pytest.raises(AMMRevert):
+        amm.exchange(1, 0, trade.in_amount * 1001 // 1000, state)
@@ -0,0 +1,70 @@
+"""
+scripts/block_index.py on a synthetic chain: pre-merge-like irregular blocks, then 12s slots with
+missed ones, against a brute-force floor search.
+"""
+import random
+from bisect import bisect_right
+
+import pytest
+
+from scripts import block_index
+
+
+def _chain():
+    rng = random.Random(0)
+    ts = [0, 1_438_269_988]                      # genesis at 0, as on mainnet
+    for _ in range(200_000):
+        ts.append(ts[-1] + rng.randint(1, 30))
+    for _ in range(300_000):
+        ts.append(ts[-1] + 12 * (2 if rng.random() < 0.01 else 1))
+    return ts
+
+
+TS = _chain()
+
+
+class RPC:
+    def __init__(self):
+        self.batches = []
+
+    def fetch(self, method, params):
+        return self.fetch_multi([(method, params)])[0]
+
+    def fetch_multi(self, payloads):
+        self.batches.append(len(payloads))
+        out = []
+        for method, (block, _) in payloads:
+            n = len(TS) - 1 if block == "latest" else int(block, 16)
+            out.append({"number": hex(n), "timestamp": hex(TS[n])})
+        return out
+
+
+def test_blocks_at(tmp_path):
+    rng = random.Random(1)
+    start = TS[400_000]
+    targets = [start + 1_700 * i + rng.randint(0, 11) for i in range(150)]   # export windows, ~140 blocks apart
+    targets += [TS[1], TS[1] + 5, TS[150_000], TS[-1] - 1, TS[-1] + 100]
+
+    rpc = RPC()
+    index = block_index.BlockIndex(rpc, tmp_path / "blocks.sqlite")
+    blocks = index.blocks_at(targets)
+    assert blocks == [bisect_right(TS, t) - 1 for t in targets]
+    assert len(rpc.batches) < 25                      # rounds, not one header fetch per probe
+    assert index.fetched < 10 * len(targets)
+
+    # A new run over the same export: every bracket is already tight on disk
+    rpc = RPC()
+    index = block_index.BlockIndex(rpc, tmp_path / "blocks.sqlite")
+    assert index.blocks_at(targets[:150]) == blocks[:150]
+    assert index.fetched == 0 and len(rpc.batches) == 1   # just the head
+
+
+def test_tail_not_stored(tmp_path):
+    index = block_index.BlockIndex(RPC(), tmp_path / "blocks.sqlite")
+    index.ts(len(TS) - 2)
+    index.ts(1_000)
+    stored = [n for n, in index._db.execute("SELECT number FROM blocks")]
+    assert 1_000 in stored and len(TS) - 2 not in stored
+
+    with pytest.raises(ValueError):
+        index.blocks_at([-1])
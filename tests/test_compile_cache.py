@@ -0,0 +1,52 @@
+"""
+scripts/compile_cache.py keys compiled artifacts on text alone, so the key must move whenever
+anything that reaches the compiler does: the source, any transitively imported file, the settings.
+"""
+import boa
+from vyper.compiler.settings import OptimizationLevel
+
+from scripts import compile_cache
+
+
+LIB = """
+# pragma version 0.4.3
+X: constant(uint256) = {}
+"""
+
+MAIN = """
+# pragma version 0.4.3
+import lib
+
+@external
+@view
+def x() -> uint256:
+    return lib.X
+"""
+
+
+def test_import_change_invalidates(tmp_path):
+    (tmp_path / "lib.vy").write_text(LIB.format(1))
+    main = tmp_path / "main.vy"
+    main.write_text(MAIN)
+
+    key = compile_cache.fingerprint(MAIN, main)
+    assert compile_cache.fingerprint(MAIN, main) == key
+    (tmp_path / "lib.vy").write_text(LIB.format(2))
+    assert compile_cache.fingerprint(MAIN, main) != key
+
+
+def test_cached_load(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lib.vy").write_text(LIB.format(1))
+    (tmp_path / "main.vy").write_text(MAIN)
+    compile_cache.install(tmp_path / "cache")
+    try:
+        assert boa.load("main.vy").x() == 1
+        assert boa.load("main.vy").x() == 1  # served from the cache
+        assert any((tmp_path / "cache").rglob("*.pickle"))
+
+        (tmp_path / "lib.vy").write_text(LIB.format(2))
+        assert boa.load("main.vy").x() == 2
+        assert boa.load("main.vy", compiler_args={"optimize": OptimizationLevel.CODESIZE}).x() == 2
+    finally:
+        compile_cache.install()
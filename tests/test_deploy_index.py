@@ -0,0 +1,94 @@
+"""
+scripts/deploy_index.py against an in-process stand-in chain: a Factory whose MarketParameters
+logs name what it created, cryptopools deployed elsewhere, and an archive horizon.
+"""
+import pytest
+from eth_abi import encode
+from eth_utils import to_checksum_address
+
+from scripts import deploy_index
+from scripts.log_scanner import RPCError
+
+
+HEAD = 5_000_000
+SERVED_FROM = 1_000                   # the node answers eth_getCode from here on
+FACTORY = to_checksum_address(deploy_index.FACTORY)
+POOLS = [to_checksum_address("0x" + f"{i:02x}" * 20) for i in (0xa1, 0xa2)]
+
+
+def _addr(market, name):
+    return to_checksum_address("0x" + f"{market:02x}{'amm lt price_oracle virtual_pool staker'.split().index(name):02x}" * 10)
+
+
+def _market_log(i, pool, block, vpool_staker=True, staker=None):
+    data = [_addr(i, "amm"), _addr(i, "lt"), _addr(i, "price_oracle"),
+            _addr(i, "virtual_pool") if vpool_staker else deploy_index.EMPTY,
+            staker or (_addr(i, "staker") if vpool_staker else deploy_index.EMPTY), "0x" + "ee" * 20]
+    return {"address": FACTORY.lower(), "blockNumber": hex(block), "logIndex": "0x0",
+            "topics": [deploy_index.MARKET_PARAMETERS, "0x" + encode(["uint256"], [i]).hex(),
+                       "0x" + "00" * 32, "0x" + encode(["address"], [pool]).hex()],
+            "data": "0x" + encode(["address"] * 6, data).hex()}
+
+
+class Chain:
+    def __init__(self):
+        self.code = {FACTORY: 2_000_000, POOLS[0]: 2_100_000, POOLS[1]: 3_000_000,
+                     to_checksum_address("0x" + "5e" * 20): 500}
+        self.logs = [_market_log(0, POOLS[0], 2_200_000, vpool_staker=False),
+                     _market_log(1, POOLS[0], 2_300_000),
+                     _market_log(0, POOLS[0], 2_400_000, staker=_addr(9, "staker")),   # fill_staker_vpool
+                     _market_log(2, POOLS[1], HEAD - 10)]                             # not final yet
+        self.calls = []
+        self.head = HEAD
+        self.throttle_from = None         # eth_getCode calls from this one on fail with a rate limit
+
+    def __call__(self, method, params):
+        self.calls.append(method)
+        if method == "eth_getBlockByNumber":
+            return {"number": hex(self.head)}
+        if method == "eth_getCode":
+            block = int(params[1], 16)
+            if self.throttle_from is not None and self.calls.count(method) > self.throttle_from:
+                raise RPCError(method, {"code": -32005, "message": "project ID request rate exceeded"})
+            if block < SERVED_FROM:
+                raise RPCError(method, {"code": -32000, "message": "missing trie node"})
+            return "0x6000" if block >= self.code.get(to_checksum_address(params[0]), HEAD + 1) else "0x"
+        lo, hi = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        return [log for log in self.logs if lo <= int(log["blockNumber"], 16) <= hi]
+
+
+def test_update(tmp_path):
+    chain = Chain()
+    path = tmp_path / "deploy_blocks.json"
+    index = deploy_index.update(chain, extra=["0x" + "5e" * 20], path=path)
+    blocks = index["blocks"]
+
+    assert blocks[FACTORY] == 2_000_000
+    assert blocks[POOLS[0]] == 2_100_000
+    assert POOLS[1] not in blocks                              # its market is less than CONFIRMATIONS deep
+    assert blocks[to_checksum_address("0x" + "5e" * 20)] == SERVED_FROM   # as far back as the node serves
+    assert blocks[_addr(1, "amm")] == blocks[_addr(1, "staker")] == 2_300_000
+    assert blocks[_addr(0, "lt")] == 2_200_000 and blocks[_addr(9, "staker")] == 2_400_000
+    assert deploy_index.EMPTY not in blocks
+    assert index["markets"][0]["staker"] == _addr(9, "staker") and len(index["markets"]) == 2
+
+    # A rerun once the new market is final: only the new stretch is scanned, only the new pool bisected
+    chain.calls.clear()
+    chain.head = HEAD + 1_000
+    index = deploy_index.update(chain, path=path)
+    assert index["blocks"][POOLS[1]] == 3_000_000 and index["blocks"][_addr(2, "amm")] == HEAD - 10
+    assert chain.calls.count("eth_getLogs") == 1
+    assert chain.calls.count("eth_getCode") <= 23               # one bisection over [0, HEAD - 10]
+    assert deploy_index.load(path) == index
+
+
+def test_rpc_error_not_cached(tmp_path):
+    chain = Chain()
+    chain.throttle_from = 5
+    path = tmp_path / "deploy_blocks.json"
+    with pytest.raises(RPCError, match="rate exceeded"):
+        deploy_index.update(chain, path=path)
+    assert not path.exists()
+
+    chain.throttle_from = None
+    assert deploy_index.update(chain, path=path)["blocks"][FACTORY] == 2_000_000
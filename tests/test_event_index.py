@@ -0,0 +1,93 @@
+"""
+scripts/event_index.py against an in-process stand-in chain: encoded VotingEscrow / AMM events,
+a head that moves between syncs and a tail that gets reorged.
+"""
+from eth_abi import encode
+
+from scripts import event_index
+from scripts.log_scanner import RPCError
+
+
+VE = event_index.VOTING_ESCROW
+AMMS = ["0x" + "a1" * 20, "0x" + "a2" * 20]
+ve_deposit = event_index.EVENTS["voting_escrow"][0]
+exchange, add_liquidity, _ = event_index.EVENTS["amm"]
+
+
+def _log(event, address, block, index, *args, salt="00"):
+    indexed = [encode([t], [a]) for (_, t, i), a in zip(event.fields, args) if i]
+    data = encode([t for _, t, i in event.fields if not i], [a for (_, _, i), a in zip(event.fields, args) if not i])
+    return {"address": address, "topics": [event_index.topic0(event)] + ["0x" + t.hex() for t in indexed],
+            "data": "0x" + data.hex(), "blockNumber": hex(block), "logIndex": hex(index),
+            "transactionHash": "0x" + salt * 32}
+
+
+class Chain:
+    def __init__(self, head, finalized=True):
+        self.head = head
+        self.finalized = finalized
+        self.logs = []
+        self.ranges = []
+
+    def __call__(self, method, params):
+        if method == "eth_getBlockByNumber":
+            if params[0] == "finalized" and not self.finalized:
+                raise RPCError(method, {"code": -32602, "message": "invalid block tag"})
+            return {"number": hex(self.head - 10 if params[0] == "finalized" else self.head)}
+        f = params[0]
+        lo, hi = int(f["fromBlock"], 16), int(f["toBlock"], 16)
+        self.ranges.append((lo, hi))
+        addresses = [a.lower() for a in f["address"]]
+        return [log for log in self.logs if lo <= int(log["blockNumber"], 16) <= min(hi, self.head)
+                and log["address"] in addresses and log["topics"][0] in f["topics"][0]]
+
+
+def test_decode():
+    user = "0x" + "12" * 20
+    row = event_index.decode_log(ve_deposit, _log(ve_deposit, VE, 5, 2, user, user, 10**30, 2**40, 1, 1234))
+    assert row[:2] == [5, 2]
+    assert row[4:] == [event_index.to_checksum_address(user)] * 2 + [str(10**30), str(2**40), "1", "1234"]
+
+    row = event_index.decode_log(add_liquidity, _log(add_liquidity, AMMS[0], 5, 0, [3, 4], 5, 6))
+    assert row[4:] == ["3", "4", "5", "6"]
+    assert list(event_index.columns(add_liquidity)) == ["token_amounts_0", "token_amounts_1", "invariant", "price_oracle"]
+
+
+def test_sync():
+    db = event_index.connect(":memory:")
+    chain = Chain(head=1_000)
+    buyer = "0x" + "bb" * 20
+    contracts = {"voting_escrow": [VE], "amm": AMMS}
+    chain.logs = [_log(ve_deposit, VE.lower(), 100, 0, buyer, buyer, 1, 2, 1, 3),
+                  _log(exchange, AMMS[0], 200, 0, buyer, 0, 10, 1, 20, 1, 10**18),
+                  _log(exchange, AMMS[1], 200, 1, buyer, 1, 20, 0, 10, 1, 10**18),
+                  _log(exchange, AMMS[0], 995, 0, buyer, 0, 7, 1, 8, 1, 10**18, salt="01")]
+
+    assert event_index.sync(db, chain, contracts, start_block=10) == {"ve_deposit": 1, "amm_exchange": 3}
+    assert db.execute("SELECT block, kind, COUNT(*) FROM cursor GROUP BY kind").fetchall() == \
+        [(990, "amm", 2), (990, "voting_escrow", 1)]
+    assert sorted(lo for lo, hi in chain.ranges) == [10, 10]  # both AMMs in one scan
+
+    # Head moves, the unfinalized tail (> 990) is reorged: its swap is gone, another one lands
+    chain.head, chain.ranges = 2_000, []
+    chain.logs = chain.logs[:3] + [_log(exchange, AMMS[1], 1_500, 0, buyer, 0, 1, 1, 1, 1, 10**18, salt="02")]
+    assert event_index.sync(db, chain, contracts, start_block=10) == {"amm_exchange": 1}
+    assert chain.ranges == [(991, 2_000), (991, 2_000)]  # only past the cursor
+    rows = db.execute("SELECT block, tx_hash, tokens_sold FROM amm_exchange ORDER BY block, log_index").fetchall()
+    assert rows == [(200, "0x" + "00" * 32, "10"), (200, "0x" + "00" * 32, "20"), (1_500, "0x" + "02" * 32, "1")]
+
+    # A new market starts from the beginning, on its own
+    chain.ranges = []
+    event_index.sync(db, chain, {"amm": AMMS + ["0x" + "a3" * 20]}, start_block=10)
+    assert sorted(chain.ranges) == [(10, 2_000), (1_991, 2_000)]
+
+    # ... or from its creation block, when known
+    chain.ranges = []
+    new = event_index.to_checksum_address("0x" + "a4" * 20)
+    event_index.sync(db, chain, {"amm": [new]}, start_block=10, starts={new: 1_200})
+    assert chain.ranges == [(1_200, 2_000)]
+
+
+def test_no_finalized_tag():
+    chain = Chain(head=1_000, finalized=False)
+    assert event_index.safe_block(chain, 1_000) == 1_000 - event_index.CONFIRMATIONS
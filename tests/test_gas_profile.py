@@ -0,0 +1,35 @@
+"""
+scripts/gas_profile.py folds a profiled call onto source lines: every unit of gas the call used
+must land on exactly one line, and SLOADs / external calls must be attributed where they happen.
+"""
+import boa
+
+from scripts import gas_profile
+
+
+def test_line_profile_accounts_for_all_gas(amm, price_oracle, collateral_token, stablecoin, admin, accounts):
+    collateral = 10**18
+    debt = price_oracle.price() * collateral // 10**18 // 2
+    stablecoin._mint_for_testing(amm.address, 10**60)
+    collateral_token._mint_for_testing(admin, collateral)
+    with boa.env.prank(admin):
+        amm._deposit(collateral, debt)
+        collateral_token.transfer(amm.address, collateral)
+    stablecoin._mint_for_testing(accounts[0], 1000 * 10**18)
+
+    with gas_profile.profiled():
+        with boa.env.prank(accounts[0]):
+            amm.exchange(0, 1, 1000 * 10**18, 0)
+    rows = gas_profile.profile(amm)
+
+    # Every callee (oracle, tokens) is a Vyper contract known to boa, so nothing is left unattributed
+    assert sum(r["gas"] for r in rows) == amm._computation.get_gas_used()
+    calls = [r for r in rows if r["calls"]]
+    assert any("price_w()" in r["source"] for r in calls)
+    assert all(r["call_gas"] > 0 for r in calls)
+    assert sum(r["sload"] for r in rows) > 0
+
+    functions, tags = gas_profile.summarize(rows)
+    assert tags["isqrt"] > 0  # AMM.sqrt
+    assert {f["fn"] for f in functions} >= {"exchange", "get_x0"}
+    assert "exchange" in gas_profile.report("AMM.exchange", rows)
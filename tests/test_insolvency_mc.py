@@ -0,0 +1,62 @@
+"""
+scripts/insolvency_mc.py: the float curve and LEVAMM against the boundary facts of
+tests/lt/test_insolvency_boundary.py and the integer reference of scripts/levamm.py, and a
+short simulation run.
+"""
+import numpy as np
+import pytest
+
+from scripts import insolvency_mc
+from scripts.levamm import LEVAMM, State
+
+
+@pytest.mark.parametrize("A_true", [1.25, 4.5, 14, 30])
+def test_curve(A_true):
+    curve = insolvency_mc.Curve(int(A_true * 10**4))
+    assert curve.portfolio_value(1.0) == pytest.approx(1.0, abs=1e-6)
+    p = np.linspace(0.5, 2, 50)
+    assert (np.diff(curve.portfolio_value(p)) > 0).all()
+    x, y = curve.at(p)
+    assert curve.at_ratio(x / y)[0] == pytest.approx(x, rel=1e-4)
+    # Return-0 (portfolio_value < 9/16) is reachable inside the clamp only for high A
+    assert (curve.portfolio_value(0.5) < 9 / 16) == (A_true >= 14)
+
+
+@pytest.mark.parametrize("price", [0.9, 0.95, 1.05, 1.1])
+def test_levamm_arbitrage(price):
+    fee = 0.013
+    amm = insolvency_mc.LEVAMMFloat(fee)
+    coll, debt, ok = amm.arbitrage(np.array([1.0]), np.array([1.0]), np.array([0.5]), np.array([price]))
+    assert ok.all()
+
+    ref = LEVAMM(int(fee * 10**18))
+    state = State(10**18, 10**18, 5 * 10**17)
+    if price < 1:
+        out, new = ref.exchange(1, 0, int((coll[0] - 1) * 1e18), state)
+        assert out / 1e18 == pytest.approx(debt[0] - 0.5, rel=1e-6)
+    else:
+        out, new = ref.exchange(0, 1, int((0.5 - debt[0]) * 1e18), state)
+        assert out / 1e18 == pytest.approx(1 - coll[0], rel=1e-6)
+    # The AMM is left at the edge of the fee band around the external price (the fee it kept
+    # nudges x0, hence the tolerance)
+    assert ref.get_p(new) / 1e18 == pytest.approx(price / (1 - fee) if price < 1 else price * (1 - fee), rel=fee / 2)
+
+    # Inside the fee band there is nothing to arbitrage
+    assert not amm.arbitrage(np.array([1.0]), np.array([1.0]), np.array([0.5]), np.array([1 + fee / 2]))[2].any()
+
+
+def test_simulate(monkeypatch):
+    params = insolvency_mc.Params(A=5 * 10**4, fee=0.013, rate=0.05)
+    out = insolvency_mc.simulate(params, n_paths=64, horizon_days=2)
+    np.testing.assert_equal(insolvency_mc.simulate(params, n_paths=64, horizon_days=2), out)   # same seed, same paths
+    for name in insolvency_mc.MARKETS + ["any"]:
+        assert 0 <= out[f"{name}_insolvent_prob"] <= out[f"{name}_return0_prob"] <= 1
+    assert out["any_return0_prob"] >= max(out[f"{m}_return0_prob"] for m in insolvency_mc.MARKETS)
+
+    # A flat market: the debt grows, but its interest comes back through the pool
+    monkeypatch.setattr(insolvency_mc, "VOL", [0.0, 0.0])
+    monkeypatch.setattr(insolvency_mc, "JUMPS_PER_YEAR", 0.0)
+    out = insolvency_mc.simulate(params, n_paths=4, horizon_days=2)
+    assert out["any_return0_prob"] == out["any_safe_band_prob"] == 0
+    assert out["BTC_min_coverage_p50"] == pytest.approx(2.0, rel=1e-3)
+    assert out["BTC_lt_value_p50"] == pytest.approx(1.0, abs=1e-4) and out["BTC_admin_fee_mean"] >= 0
@@ -0,0 +1,139 @@
+"""
+scripts/log_scanner.py against a local stand-in node: an eth_getLogs server over synthetic logs
+which refuses big answers, rate-limits now and then and answers out of order.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scripts import log_scanner
+
+
+HEAD = 200_000
+MAX_RESULTS = 50
+ADDRESS = "0x" + "11" * 20
+TOPIC_A = "0x" + "aa" * 32
+TOPIC_B = "0x" + "bb" * 32
+
+
+def _logs():
+    rng = random.Random(0)
+    logs = []
+    for block in sorted(rng.sample(range(HEAD + 1), 1500)):
+        for i in range(rng.choice([1, 1, 1, 3])):
+            logs.append({"address": rng.choice([ADDRESS, "0x" + "22" * 20]),
+                         "topics": [rng.choice([TOPIC_A, TOPIC_B])],
+                         "blockNumber": hex(block), "logIndex": hex(i), "data": "0x"})
+    # A dense stretch: more logs in one block range than the node will return at once
+    logs += [{"address": ADDRESS, "topics": [TOPIC_A], "blockNumber": hex(150_000 + i // 4),
+              "logIndex": hex(100 + i % 4), "data": "0x"} for i in range(400)]
+    return logs
+
+
+LOGS = _logs()
+
+
+class Node(BaseHTTPRequestHandler):
+    calls = []
+    flaky = True  # rate-limit every 5th request
+    throttled = 0  # answer this many eth_getLogs requests with Infura's -32005 rate limit
+    rng = random.Random(1)
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload, code=200):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        method, params = req["method"], req["params"]
+        with self.lock:
+            self.calls.append((method, params))
+            flaky = self.flaky and len(self.calls) % 5 == 0
+            delay = self.rng.random() * 0.01
+        time.sleep(delay)
+        if method == "eth_getBlockByNumber":
+            return self._reply({"jsonrpc": "2.0", "id": 1, "result": {"number": hex(HEAD)}})
+        if method == "eth_getLogs" and Node.throttled:
+            with self.lock:
+                Node.throttled -= 1
+            return self._reply({"jsonrpc": "2.0", "id": 1, "error": {
+                "code": -32005, "message": "project ID request rate exceeded"}})
+        if flaky:
+            return self._reply({"jsonrpc": "2.0", "id": 1, "error": {"code": 429, "message": "Too Many Requests"}}, 429)
+        f = params[0]
+        if len(f["address"]) != 42:
+            return self._reply({"jsonrpc": "2.0", "id": 1, "error": {"code": -32602, "message": "invalid address"}})
+        lo, hi = int(f["fromBlock"], 16), int(f["toBlock"], 16)
+        out = [log for log in LOGS if lo <= int(log["blockNumber"], 16) <= hi and log["address"] == f["address"]
+               and all(t is None or log["topics"][i] in (t if isinstance(t, list) else [t])
+                       for i, t in enumerate(f["topics"]))]
+        if len(out) > MAX_RESULTS and lo < hi:
+            return self._reply({"jsonrpc": "2.0", "id": 1, "error": {
+                "code": -32005, "message": f"query returned more than {MAX_RESULTS} results"}})
+        return self._reply({"jsonrpc": "2.0", "id": 1, "result": out})
+
+
+@pytest.fixture
+def node():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Node)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    Node.calls.clear()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    Node.flaky = True
+    Node.throttled = 0
+
+
+def test_get_logs(node):
+    rpc = log_scanner.JsonRPC(node, backoff=0.001)
+    logs = log_scanner.get_logs(rpc, ADDRESS, [TOPIC_A], 0, "latest", chunk=20_000, workers=8)
+
+    expected = [log for log in LOGS if log["address"] == ADDRESS and log["topics"][0] == TOPIC_A]
+    expected.sort(key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+    assert logs == expected
+
+    ranges = [(int(p[0]["fromBlock"], 16), int(p[0]["toBlock"], 16)) for m, p in Node.calls if m == "eth_getLogs"]
+    assert any(hi - lo + 1 < 20_000 for lo, hi in ranges if lo % 20_000)  # dense ranges got split
+    assert len(ranges) > len(set(ranges))                                   # rate-limited ranges retried
+
+
+def test_topic_alternatives(node):
+    rpc = log_scanner.JsonRPC(node, backoff=0.001)
+    logs = log_scanner.get_logs(rpc, ADDRESS, [[TOPIC_A, TOPIC_B]], 10_000, 60_000, chunk=5_000)
+    assert logs == [log for log in sorted(LOGS, key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+                    if log["address"] == ADDRESS and 10_000 <= int(log["blockNumber"], 16) <= 60_000]
+
+
+def test_rpc_error(node):
+    Node.flaky = False
+    rpc = log_scanner.JsonRPC(node)
+    with pytest.raises(log_scanner.RPCError, match="invalid address"):
+        log_scanner.get_logs(rpc, "0x11", [TOPIC_A], 0, 100_000)
+    assert len(Node.calls) == 11  # one per chunk: not retried, not split
+
+
+def test_rate_limit_not_split(node):
+    Node.flaky = False
+    Node.throttled = 6
+    rpc = log_scanner.JsonRPC(node, backoff=0.001)
+    logs = log_scanner.get_logs(rpc, ADDRESS, [TOPIC_A], 10_000, 59_999, chunk=5_000, workers=4)
+
+    assert logs == [log for log in sorted(LOGS, key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+                    if log["address"] == ADDRESS and log["topics"][0] == TOPIC_A
+                    and 10_000 <= int(log["blockNumber"], 16) <= 59_999]
+    ranges = [(int(p[0]["fromBlock"], 16), int(p[0]["toBlock"], 16)) for m, p in Node.calls if m == "eth_getLogs"]
+    assert len(ranges) == 10 + 6                                      # throttled requests retried as they were
+    assert set(ranges) == {(b, b + 4_999) for b in range(10_000, 60_000, 5_000)}  # never split
@@ -0,0 +1,105 @@
+"""
+scripts/rpc_cache.py against a local stand-in node which answers eth_call with a digest of
+(block, to, calldata) and counts what it is asked.
+"""
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from boa.rpc import RPCError
+
+from scripts import rpc_cache
+
+
+HEAD = 1_000
+TO = "0x" + "ab" * 20
+
+
+class Node(BaseHTTPRequestHandler):
+    calls = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _answer(self, req):
+        method, params = req["method"], req["params"]
+        with self.lock:
+            self.calls.append(method)
+        if method == "eth_blockNumber":
+            result = hex(HEAD)
+        elif method == "eth_chainId":
+            result = "0x1"
+        elif params[0]["data"] == "0xdead":
+            return {"jsonrpc": "2.0", "id": req["id"], "error": {"code": 3, "message": "execution reverted"}}
+        else:
+            call = json.dumps([params[1], params[0]["to"].lower(), params[0]["data"], len(self.calls)])
+            result = "0x" + hashlib.sha256(call.encode()).hexdigest()
+        return {"jsonrpc": "2.0", "id": req["id"], "result": result}
+
+    def do_POST(self):
+        req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        res = [self._answer(r) for r in req] if isinstance(req, list) else self._answer(req)
+        body = json.dumps(res).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def node():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Node)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    Node.calls.clear()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def _call(data, block, to=TO):
+    return ("eth_call", [{"to": to, "data": data}, block])
+
+
+def test_cache(node, tmp_path):
+    payloads = [_call(f"0x{i:08x}", hex(b)) for i in range(3) for b in (100, 200, HEAD - rpc_cache.CONFIRMATIONS)]
+    rpc = rpc_cache.CachedRPC(node, tmp_path / "rpc.sqlite")
+    first = rpc.fetch_multi(payloads)
+    assert Node.calls.count("eth_call") == 9 and rpc.misses == 9
+
+    # A new process: everything from disk, in order, not a single eth_call
+    Node.calls.clear()
+    rpc = rpc_cache.CachedRPC(node, tmp_path / "rpc.sqlite")
+    assert rpc.fetch_multi(payloads) == first
+    assert rpc.fetch(*payloads[4]) == first[4]
+    assert Node.calls.count("eth_call") == 0 and rpc.hits == 10
+    # Checksummed or not, upper-case calldata or not: the same entry
+    assert rpc.fetch(*_call("0x00000001", hex(100), to=TO.upper().replace("0X", "0x"))) == first[3]
+
+    # Mixed batch: only the misses are sent, the answers land in place
+    Node.calls.clear()
+    mixed = [payloads[0], _call("0x01", hex(100)), payloads[1], _call("0x02", hex(100))]
+    out = rpc.fetch_multi(mixed)
+    assert out[0] == first[0] and out[2] == first[1] and None not in out
+    assert Node.calls.count("eth_call") == 2
+
+
+def test_not_cached(node, tmp_path):
+    rpc = rpc_cache.CachedRPC(node, tmp_path / "rpc.sqlite")
+    for block in ("latest", hex(HEAD - rpc_cache.CONFIRMATIONS + 1)):   # head / reorg-prone tail
+        assert rpc.fetch(*_call("0x01", block)) != rpc.fetch(*_call("0x01", block))
+    for _ in range(2):
+        with pytest.raises(RPCError):
+            rpc.fetch(*_call("0xdead", hex(100)))
+    assert Node.calls.count("eth_call") == 6 and rpc.hits == 0
+
+
+def test_disabled(node, tmp_path, monkeypatch):
+    monkeypatch.setenv("YB_RPC_CACHE", "")
+    rpc = rpc_cache.CachedRPC(node)
+    rpc.fetch(*_call("0x01", hex(100)))
+    rpc.fetch(*_call("0x01", hex(100)))
+    assert Node.calls == ["eth_call", "eth_call"]
@@ -1,6 +1,10 @@
 import pytest
 import boa
 from tests_forked.networks import NETWORK
+from scripts import compile_cache
+
+
+compile_cache.install()
 
 
 FACTORY_ADDRESS = "0x370a449FeBb9411c95bf897021377fe0B7D100c0"